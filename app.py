@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from src.api.admission import AdmissionMiddleware
 from src.api.container import Container
 from src.api.routes import router
 from src.settings import Settings
@@ -18,6 +19,7 @@ settings = Settings()
 async def lifespan(application: FastAPI) -> AsyncGenerator:
     container = Container()
     container.init_resources(settings)
+    container.start_warmup()
     application.container = container  # type: ignore
 
     yield
@@ -30,6 +32,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['*'],
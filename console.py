@@ -1,11 +1,10 @@
 import asyncio
+from typing import TYPE_CHECKING, Dict, List
 
 import typer
 
-from src.console.chat import ChatService
-from src.console.message import InMemoryMessageRepository
-from src.console.query import HttpQueryService
-from src.console.rich_console import RichConsoleInterface
+if TYPE_CHECKING:
+    from src.services.routing import ShardRouter
 
 
 def create_app() -> typer.Typer:
@@ -17,6 +16,11 @@ def create_app() -> typer.Typer:
             rerank: bool = typer.Option(True, "--rerank/--no-rerank", help="Whether to rerank results"),
             base_url: str = typer.Option("http://app:8000", "--base-url", help="Base URL for the API")
     ) -> None:
+        from src.console.chat import ChatService
+        from src.console.message import InMemoryMessageRepository
+        from src.console.query import HttpQueryService
+        from src.console.rich_console import RichConsoleInterface
+
         message_repository = InMemoryMessageRepository()
         query_service = HttpQueryService(base_url=base_url)
         user_interface = RichConsoleInterface()
@@ -24,9 +28,249 @@ def create_app() -> typer.Typer:
         chat_service = ChatService(message_repository, query_service, user_interface)
         asyncio.run(chat_service.start_chat(top_k, rerank))
 
+    @app.command()
+    def loadtest(
+            queries_path: str = typer.Argument(..., help="Queries to replay, one text or JSON request body per line"),
+            base_url: str = typer.Option("http://app:8000", "--base-url", help="Base URL for the API"),
+            concurrency: int = typer.Option(8, "--concurrency", "-c", help="Maximum requests in flight"),
+            rate: float = typer.Option(0.0, "--rate", help="Arrivals per second, 0 keeps every slot busy"),
+            requests: int = typer.Option(0, "--requests", "-n", help="Requests to send, 0 replays the file once"),
+            top_k: int = typer.Option(3, "--top-k", "-k", help="Default top_k for plain-text queries"),
+            rerank: bool = typer.Option(True, "--rerank/--no-rerank", help="Default rerank for plain-text queries"),
+            timeout: float = typer.Option(60.0, "--timeout", help="Per-request timeout in seconds"),
+            output: str = typer.Option("", "--output", "-o", help="Write the JSON report to this file")
+    ) -> None:
+        import json
+
+        import httpx
+
+        from src.console.loadtest import LoadTest, load_queries
+
+        queries = load_queries(queries_path, {'top_k': top_k, 'rerank': rerank})
+
+        async def run() -> dict:
+            async with httpx.AsyncClient(
+                base_url=base_url,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            ) as client:
+                report = await LoadTest(client, queries, concurrency, rate or None).run(requests or None)
+                return report.to_dict()
+
+        report = json.dumps(asyncio.run(run()), indent=2)
+        if output:
+            with open(output, "w") as file:
+                file.write(report)
+        typer.echo(report)
+
+    @app.command('export-snapshot')
+    def export_snapshot(
+            path: str = typer.Argument(..., help="Snapshot file to write"),
+            collection: str = typer.Option("ai_course_docs", "--collection", help="Collection to export"),
+            embedding_model: str = typer.Option(
+                "text-embedding-ada-002",
+                "--embedding-model",
+                envvar="OPENAI_EMBEDDING_MODEL",
+                help="Embedding model recorded in the snapshot"
+            ),
+            qdrant_host: str = typer.Option("qdrant", "--qdrant-host", envvar="QDRANT_HOST"),
+            qdrant_port: int = typer.Option(6333, "--qdrant-port", envvar="QDRANT_PORT"),
+            qdrant_path: str = typer.Option("", "--qdrant-path", help="Use a local on-disk index instead of a server"),
+            qdrant_shards: str = typer.Option(
+                "", "--qdrant-shards", envvar="QDRANT_SHARDS", help="Comma-separated host:port shard endpoints"
+            )
+    ) -> None:
+        from src.services.snapshot import SnapshotService
+
+        client = _create_qdrant_client(qdrant_host, qdrant_port, qdrant_path, qdrant_shards)
+        info = SnapshotService(client).export(collection, path, embedding_model=embedding_model)
+        typer.echo(f"Exported {info.count} points ({info.dimensions} dims) from {info.collection} in {info.seconds}s")
+
+    @app.command('import-snapshot')
+    def import_snapshot(
+            path: str = typer.Argument(..., help="Snapshot file to load"),
+            collection: str = typer.Option("", "--collection", help="Target collection, defaults to the exported one"),
+            parallel: int = typer.Option(4, "--parallel", help="Concurrent upsert batches (server only)"),
+            projection_path: str = typer.Option(
+                "", "--projection", help="Projection file (see fit-projection) applied to the vectors"
+            ),
+            qdrant_host: str = typer.Option("qdrant", "--qdrant-host", envvar="QDRANT_HOST"),
+            qdrant_port: int = typer.Option(6333, "--qdrant-port", envvar="QDRANT_PORT"),
+            qdrant_path: str = typer.Option("", "--qdrant-path", help="Use a local on-disk index instead of a server"),
+            qdrant_shards: str = typer.Option(
+                "", "--qdrant-shards", envvar="QDRANT_SHARDS", help="Comma-separated host:port shard endpoints"
+            )
+    ) -> None:
+        from src.services.projection import EmbeddingProjection
+        from src.services.snapshot import SnapshotService
+
+        client = _create_qdrant_client(qdrant_host, qdrant_port, qdrant_path, qdrant_shards)
+        info = SnapshotService(client).load(
+            path,
+            collection_name=collection or None,
+            parallel=parallel,
+            projection=EmbeddingProjection.load(projection_path) if projection_path else None
+        )
+        typer.echo(f"Loaded {info.count} points into {info.collection} in {info.seconds}s")
+
+    @app.command('fit-projection')
+    def fit_projection(
+            snapshot_path: str = typer.Argument(..., help="Snapshot whose vectors are the corpus sample"),
+            output: str = typer.Argument(..., help="Projection file to write (.npz)"),
+            dimensions: int = typer.Option(..., "--dimensions", "-d", help="Output vector size"),
+            method: str = typer.Option("pca", "--method", help="pca or truncate"),
+            sample: int = typer.Option(10000, "--sample", help="Maximum number of sample vectors")
+    ) -> None:
+        from src.services.projection import EmbeddingProjection
+        from src.services.snapshot import SnapshotService
+
+        vectors = SnapshotService.read_vectors(snapshot_path, limit=sample)
+        projection = EmbeddingProjection.fit(vectors, dimensions, method)
+        projection.save(output)
+        typer.echo(f"Fitted {projection.name} projection from {len(vectors)} vectors of {vectors.shape[1]} dims")
+
+    @app.command('bench-results')
+    def bench_results(
+            snapshot_path: str = typer.Argument(..., help="Snapshot loaded into an in-memory index"),
+            requests: int = typer.Option(200, "--requests", "-n", help="Stored vectors replayed as queries"),
+            limit: int = typer.Option(5, "--limit", help="Hits per query"),
+            neighbors: int = typer.Option(0, "--neighbors", help="Neighboring chunks added to every hit")
+    ) -> None:
+        from qdrant_client import QdrantClient
+
+        from src.services.benchmark import benchmark_result_path
+        from src.services.snapshot import SnapshotService
+        from src.services.vector import VectorService
+        from src.settings import Settings
+        from src.utils.utils import create_ai_service
+
+        settings = Settings()
+        client = QdrantClient(':memory:')
+        info = SnapshotService(client).load(snapshot_path)
+        queries = SnapshotService.read_vectors(snapshot_path, limit=requests)
+        vector_service = VectorService(create_ai_service(settings.AI_PROVIDER, settings), client)
+
+        result = asyncio.run(benchmark_result_path(vector_service, info.collection, queries, limit, neighbors))
+        typer.echo(
+            f"{result.requests} queries against {info.count} points: "
+            f"CPU {result.cpu_ms_mean}ms mean / {result.cpu_ms_p95}ms p95, "
+            f"{result.allocated_kib_mean} KiB allocated, {result.response_bytes_mean} response bytes per request"
+        )
+
+    @app.command('evaluate')
+    def evaluate(
+            queries_path: str = typer.Argument(..., help="JSONL file with one labeled query per line"),
+            snapshot_path: str = typer.Option("", "--snapshot", help="Evaluate an in-memory copy of this snapshot"),
+            collection: str = typer.Option("ai_course_docs", "--collection", help="Collection to search"),
+            top_k: int = typer.Option(5, "--top-k", "-k", help="Hits per query that recall and MRR look at"),
+            oversampling: str = typer.Option("1,2,4", "--oversampling", help="Comma-separated candidate factors"),
+            rerank: str = typer.Option("off,adaptive,always", "--rerank", help="Comma-separated rerank modes"),
+            mmr: str = typer.Option("off", "--mmr", help="Comma-separated MMR lambdas, 'off' disables MMR"),
+            projections: List[str] = typer.Option(
+                [], "--projection", help="Projection file to compare against full vectors (needs --snapshot)"
+            ),
+            min_recall: float = typer.Option(0.0, "--min-recall", help="Quality bar for the cheapest configuration"),
+            output: str = typer.Option("", "--output", "-o", help="Write the JSON report to this file"),
+            qdrant_host: str = typer.Option("qdrant", "--qdrant-host", envvar="QDRANT_HOST"),
+            qdrant_port: int = typer.Option(6333, "--qdrant-port", envvar="QDRANT_PORT"),
+            qdrant_shards: str = typer.Option(
+                "", "--qdrant-shards", envvar="QDRANT_SHARDS", help="Comma-separated host:port shard endpoints"
+            )
+    ) -> None:
+        import json
+
+        from qdrant_client import QdrantClient
+
+        from src.services.evaluation import (
+            CountingAIService,
+            RetrievalSweep,
+            SweepTarget,
+            cheapest,
+            load_queries,
+            sweep_grid,
+        )
+        from src.services.projection import EmbeddingProjection, ProjectedAIService
+        from src.services.rate_limit import RateLimiter
+        from src.services.rerank import RelevanceScorer, RerankPolicy
+        from src.services.routing import ShardRouter
+        from src.services.snapshot import SnapshotService
+        from src.services.vector import VectorService
+        from src.settings import Settings
+        from src.utils.utils import create_ai_service, create_stage_ai_service
+
+        if projections and not snapshot_path:
+            raise typer.BadParameter("--projection needs --snapshot, the vectors are re-projected on load")
+
+        settings = Settings()
+        limiters: Dict[str, RateLimiter] = {}
+        ai_service = create_ai_service(settings.AI_PROVIDER, settings, limiters)
+        scorer = RelevanceScorer(
+            CountingAIService(
+                create_stage_ai_service(
+                    settings, settings.RERANK_PROVIDER, settings.RERANK_MODEL, ai_service, limiters
+                )
+            ),
+            mode=settings.RERANK_SCORING
+        )
+        policy = RerankPolicy(
+            margin_threshold=settings.RERANK_MARGIN_THRESHOLD,
+            gap_threshold=settings.RERANK_GAP_THRESHOLD,
+            entropy_threshold=settings.RERANK_ENTROPY_THRESHOLD,
+            temperature=settings.RERANK_TEMPERATURE
+        )
+
+        targets = []
+        if snapshot_path:
+            client = ShardRouter([QdrantClient(':memory:')])
+            collection = SnapshotService(client).load(snapshot_path).collection
+        else:
+            client = _create_qdrant_client(qdrant_host, qdrant_port, "", qdrant_shards)
+        targets.append(SweepTarget(
+            'full', VectorService(CountingAIService(ai_service), client, policy, scorer), collection
+        ))
+        for projection_path in projections:
+            projection = EmbeddingProjection.load(projection_path)
+            projected = f"{collection}_{projection.name}"
+            store = QdrantClient(':memory:')
+            SnapshotService(store).load(snapshot_path, collection_name=projected, projection=projection)
+            targets.append(SweepTarget(
+                projection.name,
+                VectorService(CountingAIService(ProjectedAIService(ai_service, projection)), store, policy, scorer),
+                projected
+            ))
+
+        grid = sweep_grid(
+            [target.name for target in targets],
+            [int(factor) for factor in oversampling.split(",")],
+            [mode.strip() for mode in rerank.split(",")],
+            [None if value.strip() == "off" else float(value) for value in mmr.split(",")]
+        )
+        results = asyncio.run(RetrievalSweep(targets, load_queries(queries_path), k=top_k).run(grid))
+        best = cheapest(results, min_recall)
+        report = json.dumps({
+            'k': top_k,
+            'min_recall': min_recall,
+            'results': [result.to_dict() for result in results],
+            'cheapest': best.config.name if best else None,
+        }, indent=2)
+        if output:
+            with open(output, "w") as file:
+                file.write(report)
+        typer.echo(report)
+
     return app
 
 
+def _create_qdrant_client(host: str, port: int, path: str, shards: str = "") -> "ShardRouter":
+    from qdrant_client import QdrantClient
+
+    from src.services.routing import ShardRouter, create_qdrant_clients
+
+    if path:
+        return ShardRouter([QdrantClient(path=path)])
+    return ShardRouter(create_qdrant_clients(host, port, shards))
+
+
 if __name__ == "__main__":
     app = create_app()
     app()
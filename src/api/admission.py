@@ -0,0 +1,142 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+ADMISSION_ROUTES = {
+    '/query': 'query',
+    '/upload': 'ingest',
+}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(f'{pool} queue is full')
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        max_queue: int,
+        max_wait: Optional[float] = None,
+        smoothing: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.smoothing = smoothing
+        self.clock = clock
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.service_time: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> float:
+        started = self.clock()
+        if self.active < self.concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return 0.0
+
+        if self.queued >= self.max_queue:
+            self._reject()
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            self._reject()
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+        self.admitted += 1
+        return self.clock() - started
+
+    def release(self, duration: Optional[float] = None) -> None:
+        self.active -= 1
+        if duration is not None:
+            average = self.service_time
+            self.service_time = duration if average is None else average + self.smoothing * (duration - average)
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.active += 1
+                return
+
+    def retry_after(self) -> int:
+        service_time = self.service_time or 1.0
+        return max(1, math.ceil(service_time * (self.queued + 1) / self.concurrency))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'concurrency': self.concurrency,
+            'active': self.active,
+            'queued': self.queued,
+            'max_queue': self.max_queue,
+            'admitted_total': self.admitted,
+            'rejected_total': self.rejected,
+            'service_time_ms': round(self.service_time * 1000, 2) if self.service_time is not None else None,
+        }
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        raise AdmissionRejected(self.name, self.retry_after())
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, routes: Optional[Dict[str, str]] = None):
+        self.app = app
+        self.routes = routes or ADMISSION_ROUTES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        pool = self._pool_for(scope)
+        if pool is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await pool.acquire()
+        except AdmissionRejected as error:
+            response = JSONResponse(
+                {'detail': f'Server is overloaded ({error.pool} queue is full), retry later'},
+                status_code=503,
+                headers={'Retry-After': str(error.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        scope.setdefault('state', {})['queue_wait_ms'] = round(waited * 1000, 2)
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release(time.monotonic() - started)
+
+    def _pool_for(self, scope: Scope) -> Optional[AdmissionPool]:
+        if scope['type'] != 'http' or scope['method'] == 'OPTIONS' or scope['path'] not in self.routes:
+            return None
+        container = getattr(scope.get('app'), 'container', None)
+        pools = container.get_service('admission') if container is not None else None
+        if not pools:
+            return None
+        return pools.get(self.routes[scope['path']])
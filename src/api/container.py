@@ -1,33 +1,172 @@
-from typing import Any, Dict
-
-from qdrant_client import QdrantClient
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
 
+from src.api.admission import AdmissionPool
+from src.services.base.ai_service import AIService
+from src.services.dedup import NearDuplicateIndex
+from src.services.document import DocumentService
+from src.services.query import QueryService
+from src.services.rate_limit import RateLimiter
+from src.services.rerank import RelevanceScorer, RerankPolicy
+from src.services.routing import CollectionRouter, ShardRouter, create_qdrant_clients
+from src.services.snapshot import SnapshotService
+from src.services.splitting import SplitterPool
 from src.services.vector import VectorService
 from src.settings import Settings
-from src.utils.utils import create_ai_service
+from src.utils.utils import create_ai_service, create_stage_ai_service
+
+logger = logging.getLogger(__name__)
 
 
 class Container:
     def __init__(self) -> None:
         self._services: Dict[str, Any] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        self.settings: Optional[Settings] = None
+        self.ready = False
+        self.warmup_error: Optional[str] = None
 
     def init_resources(self, settings: Settings) -> None:
-        self._services['ai'] = create_ai_service(settings.AI_PROVIDER)
-        self._services['qdrant'] = QdrantClient(
-            host=settings.QDRANT_HOST,
-            port=settings.QDRANT_PORT
+        self.settings = settings
+        self._services['admission'] = {
+            'query': AdmissionPool(
+                'query',
+                concurrency=settings.QUERY_CONCURRENCY,
+                max_queue=settings.QUERY_QUEUE_SIZE,
+                max_wait=settings.QUERY_QUEUE_TIMEOUT
+            ),
+            'ingest': AdmissionPool(
+                'ingest',
+                concurrency=settings.INGEST_CONCURRENCY,
+                max_queue=settings.INGEST_QUEUE_SIZE,
+                max_wait=settings.INGEST_QUEUE_TIMEOUT
+            ),
+        }
+        limiters: Dict[str, RateLimiter] = {}
+        self._services['ai'] = create_ai_service(settings.AI_PROVIDER, settings, limiters)
+        self._services['rerank_ai'] = create_stage_ai_service(
+            settings,
+            settings.RERANK_PROVIDER,
+            settings.RERANK_MODEL,
+            self._services['ai'],
+            limiters
+        )
+        self._services['answer_ai'] = create_stage_ai_service(
+            settings,
+            settings.ANSWER_PROVIDER,
+            settings.ANSWER_MODEL,
+            self._services['ai'],
+            limiters
+        )
+        self._services['collections'] = CollectionRouter(
+            settings.COLLECTION_NAME,
+            [name.strip() for name in settings.COLLECTIONS.split(',') if name.strip()]
+        )
+        self._services['qdrant'] = ShardRouter(
+            create_qdrant_clients(settings.QDRANT_HOST, settings.QDRANT_PORT, settings.QDRANT_SHARDS)
         )
         self._services['vector'] = VectorService(
             self._services['ai'],
-            self._services['qdrant']
+            self._services['qdrant'],
+            RerankPolicy(
+                mode=settings.RERANK_MODE,
+                margin_threshold=settings.RERANK_MARGIN_THRESHOLD,
+                gap_threshold=settings.RERANK_GAP_THRESHOLD,
+                entropy_threshold=settings.RERANK_ENTROPY_THRESHOLD,
+                temperature=settings.RERANK_TEMPERATURE
+            ),
+            RelevanceScorer(self._services['rerank_ai'], mode=settings.RERANK_SCORING),
+            points_dump_path=settings.POINTS_DUMP_PATH,
+            mmr_lambda=settings.MMR_LAMBDA,
+            oversampling=settings.SEARCH_OVERSAMPLING
+        )
+        self._services['splitter'] = SplitterPool(
+            workers=settings.SPLIT_WORKERS,
+            max_pending=settings.SPLIT_MAX_PENDING
+        )
+        self._services['document'] = DocumentService(
+            self._services['vector'],
+            self._services['splitter'],
+            self._services['collections'],
+            NearDuplicateIndex.load(settings.DEDUP_INDEX_PATH, settings.DEDUP_THRESHOLD)
+            if settings.DEDUP_INDEX_PATH else None
+        )
+        self._services['query'] = QueryService(
+            self._services['vector'],
+            max_context_tokens=settings.MAX_CONTEXT_TOKENS,
+            deadline_ms=settings.QUERY_DEADLINE_MS,
+            answer_service=self._services['answer_ai'],
+            collections=self._services['collections']
+        )
+
+    def start_warmup(self) -> None:
+        self._warmup_task = asyncio.create_task(self.warmup())
+
+    async def warmup(self) -> None:
+        try:
+            vector_service: VectorService = self._services['vector']
+            collections: CollectionRouter = self._services['collections']
+
+            await self._services['splitter'].warmup()
+            for ai_service in self.ai_services().values():
+                await ai_service.warmup()
+            await self._load_snapshot(collections.default)
+            for collection_name in collections.collections:
+                await vector_service.ensure_collection(collection_name)
+
+            if self.settings and self.settings.WARMUP_QUERY:
+                await vector_service.perform_search(
+                    collection_name=collections.default,
+                    query=self.settings.WARMUP_QUERY,
+                    limit=1,
+                    rerank=False
+                )
+        except Exception as error:
+            logger.exception('Warmup failed')
+            self.warmup_error = str(error)
+            return
+
+        self.ready = True
+        logger.info('Warmup completed')
+
+    async def _load_snapshot(self, collection_name: str) -> None:
+        if not self.settings or not self.settings.SNAPSHOT_PATH:
+            return
+        qdrant: ShardRouter = self._services['qdrant']
+        if qdrant.collection_exists(collection_name):
+            return
+        if not Path(self.settings.SNAPSHOT_PATH).exists():
+            logger.warning(f'Snapshot {self.settings.SNAPSHOT_PATH} not found, starting with an empty collection')
+            return
+
+        await asyncio.to_thread(
+            SnapshotService(qdrant).load,
+            self.settings.SNAPSHOT_PATH,
+            collection_name,
+            embedding_model=getattr(self._services['ai'], 'embedding_model', None)
         )
 
     async def cleanup(self) -> None:
-        if 'ai' in self._services:
-            self._services['ai'].close()
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        for ai_service in self.ai_services().values():
+            await ai_service.aclose()
+        if 'splitter' in self._services:
+            self._services['splitter'].close()
         if 'qdrant' in self._services:
             self._services['qdrant'].close()
         self._services.clear()
+        self.ready = False
+
+    def ai_services(self) -> Dict[str, AIService]:
+        services: Dict[str, AIService] = {}
+        for name in ('ai', 'rerank_ai', 'answer_ai'):
+            service = self._services.get(name)
+            if service is not None and all(service is not known for known in services.values()):
+                services[name] = service
+        return services
 
     def get_service(self, name: str) -> Any:
         return self._services.get(name)
@@ -1,7 +1,22 @@
 from fastapi import Request
 
+from src.services.base.ai_service import AIService
+from src.services.document import DocumentService
+from src.services.query import QueryService
 from src.services.vector import VectorService
 
 
+def get_ai_service(request: Request) -> AIService:
+    return request.app.container.get_service('ai')
+
+
 def get_vector_service(request: Request) -> VectorService:
     return request.app.container.get_service('vector')
+
+
+def get_document_service(request: Request) -> DocumentService:
+    return request.app.container.get_service('document')
+
+
+def get_query_service(request: Request) -> QueryService:
+    return request.app.container.get_service('query')
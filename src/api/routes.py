@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, UploadFile
+from typing import Any, Dict, Optional
 
-from src.api.depedencies import get_vector_service
+from fastapi import APIRouter, Depends, Request, UploadFile
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.api.depedencies import get_document_service, get_query_service
 from src.domain.chat import QueryRequest
 from src.domain.response import QueryResponse, UploadResponse
 from src.services.document import DocumentService
 from src.services.query import QueryService
-from src.services.vector import VectorService
 
 router = APIRouter()
 
@@ -13,16 +15,43 @@ router = APIRouter()
 @router.post('/upload')
 async def upload_document(
     file: UploadFile,
-    vector_service: VectorService = Depends(get_vector_service)
+    collection: Optional[str] = None,
+    document_service: DocumentService = Depends(get_document_service)
 ) -> UploadResponse:
-    document_service = DocumentService(vector_service)
-    return await document_service.process_document(file)
+    return await document_service.process_document(file, collection=collection)
 
 
-@router.post('/query')
+@router.post('/query', response_model=QueryResponse, response_class=ORJSONResponse)
 async def query_documents(
     request: QueryRequest,
-    vector_service: VectorService = Depends(get_vector_service)
-) -> QueryResponse:
-    query_service = QueryService(vector_service)
-    return await query_service.process_query(request)
+    http_request: Request,
+    query_service: QueryService = Depends(get_query_service)
+) -> ORJSONResponse:
+    queue_wait_ms = getattr(http_request.state, 'queue_wait_ms', 0.0)
+    response = await query_service.process_query(request, queue_wait_ms=queue_wait_ms)
+    return ORJSONResponse(response.model_dump())
+
+
+@router.get('/metrics')
+async def get_metrics(request: Request) -> Dict[str, Any]:
+    container = request.app.container
+    return {
+        **{name: service.stats() for name, service in container.ai_services().items()},
+        'splitter': container.get_service('splitter').stats(),
+        'admission': {name: pool.stats() for name, pool in container.get_service('admission').items()},
+    }
+
+
+@router.get('/health')
+async def health() -> Dict[str, str]:
+    return {'status': 'ok'}
+
+
+@router.get('/ready')
+async def ready(request: Request) -> JSONResponse:
+    container = request.app.container
+    if container.ready:
+        return JSONResponse({'status': 'ready'})
+    if container.warmup_error:
+        return JSONResponse({'status': 'failed', 'detail': container.warmup_error}, status_code=503)
+    return JSONResponse({'status': 'starting'}, status_code=503)
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from src.api.admission import AdmissionMiddleware, AdmissionPool, AdmissionRejected
+
+
+class FakeContainer:
+    def __init__(self, pools):
+        self.pools = pools
+
+    def get_service(self, name):
+        return self.pools if name == 'admission' else None
+
+
+def test_pool_queues_in_order_and_reports_wait():
+    pool = AdmissionPool('query', concurrency=1, max_queue=2)
+
+    async def scenario():
+        assert await pool.acquire() == 0.0
+        first = asyncio.create_task(pool.acquire())
+        second = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0.01)
+        assert pool.queued == 2
+
+        pool.release(0.5)
+        await asyncio.sleep(0)
+        assert first.done() and not second.done()
+        assert first.result() > 0
+
+        pool.release(0.5)
+        await second
+        pool.release(0.5)
+
+    asyncio.run(scenario())
+    assert pool.stats()['admitted_total'] == 3
+    assert pool.active == 0
+
+
+def test_pool_rejects_when_queue_is_full():
+    pool = AdmissionPool('ingest', concurrency=1, max_queue=1)
+
+    async def scenario():
+        await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as error:
+            await pool.acquire()
+        waiter.cancel()
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.pool == 'ingest'
+    assert error.retry_after >= 1
+    assert pool.rejected == 1
+
+
+def test_pool_rejects_after_max_wait():
+    pool = AdmissionPool('query', concurrency=1, max_queue=5, max_wait=0.01)
+
+    async def scenario():
+        await pool.acquire()
+        with pytest.raises(AdmissionRejected):
+            await pool.acquire()
+        pool.release()
+
+    asyncio.run(scenario())
+    assert pool.queued == 0
+    assert pool.active == 0
+
+
+def test_middleware_returns_503_with_retry_after():
+    pool = AdmissionPool('query', concurrency=1, max_queue=0)
+    application = FastAPI()
+    application.add_middleware(AdmissionMiddleware)
+    application.container = FakeContainer({'query': pool})  # type: ignore
+
+    @application.post('/query')
+    async def query(request: Request):
+        return {'queue_wait_ms': request.state.queue_wait_ms}
+
+    @application.get('/health')
+    async def health():
+        return {'status': 'ok'}
+
+    client = TestClient(application)
+    assert client.post('/query').json() == {'queue_wait_ms': 0.0}
+
+    pool.active = 1
+    response = client.post('/query')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert client.get('/health').status_code == 200
+
+
+def test_shed_responses_keep_cors_headers_and_preflights_skip_admission():
+    pool = AdmissionPool('query', concurrency=1, max_queue=0)
+    application = FastAPI()
+    application.add_middleware(AdmissionMiddleware)
+    application.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+    application.container = FakeContainer({'query': pool})  # type: ignore
+
+    @application.post('/query')
+    async def query():
+        return {}
+
+    client = TestClient(application)
+    pool.active = 1
+    origin = {'Origin': 'http://example.com'}
+
+    response = client.post('/query', headers=origin)
+    assert response.status_code == 503
+    assert response.headers['Access-Control-Allow-Origin'] == '*'
+
+    preflight = client.options('/query', headers={**origin, 'Access-Control-Request-Method': 'POST'})
+    assert preflight.status_code == 200
+    assert pool.rejected == 1
+    assert AdmissionMiddleware(application)._pool_for({'type': 'http', 'method': 'OPTIONS', 'path': '/query'}) is None
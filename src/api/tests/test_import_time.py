@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+IMPORT_BUDGETS_MS = {
+    'console': 1000,
+    'app': 4000,
+}
+
+
+def run_python(code: str, **env: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def cumulative_import_ms(stderr: str, module: str) -> float:
+    for line in reversed(stderr.splitlines()):
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise AssertionError(f'No import time reported for {module}')
+
+
+@pytest.mark.parametrize('module', sorted(IMPORT_BUDGETS_MS))
+def test_entry_point_import_time_budget(module):
+    run_python(f'import {module}')
+    result = run_python(f'import {module}')
+
+    elapsed = cumulative_import_ms(result.stderr, module)
+
+    assert elapsed < IMPORT_BUDGETS_MS[module], f'import {module} took {elapsed:.0f} ms'
+
+
+def test_console_does_not_import_http_client_eagerly():
+    result = run_python("import sys, console; print('httpx' in sys.modules)")
+
+    assert result.stdout.strip() == 'False'
+
+
+def test_only_configured_provider_is_imported():
+    code = (
+        'import sys, app\n'
+        'from src.utils.utils import create_ai_service\n'
+        "create_ai_service('ollama')\n"
+        "print('openai' in sys.modules)"
+    )
+    result = run_python(code, AI_PROVIDER='ollama')
+
+    assert result.stdout.strip() == 'False'
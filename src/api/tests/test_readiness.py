@@ -0,0 +1,88 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from qdrant_client import QdrantClient
+
+from src.api.container import Container
+from src.api.routes import router
+from src.domain.llm import CompletionResponse, EmbeddingResponse
+from src.services.base.ai_service import AIService
+from src.services.routing import CollectionRouter
+from src.services.splitting import SplitterPool
+from src.services.vector import VectorService
+from src.splitters.text_splitter import TextSplitter, TokenCounter
+
+
+class WarmupAIService(AIService):
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.error = error
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        return EmbeddingResponse(embedding=[1.0, 0.0, 0.0, 0.0], model='fake')
+
+    async def create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
+    ) -> CompletionResponse:
+        return CompletionResponse(content='answer', model='fake')
+
+    async def warmup(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        pass
+
+
+def create_container(ai_service: AIService, token_counter: TokenCounter) -> Container:
+    container = Container()
+    client = QdrantClient(':memory:')
+    container._services.update({
+        'ai': ai_service,
+        'collections': CollectionRouter('docs'),
+        'qdrant': client,
+        'splitter': SplitterPool(workers=0, splitter_factory=lambda: TextSplitter(token_counter=token_counter)),
+        'vector': VectorService(ai_service, client, vector_size=4),
+    })
+    return container
+
+
+def create_client(container: Container) -> TestClient:
+    application = FastAPI()
+    application.include_router(router)
+    application.container = container  # type: ignore
+    return TestClient(application)
+
+
+def test_ready_reports_starting_until_warmup_completes(word_counter):
+    container = create_container(WarmupAIService(), word_counter)
+    client = create_client(container)
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.json() == {'status': 'starting'}
+
+    asyncio.run(container.warmup())
+
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.json() == {'status': 'ready'}
+    assert container.get_service('qdrant').collection_exists('docs')
+
+
+def test_ready_reports_failed_warmup(word_counter):
+    container = create_container(WarmupAIService(RuntimeError('provider is down')), word_counter)
+    client = create_client(container)
+
+    asyncio.run(container.warmup())
+
+    response = client.get('/ready')
+    assert not container.ready
+    assert response.status_code == 503
+    assert response.json() == {'status': 'failed', 'detail': 'provider is down'}
+    assert client.get('/health').status_code == 200
@@ -0,0 +1,13 @@
+import pytest
+
+from src.splitters.text_splitter import TokenCounter
+
+
+class WordCounter(TokenCounter):
+    def count_tokens(self, text: str) -> int:
+        return len(text.split())
+
+
+@pytest.fixture
+def word_counter() -> WordCounter:
+    return WordCounter()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+import numpy as np
+
+
+@dataclass
+class LoadTestReport:
+    requests: int
+    succeeded: int
+    failed: int
+    duration_s: float
+    throughput_rps: float
+    error_rate: float
+    errors: Dict[str, int]
+    latency_ms: Dict[str, float]
+    ttft_ms: Dict[str, float]
+    concurrency: int
+    rate: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class LoadTest:
+    def __init__(
+            self,
+            client: httpx.AsyncClient,
+            queries: List[Dict[str, Any]],
+            concurrency: int = 8,
+            rate: Optional[float] = None,
+            path: str = '/query'
+    ):
+        if not queries:
+            raise ValueError('Load test needs at least one query')
+        self.client = client
+        self.queries = queries
+        self.concurrency = concurrency
+        self.rate = rate
+        self.path = path
+        self._latencies: List[float] = []
+        self._ttft: List[float] = []
+        self._errors: Counter = Counter()
+
+    async def run(self, requests: Optional[int] = None) -> LoadTestReport:
+        requests = requests or len(self.queries)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+
+        tasks = []
+        for index in range(requests):
+            scheduled = None
+            if self.rate:
+                scheduled = started + index / self.rate
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            body = self.queries[index % len(self.queries)]
+            tasks.append(asyncio.create_task(self._send(semaphore, body, scheduled)))
+        await asyncio.gather(*tasks)
+
+        duration = time.perf_counter() - started
+        failed = sum(self._errors.values())
+        return LoadTestReport(
+            requests=requests,
+            succeeded=requests - failed,
+            failed=failed,
+            duration_s=round(duration, 3),
+            throughput_rps=round((requests - failed) / duration, 2) if duration else 0.0,
+            error_rate=round(failed / requests, 4),
+            errors=dict(self._errors),
+            latency_ms=_percentiles(self._latencies),
+            ttft_ms=_percentiles(self._ttft),
+            concurrency=self.concurrency,
+            rate=self.rate,
+        )
+
+    async def _send(self, semaphore: asyncio.Semaphore, body: Dict[str, Any], scheduled: Optional[float]) -> None:
+        async with semaphore:
+            sent = time.perf_counter() if scheduled is None else scheduled
+            first_byte = None
+            try:
+                async with self.client.stream('POST', self.path, json=body) as response:
+                    async for _ in response.aiter_bytes():
+                        if first_byte is None:
+                            first_byte = time.perf_counter()
+                finished = time.perf_counter()
+            except httpx.HTTPError as error:
+                self._errors[type(error).__name__] += 1
+                return
+
+            if response.status_code >= 400:
+                self._errors[str(response.status_code)] += 1
+                return
+            self._latencies.append(finished - sent)
+            self._ttft.append((first_byte or finished) - sent)
+
+
+def load_queries(path: Union[str, Path], defaults: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    queries = []
+    with Path(path).open(encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            body = json.loads(line) if line.startswith('{') else {'query': line}
+            queries.append({**(defaults or {}), **body})
+    return queries
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000
+    return {
+        'p50': round(float(np.percentile(values, 50)), 2),
+        'p95': round(float(np.percentile(values, 95)), 2),
+        'p99': round(float(np.percentile(values, 99)), 2),
+        'mean': round(float(values.mean()), 2),
+        'max': round(float(values.max()), 2),
+    }
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import httpx
+
+from src.console.loadtest import LoadTest, load_queries
+
+
+def create_client(delay: float = 0.0) -> httpx.AsyncClient:
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        body = json.loads(request.content)
+        if body['query'] == 'fail':
+            return httpx.Response(503, json={'detail': 'overloaded'})
+        return httpx.Response(200, json={'answer': body['query'], 'sources': []})
+
+    return httpx.AsyncClient(base_url='http://test', transport=httpx.MockTransport(handle))
+
+
+def test_load_queries_merges_defaults(tmp_path):
+    path = tmp_path / 'queries.txt'
+    path.write_text('What is RAG?\n\n{"query": "Explain MMR", "top_k": 8}\n')
+
+    assert load_queries(path, {'top_k': 3, 'rerank': False}) == [
+        {'query': 'What is RAG?', 'top_k': 3, 'rerank': False},
+        {'query': 'Explain MMR', 'top_k': 8, 'rerank': False},
+    ]
+
+
+def test_closed_loop_reports_errors_and_percentiles():
+    async def scenario():
+        async with create_client(delay=0.01) as client:
+            return await LoadTest(client, [{'query': 'ok'}, {'query': 'fail'}], concurrency=2).run(6)
+
+    report = asyncio.run(scenario())
+
+    assert (report.requests, report.succeeded, report.failed) == (6, 3, 3)
+    assert report.errors == {'503': 3}
+    assert report.error_rate == 0.5
+    assert report.latency_ms['p50'] >= 10
+    assert report.ttft_ms['p99'] <= report.latency_ms['max']
+
+
+def test_open_loop_paces_arrivals():
+    async def scenario():
+        async with create_client() as client:
+            return await LoadTest(client, [{'query': 'ok'}], concurrency=4, rate=100).run(5)
+
+    report = asyncio.run(scenario())
+
+    assert report.succeeded == 5
+    assert report.duration_s >= 0.04
+    assert report.rate == 100
@@ -1,7 +1,9 @@
-from typing import Any, Dict, List, Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
+from src.domain.filter import SearchFilter
+
 
 class Message(BaseModel):
     role: str
@@ -10,8 +12,12 @@ class Message(BaseModel):
 
 class QueryRequest(BaseModel):
     query: str
+    collection: Optional[str] = None
     top_k: int = 3
     rerank: bool = True
-    filter_: Optional[Dict[str, Any]] = None
+    neighbors: int = 0
+    mmr_lambda: Optional[float] = None
+    filter_: Optional[SearchFilter] = None
     temperature: float = 0.7
+    deadline_ms: Optional[int] = None
     chat_history: Optional[List[Message]] = None
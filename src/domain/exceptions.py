@@ -1,2 +1,37 @@
+from typing import Mapping, Optional
+
+
 class SearchException(Exception):
     pass
+
+
+class ProviderRateLimitError(Exception):
+    def __init__(self, message: str = 'AI provider rate limit exceeded', retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_headers(cls, message: str, headers: Mapping[str, str]) -> 'ProviderRateLimitError':
+        try:
+            retry_after: Optional[float] = float(headers['retry-after'])
+        except (KeyError, ValueError):
+            retry_after = None
+        return cls(message, retry_after=retry_after)
+
+
+class IngestBusyError(Exception):
+    def __init__(self, message: str = 'Ingestion queue is full', retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class ProviderUnavailableError(Exception):
+    pass
+
+
+class CircuitOpenError(ProviderUnavailableError):
+    pass
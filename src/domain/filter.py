@@ -0,0 +1,76 @@
+from typing import Dict, List, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, StrictInt, StrictStr, model_validator
+
+FilterField = Literal[
+    'filename',
+    'sources',
+    'chunk_index',
+    'tokens',
+    'headers.h1',
+    'headers.h2',
+    'headers.h3',
+    'headers.h4',
+    'headers.h5',
+    'headers.h6',
+]
+
+FILTERABLE_FIELDS: Dict[str, str] = {
+    'filename': 'keyword',
+    'sources': 'keyword',
+    'chunk_index': 'integer',
+    'tokens': 'integer',
+    **{f'headers.h{level}': 'keyword' for level in range(1, 7)},
+}
+
+FilterValue = Union[StrictInt, StrictStr]
+
+
+class RangeCondition(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    gt: Optional[int] = None
+    gte: Optional[int] = None
+    lt: Optional[int] = None
+    lte: Optional[int] = None
+
+
+class FieldCondition(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    key: FilterField
+    match: Optional[FilterValue] = None
+    any: Optional[List[FilterValue]] = None
+    range: Optional[RangeCondition] = None
+
+    @model_validator(mode='after')
+    def _validate_condition(self) -> 'FieldCondition':
+        given = [name for name in ('match', 'any', 'range') if getattr(self, name) is not None]
+        if len(given) != 1:
+            raise ValueError(f'Condition on "{self.key}" needs exactly one of match, any or range')
+
+        field_type = FILTERABLE_FIELDS[self.key]
+        if self.range is not None and field_type != 'integer':
+            raise ValueError(f'Range conditions are not supported on keyword field "{self.key}"')
+
+        values: List[FilterValue] = []
+        if self.match is not None:
+            values.append(self.match)
+        if self.any is not None:
+            values.extend(self.any)
+        expected = int if field_type == 'integer' else str
+        if any(not isinstance(value, expected) for value in values):
+            raise ValueError(f'Field "{self.key}" expects {field_type} values')
+
+        return self
+
+
+class SearchFilter(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    must: List[FieldCondition] = []
+    should: List[FieldCondition] = []
+    must_not: List[FieldCondition] = []
+
+    def is_empty(self) -> bool:
+        return not (self.must or self.should or self.must_not)
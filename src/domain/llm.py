@@ -12,3 +12,4 @@ class CompletionResponse(BaseModel):
     content: str
     model: str
     usage: Optional[Dict[str, int]] = None
+    top_logprobs: Optional[Dict[str, float]] = None
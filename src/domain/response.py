@@ -6,12 +6,24 @@ from pydantic import BaseModel
 
 class Source(BaseModel):
     filename: str
+    sources: List[str] = []
     chunk_index: Optional[int]
     relevance_score: Optional[float]
     combined_score: Optional[float]
     vector_score: float
     headers: Dict[str, Any]
     urls: List[str]
+    neighbor_chunks: List[int] = []
+
+
+class RerankDecision(BaseModel):
+    mode: str
+    reranked: bool
+    candidates: int
+    reason: str
+    margin: Optional[float] = None
+    gap: Optional[float] = None
+    entropy: Optional[float] = None
 
 
 class QueryMetadata(BaseModel):
@@ -21,6 +33,12 @@ class QueryMetadata(BaseModel):
     total_tokens: Optional[int]
     timestamp: datetime
     history_length: int
+    queue_wait_ms: float = 0.0
+    deadline_ms: Optional[int] = None
+    degradations: List[str] = []
+    rerank_decision: Optional[RerankDecision] = None
+    mmr_dropped: int = 0
+    rerank_failed: int = 0
 
 
 class QueryResponse(BaseModel):
@@ -31,3 +49,5 @@ class QueryResponse(BaseModel):
 
 class UploadResponse(BaseModel):
     message: str
+    chunks: int = 0
+    duplicates: int = 0
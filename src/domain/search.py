@@ -1,10 +1,17 @@
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel
 
-
-class SearchResult(BaseModel):
+@dataclass(slots=True)
+class SearchHit:
+    id: Union[int, str]
     score: float
-    relevance_score: Optional[float]
-    combined_score: Optional[float]
     payload: Dict[str, Any]
+    relevance_score: Optional[float] = None
+    combined_score: Optional[float] = None
+    neighbors: List[Dict[str, Any]] = field(default_factory=list)
+    vector: Optional[List[float]] = None
+
+    @property
+    def rank_score(self) -> float:
+        return self.score if self.combined_score is None else self.combined_score
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from src.domain.llm import CompletionResponse, EmbeddingResponse
 
@@ -9,15 +9,31 @@ class AIService(ABC):
     async def create_embedding(self, text: str) -> EmbeddingResponse:
         pass
 
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        return [await self.create_embedding(text) for text in texts]
+
     @abstractmethod
     async def create_completion(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
     ) -> CompletionResponse:
         pass
 
+    def embedding_size(self) -> Optional[int]:
+        return None
+
+    async def warmup(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
     @abstractmethod
     def close(self) -> None:
         pass
+
+    async def aclose(self) -> None:
+        self.close()
@@ -0,0 +1,80 @@
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, List, cast
+
+import numpy as np
+from fastapi.responses import ORJSONResponse
+
+from src.domain.response import QueryMetadata, QueryResponse
+from src.services.query import QueryService
+from src.services.vector import VectorService
+
+
+@dataclass
+class ResultPathBenchmark:
+    requests: int
+    cpu_ms_mean: float
+    cpu_ms_p95: float
+    allocated_kib_mean: float
+    response_bytes_mean: float
+
+
+async def benchmark_result_path(
+        vector_service: VectorService,
+        collection_name: str,
+        queries: np.ndarray,
+        limit: int = 5,
+        neighbors: int = 0
+) -> ResultPathBenchmark:
+    async def handle(query: np.ndarray) -> int:
+        hits = await vector_service.search_hits(collection_name, cast(List[float], query.tolist()), limit=limit)
+        if neighbors:
+            vector_service.expand_neighbors(collection_name, hits, neighbors)
+        response = QueryResponse(
+            answer='',
+            sources=QueryService.create_sources(hits),
+            metadata=QueryMetadata(
+                reranked=False,
+                search_time_ms=0.0,
+                completion_time_ms=0.0,
+                total_tokens=None,
+                timestamp=datetime.now(),
+                history_length=0
+            )
+        )
+        return len(ORJSONResponse(response.model_dump()).body)
+
+    cpu = await _measure(queries, handle, time.process_time)
+    tracemalloc.start()
+    try:
+        allocated = await _measure(queries, handle, lambda: tracemalloc.get_traced_memory()[0], peak=True)
+    finally:
+        tracemalloc.stop()
+    sizes = [await handle(query) for query in queries]
+
+    return ResultPathBenchmark(
+        requests=len(queries),
+        cpu_ms_mean=round(float(np.mean(cpu)) * 1000, 3),
+        cpu_ms_p95=round(float(np.percentile(cpu, 95)) * 1000, 3),
+        allocated_kib_mean=round(float(np.mean(allocated)) / 1024, 1),
+        response_bytes_mean=round(float(np.mean(sizes)), 1),
+    )
+
+
+async def _measure(
+        queries: np.ndarray,
+        handle: Callable[[np.ndarray], Awaitable[int]],
+        counter: Callable[[], float],
+        peak: bool = False
+) -> List[float]:
+    samples = []
+    for query in queries:
+        if peak:
+            tracemalloc.reset_peak()
+        before = counter()
+        await handle(query)
+        after = tracemalloc.get_traced_memory()[1] if peak else counter()
+        samples.append(after - before)
+    return samples
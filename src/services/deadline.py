@@ -0,0 +1,50 @@
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from src.domain.exceptions import DeadlineExceeded
+
+T = TypeVar('T')
+
+
+class Deadline:
+    def __init__(
+        self,
+        budget: Optional[float] = None,
+        reserve_share: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.budget = budget
+        self.reserve = budget * reserve_share if budget is not None else 0.0
+        self.clock = clock
+        self.started = clock()
+        self.degradations: List[str] = []
+
+    @classmethod
+    def from_ms(cls, budget_ms: Optional[int], reserve_share: float = 0.0) -> 'Deadline':
+        return cls(budget_ms / 1000 if budget_ms else None, reserve_share)
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget is not None
+
+    def remaining(self) -> float:
+        if self.budget is None:
+            return math.inf
+        return max(0.0, self.budget - (self.clock() - self.started))
+
+    def available(self) -> float:
+        return self.remaining() - self.reserve
+
+    def degrade(self, step: str) -> None:
+        if step not in self.degradations:
+            self.degradations.append(step)
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        if self.budget is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f'Deadline of {self.budget * 1000:.0f} ms exceeded')
@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import msgpack  # type: ignore[import-untyped]
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 'chat-rag-dedup'
+INDEX_VERSION = 1
+WORD_PATTERN = re.compile(r'\w+')
+
+
+@dataclass
+class DuplicateEntry:
+    point_id: str
+    filename: str
+    signature: np.ndarray
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        generator = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._masks = generator.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._multipliers = generator.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+
+    def signature(self, text: str) -> np.ndarray:
+        words = WORD_PATTERN.findall(text.lower())
+        size = self.shingle_size
+        shingles = {' '.join(words[start:start + size]) for start in range(max(1, len(words) - size + 1))}
+        digests = b''.join(hashlib.blake2b(shingle.encode(), digest_size=8).digest() for shingle in shingles)
+        hashes = np.frombuffer(digests, dtype='<u8').astype(np.uint64)
+        permuted = ((hashes[:, None] ^ self._masks) * self._multipliers) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+    ):
+        if num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self._entries: Dict[str, Dict[str, DuplicateEntry]] = {}
+        self._buckets: Dict[Tuple[str, int, bytes], List[str]] = {}
+
+    @classmethod
+    def load(cls, path: Union[str, Path], threshold: float = 0.8) -> 'NearDuplicateIndex':
+        index = cls(path, threshold)
+        if not Path(path).exists():
+            return index
+
+        with Path(path).open('rb') as file:
+            data = msgpack.unpackb(file.read(), raw=False)
+        settings = (data.get('num_perm'), data.get('bands'), data.get('shingle_size'))
+        if data.get('format') != INDEX_FORMAT or data.get('version') != INDEX_VERSION:
+            logger.warning(f'Ignoring unsupported duplicate index {path}')
+            return index
+        if settings != (index.hasher.num_perm, index.bands, index.hasher.shingle_size):
+            logger.warning(f'Duplicate index {path} was built with other MinHash settings, starting a new one')
+            return index
+
+        for collection_name, entries in data['collections'].items():
+            for point_id, filename, signature in entries:
+                index.add(collection_name, DuplicateEntry(point_id, filename, np.frombuffer(signature, dtype='<u4')))
+        logger.info(f'Loaded {len(index)} chunk signatures from {path}')
+        return index
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        data = {
+            'format': INDEX_FORMAT,
+            'version': INDEX_VERSION,
+            'num_perm': self.hasher.num_perm,
+            'bands': self.bands,
+            'shingle_size': self.hasher.shingle_size,
+            'collections': {
+                collection_name: [
+                    [entry.point_id, entry.filename, entry.signature.astype('<u4').tobytes()]
+                    for entry in entries.values()
+                ]
+                for collection_name, entries in self._entries.items()
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(self.path.suffix + '.tmp')
+        temporary.write_bytes(msgpack.packb(data))
+        os.replace(temporary, self.path)
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(text)
+
+    def find(
+        self,
+        collection_name: str,
+        signature: np.ndarray,
+        exclude_filename: Optional[str] = None
+    ) -> Optional[DuplicateEntry]:
+        entries = self._entries.get(collection_name, {})
+        candidates = {
+            point_id
+            for key in self._bucket_keys(collection_name, signature)
+            for point_id in self._buckets.get(key, [])
+        }
+        best, best_similarity = None, self.threshold
+        for point_id in candidates:
+            if entries[point_id].filename == exclude_filename:
+                continue
+            similarity = float(np.mean(entries[point_id].signature == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = entries[point_id], similarity
+        return best
+
+    def add(self, collection_name: str, entry: DuplicateEntry) -> None:
+        self.remove(collection_name, entry.point_id)
+        self._entries.setdefault(collection_name, {})[entry.point_id] = entry
+        for key in self._bucket_keys(collection_name, entry.signature):
+            self._buckets.setdefault(key, []).append(entry.point_id)
+
+    def remove(self, collection_name: str, point_id: str) -> None:
+        entry = self._entries.get(collection_name, {}).pop(point_id, None)
+        if entry is None:
+            return
+        for key in self._bucket_keys(collection_name, entry.signature):
+            self._buckets[key].remove(point_id)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _bucket_keys(self, collection_name: str, signature: np.ndarray) -> List[Tuple[str, int, bytes]]:
+        return [
+            (collection_name, band, rows.tobytes())
+            for band, rows in enumerate(np.split(signature, self.bands))
+        ]
@@ -0,0 +1,49 @@
+from typing import List
+
+import numpy as np
+
+from src.domain.search import SearchHit
+
+
+def mmr_select(vectors: np.ndarray, scores: np.ndarray, k: int, mmr_lambda: float) -> List[int]:
+    count = len(scores)
+    if k >= count:
+        return list(range(count))
+    if k <= 0:
+        return []
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms
+    similarity = unit @ unit.T
+
+    first = int(np.argmax(scores))
+    selected = [first]
+    available = np.ones(count, dtype=bool)
+    available[first] = False
+    redundancy = similarity[first].copy()
+
+    while len(selected) < k:
+        marginal = mmr_lambda * scores - (1 - mmr_lambda) * redundancy
+        marginal[~available] = -np.inf
+        index = int(np.argmax(marginal))
+        selected.append(index)
+        available[index] = False
+        np.maximum(redundancy, similarity[index], out=redundancy)
+    return selected
+
+
+def diversify(hits: List[SearchHit], k: int, mmr_lambda: float) -> List[SearchHit]:
+    with_vectors = [hit for hit in hits if hit.vector is not None]
+    if len(with_vectors) != len(hits):
+        return hits[:k]
+
+    selected = mmr_select(
+        np.asarray([hit.vector for hit in hits], dtype=np.float32),
+        np.asarray([hit.score for hit in hits], dtype=np.float32),
+        k,
+        mmr_lambda
+    )
+    for hit in hits:
+        hit.vector = None
+    return [hits[index] for index in selected]
@@ -1,44 +1,105 @@
-import re
 import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, UploadFile
 
+from src.domain.exceptions import IngestBusyError
 from src.domain.response import UploadResponse
+from src.services.dedup import DuplicateEntry, NearDuplicateIndex
+from src.services.rate_limit import Priority, request_priority
+from src.services.routing import CollectionRouter
+from src.services.splitting import SplitterPool
 from src.services.vector import VectorService
-from src.splitters.text_splitter import TextSplitter
-
-COLLECTION_NAME = 'ai_course_docs'
 
 
 class DocumentService:
-    def __init__(self, vector_service: VectorService):
+    def __init__(
+        self,
+        vector_service: VectorService,
+        splitter_pool: Optional[SplitterPool] = None,
+        collections: Optional[CollectionRouter] = None,
+        duplicates: Optional[NearDuplicateIndex] = None
+    ):
         self.vector_service = vector_service
-        self.text_splitter = TextSplitter()
+        self.duplicates = duplicates
+        self.splitter_pool = splitter_pool or SplitterPool(workers=0)
+        self.collections = collections or CollectionRouter()
 
-    async def process_document(self, file: UploadFile) -> UploadResponse:
+    async def process_document(self, file: UploadFile, collection: Optional[str] = None) -> UploadResponse:
         if not file.filename.endswith('.md'):  # type: ignore
             raise HTTPException(
                 status_code=400,
                 detail='Only markdown files are supported'
             )
+        collection_name = self.collections.resolve(collection)
 
         content = await file.read()
         text = content.decode('utf-8')
-        cleaned_text = self._clean_markdown_links(text)
 
-        chunks = self.text_splitter.split(cleaned_text, limit=1000)
+        try:
+            chunks = await self.splitter_pool.split(text, limit=1000)
+        except IngestBusyError as error:
+            raise HTTPException(
+                status_code=503,
+                detail='Server is busy processing other documents, retry later',
+                headers={'Retry-After': str(int(error.retry_after or 1))}
+            )
         points = self._create_points(chunks, text, file.filename)  # type: ignore
 
-        await self.vector_service.add_points(
-            collection_name=COLLECTION_NAME,
-            points=points,
+        with request_priority(Priority.BULK):
+            stored = await self._store_points(collection_name, points, file.filename)  # type: ignore
+
+        return UploadResponse(
+            message='Document processed successfully',
+            chunks=len(points),
+            duplicates=len(points) - stored
         )
 
-        return UploadResponse(message='Document processed successfully')
+    async def _store_points(self, collection_name: str, points: List[Dict[str, Any]], filename: str) -> int:
+        duplicates = self.duplicates
+        if duplicates is None:
+            await self.vector_service.add_points(collection_name=collection_name, points=points)
+            return len(points)
+
+        stored: List[Dict[str, Any]] = []
+        pending = points
+        try:
+            while pending:
+                unique, collapsed = self._collapse_duplicates(duplicates, collection_name, pending)
+                await self.vector_service.add_points(collection_name=collection_name, points=unique)
+                stored.extend(unique)
+                owners = {entry.point_id: entry.filename for _, entry in collapsed}
+                missing = set(await self.vector_service.add_sources(collection_name, filename, owners))
+                for point_id in missing:
+                    duplicates.remove(collection_name, point_id)
+                pending = [point for point, entry in collapsed if entry.point_id in missing]
+        except Exception:
+            for point in stored:
+                duplicates.remove(collection_name, point['id'])
+            raise
+        finally:
+            duplicates.save()
+        return len(stored)
 
-    def _clean_markdown_links(self, text: str) -> str:
-        return re.sub(r'\[(.*?)\]\((.*?)\)', r'\1 (\2)', text)
+    @staticmethod
+    def _collapse_duplicates(
+        duplicates: NearDuplicateIndex,
+        collection_name: str,
+        points: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], DuplicateEntry]]]:
+        unique = []
+        collapsed = []
+        for point in points:
+            filename = point['payload']['filename']
+            signature = duplicates.signature(point['text'])
+            match = duplicates.find(collection_name, signature, exclude_filename=filename)
+            if match is None:
+                duplicates.add(collection_name, DuplicateEntry(point['id'], filename, signature))
+                point['payload']['sources'] = [filename]
+                unique.append(point)
+            else:
+                collapsed.append((point, match))
+        return unique, collapsed
 
     def _create_points(self, chunks: List[Any], original_text: str, filename: str) -> List[Dict[str, Any]]:
         points = []
@@ -0,0 +1,241 @@
+import copy
+import itertools
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.domain.llm import CompletionResponse, EmbeddingResponse
+from src.domain.search import SearchHit
+from src.services.base.ai_service import AIService
+from src.services.vector import VectorService
+
+RERANK_MODES = ('off', 'adaptive', 'always')
+
+
+@dataclass
+class LabeledQuery:
+    query: str
+    relevant: List[Tuple[str, Optional[int]]]
+
+
+@dataclass
+class SweepTarget:
+    name: str
+    vector_service: VectorService
+    collection_name: str
+
+
+@dataclass
+class SweepConfig:
+    target: str
+    oversampling: int
+    rerank: str
+    mmr_lambda: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        mmr = 'off' if self.mmr_lambda is None else self.mmr_lambda
+        return f'{self.target}/x{self.oversampling}/rerank={self.rerank}/mmr={mmr}'
+
+
+@dataclass
+class SweepResult:
+    config: SweepConfig
+    queries: int
+    recall: float
+    mrr: float
+    latency_ms_p50: float
+    latency_ms_p95: float
+    latency_ms_p99: float
+    embedding_calls: float
+    completion_calls: float
+    errors: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'name': self.config.name, **asdict(self)}
+
+
+class CountingAIService(AIService):
+    def __init__(self, service: AIService):
+        self.service = service
+        self.embedding_calls = 0
+        self.completion_calls = 0
+        self._embeddings: Dict[str, EmbeddingResponse] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.service, name)
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        return (await self.create_embeddings([text]))[0]
+
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        missing = [text for text in dict.fromkeys(texts) if text not in self._embeddings]
+        if missing:
+            self.embedding_calls += len(missing)
+            self._embeddings.update(zip(missing, await self.service.create_embeddings(missing)))
+        return [self._embeddings[text] for text in texts]
+
+    async def create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
+    ) -> CompletionResponse:
+        self.completion_calls += 1
+        return await self.service.create_completion(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_logprobs=top_logprobs
+        )
+
+    def embedding_size(self) -> Optional[int]:
+        return self.service.embedding_size()
+
+    def reset(self) -> None:
+        self.embedding_calls = 0
+        self.completion_calls = 0
+        self._embeddings.clear()
+
+    def close(self) -> None:
+        self.service.close()
+
+    async def aclose(self) -> None:
+        await self.service.aclose()
+
+
+class RetrievalSweep:
+    def __init__(self, targets: Sequence[SweepTarget], queries: List[LabeledQuery], k: int = 5):
+        self.targets = {target.name: target for target in targets}
+        self.queries = queries
+        self.k = k
+
+    async def run(self, configs: Iterable[SweepConfig]) -> List[SweepResult]:
+        return [await self.evaluate(config) for config in configs]
+
+    async def evaluate(self, config: SweepConfig) -> SweepResult:
+        target = self.targets[config.target]
+        base = target.vector_service
+        rerank_policy = copy.copy(base.rerank_policy)
+        rerank_policy.mode = config.rerank if config.rerank != 'off' else rerank_policy.mode
+        service = VectorService(
+            base.ai_service,
+            base.router,
+            rerank_policy=rerank_policy,
+            relevance_scorer=base.relevance_scorer,
+            vector_size=base.vector_size,
+            mmr_lambda=config.mmr_lambda,
+            oversampling=config.oversampling
+        )
+        counters = list({
+            id(ai_service): ai_service
+            for ai_service in (base.ai_service, base.relevance_scorer.ai_service)
+            if isinstance(ai_service, CountingAIService)
+        }.values())
+        for counter in counters:
+            counter.reset()
+
+        latencies, recalls, reciprocal_ranks, errors = [], [], [], 0
+        for labeled in self.queries:
+            started = time.perf_counter()
+            try:
+                hits = await service.perform_search(
+                    target.collection_name,
+                    labeled.query,
+                    limit=self.k,
+                    rerank=config.rerank != 'off'
+                )
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            recall, reciprocal_rank = score_hits(hits, labeled.relevant)
+            recalls.append(recall)
+            reciprocal_ranks.append(reciprocal_rank)
+
+        queries = max(1, len(self.queries))
+        return SweepResult(
+            config=config,
+            queries=len(self.queries),
+            recall=_mean(recalls),
+            mrr=_mean(reciprocal_ranks),
+            latency_ms_p50=_percentile(latencies, 50),
+            latency_ms_p95=_percentile(latencies, 95),
+            latency_ms_p99=_percentile(latencies, 99),
+            embedding_calls=round(sum(counter.embedding_calls for counter in counters) / queries, 2),
+            completion_calls=round(sum(counter.completion_calls for counter in counters) / queries, 2),
+            errors=errors,
+        )
+
+
+def load_queries(path: Union[str, Path]) -> List[LabeledQuery]:
+    queries = []
+    with Path(path).open(encoding='utf-8') as file:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            relevant = [
+                (label, None) if isinstance(label, str) else (label['filename'], label.get('chunk_index'))
+                for label in record.get('relevant', [])
+            ]
+            if not record.get('query') or not relevant:
+                raise ValueError(f'{path}:{number} needs a query and at least one relevant label')
+            queries.append(LabeledQuery(record['query'], relevant))
+    return queries
+
+
+def sweep_grid(
+    targets: Sequence[str],
+    oversampling: Sequence[int],
+    rerank_modes: Sequence[str],
+    mmr_lambdas: Sequence[Optional[float]] = (None,)
+) -> List[SweepConfig]:
+    for mode in rerank_modes:
+        if mode not in RERANK_MODES:
+            raise ValueError(f'Unknown rerank mode: {mode}')
+    configs: Dict[Tuple[Any, ...], SweepConfig] = {}
+    for target, factor, mode, mmr_lambda in itertools.product(targets, oversampling, rerank_modes, mmr_lambdas):
+        oversampled = mode != 'off' or (mmr_lambda is not None and mmr_lambda < 1)
+        configs.setdefault(
+            (target, factor if oversampled else None, mode, mmr_lambda),
+            SweepConfig(target, factor, mode, mmr_lambda)
+        )
+    return list(configs.values())
+
+
+def score_hits(hits: Sequence[SearchHit], relevant: Sequence[Tuple[str, Optional[int]]]) -> Tuple[float, float]:
+    found = set()
+    reciprocal_rank = 0.0
+    for rank, hit in enumerate(hits, start=1):
+        matches = {label for label in relevant if _matches(hit, label)}
+        if matches and not reciprocal_rank:
+            reciprocal_rank = 1 / rank
+        found |= matches
+    return len(found) / len(set(relevant)), reciprocal_rank
+
+
+def cheapest(results: Sequence[SweepResult], min_recall: float) -> Optional[SweepResult]:
+    passing = [result for result in results if result.recall >= min_recall and not result.errors]
+    if not passing:
+        return None
+    return min(passing, key=lambda result: (result.completion_calls, result.latency_ms_p95))
+
+
+def _matches(hit: SearchHit, label: Tuple[str, Optional[int]]) -> bool:
+    filename, chunk_index = label
+    sources = hit.payload.get('sources') or [hit.payload.get('filename')]
+    return filename in sources and (chunk_index is None or hit.payload.get('chunk_index') == chunk_index)
+
+
+def _mean(values: List[float]) -> float:
+    return round(float(np.mean(values)), 4) if values else 0.0
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    return round(float(np.percentile(values, percentile)) * 1000, 2) if values else 0.0
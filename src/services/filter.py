@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.domain.filter import FILTERABLE_FIELDS, FieldCondition, SearchFilter
+
+PAYLOAD_SCHEMA_TYPES: Dict[str, models.PayloadSchemaType] = {
+    'keyword': models.PayloadSchemaType.KEYWORD,
+    'integer': models.PayloadSchemaType.INTEGER,
+}
+
+
+def payload_index_schema() -> Dict[str, models.PayloadSchemaType]:
+    return {
+        field: PAYLOAD_SCHEMA_TYPES[field_type]
+        for field, field_type in FILTERABLE_FIELDS.items()
+    }
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str) -> None:
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field_name, field_schema in payload_index_schema().items():
+        if field_name not in existing:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+                wait=True,
+            )
+
+
+def build_qdrant_filter(search_filter: Optional[SearchFilter]) -> Optional[models.Filter]:
+    if search_filter is None or search_filter.is_empty():
+        return None
+
+    return models.Filter(
+        must=_build_conditions(search_filter.must),
+        should=_build_conditions(search_filter.should),
+        must_not=_build_conditions(search_filter.must_not),
+    )
+
+
+def _build_conditions(conditions: List[FieldCondition]) -> Optional[List[models.Condition]]:
+    if not conditions:
+        return None
+    return [_build_condition(condition) for condition in conditions]
+
+
+def _build_condition(condition: FieldCondition) -> models.Condition:
+    if condition.key == 'filename':
+        return models.Filter(should=[
+            _build_field_condition(condition),
+            _build_field_condition(condition.model_copy(update={'key': 'sources'})),
+        ])
+    return _build_field_condition(condition)
+
+
+def _build_field_condition(condition: FieldCondition) -> models.FieldCondition:
+    if condition.range is not None:
+        return models.FieldCondition(
+            key=condition.key,
+            range=models.Range(
+                gt=condition.range.gt,
+                gte=condition.range.gte,
+                lt=condition.range.lt,
+                lte=condition.range.lte,
+            )
+        )
+    if condition.any is not None:
+        return models.FieldCondition(key=condition.key, match=models.MatchAny(any=condition.any))
+    return models.FieldCondition(key=condition.key, match=models.MatchValue(value=condition.match))
@@ -1,40 +1,104 @@
 import os
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 import openai
 
+from src.domain.exceptions import ProviderRateLimitError, ProviderUnavailableError
 from src.domain.llm import CompletionResponse, EmbeddingResponse
 from src.services.base.ai_service import AIService
 
+NATIVE_EMBEDDING_DIMENSIONS = {
+    'text-embedding-ada-002': 1536,
+    'text-embedding-3-small': 1536,
+    'text-embedding-3-large': 3072,
+}
+FIXED_SIZE_EMBEDDING_MODELS = ('text-embedding-ada-002',)
+
 
 class OpenAIService(AIService):
-    def __init__(self, api_key: Optional[str] = None):
-        self.client = openai.OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
-        self.embedding_model = 'text-embedding-ada-002'
-        self.completion_model = 'gpt-4o-mini'
+    def __init__(
+            self,
+            api_key: Optional[str] = None,
+            max_retries: int = 2,
+            embedding_model: str = 'text-embedding-ada-002',
+            completion_model: str = 'gpt-4o-mini',
+            dimensions: Optional[int] = None
+    ):
+        if dimensions is not None and embedding_model in FIXED_SIZE_EMBEDDING_MODELS:
+            raise ValueError(f'{embedding_model} does not support reduced dimensions, use text-embedding-3-*')
 
-    async def create_embedding(self, text: str) -> EmbeddingResponse:
-        response = self.client.embeddings.create(
-            model=self.embedding_model,
-            input=text
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key or os.getenv('OPENAI_API_KEY'),
+            max_retries=max_retries
         )
+        self.embedding_model = embedding_model
+        self.dimensions = dimensions
+        self.completion_model = completion_model
+
+    def embedding_size(self) -> Optional[int]:
+        return self.dimensions or NATIVE_EMBEDDING_DIMENSIONS.get(self.embedding_model)
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        try:
+            response = await self.client.embeddings.create(
+                model=self.embedding_model,
+                input=text,
+                **self._embedding_options()
+            )
+        except openai.RateLimitError as error:
+            raise self._rate_limit_error(error) from error
+        except (openai.APIConnectionError, openai.InternalServerError) as error:
+            raise ProviderUnavailableError(str(error)) from error
         return EmbeddingResponse(
             embedding=response.data[0].embedding,
             model=self.embedding_model
         )
 
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        if not texts:
+            return []
+
+        try:
+            response = await self.client.embeddings.create(
+                model=self.embedding_model,
+                input=texts,
+                **self._embedding_options()
+            )
+        except openai.RateLimitError as error:
+            raise self._rate_limit_error(error) from error
+        except (openai.APIConnectionError, openai.InternalServerError) as error:
+            raise ProviderUnavailableError(str(error)) from error
+        return [
+            EmbeddingResponse(embedding=item.embedding, model=self.embedding_model)
+            for item in sorted(response.data, key=lambda item: item.index)
+        ]
+
+    def _embedding_options(self) -> Dict[str, Any]:
+        return {'dimensions': self.dimensions} if self.dimensions else {}
+
     async def create_completion(
             self,
             messages: List[Dict[str, str]],
             temperature: float = 0.7,
-            max_tokens: Optional[int] = None
+            max_tokens: Optional[int] = None,
+            top_logprobs: Optional[int] = None
     ) -> CompletionResponse:
-        response = self.client.chat.completions.create(
-            model=self.completion_model,
-            messages=messages,  # type: ignore
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        options: Dict[str, Any] = {}
+        if top_logprobs:
+            options = {'logprobs': True, 'top_logprobs': top_logprobs}
+
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.completion_model,
+                messages=messages,  # type: ignore
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **options
+            )
+        except openai.RateLimitError as error:
+            raise self._rate_limit_error(error) from error
+        except (openai.APIConnectionError, openai.InternalServerError) as error:
+            raise ProviderUnavailableError(str(error)) from error
 
         usage = response.usage.model_dump() if response.usage else {}
         usage = {
@@ -45,7 +109,19 @@ class OpenAIService(AIService):
             content=response.choices[0].message.content,
             model=self.completion_model,
             usage=usage,
+            top_logprobs=self._first_token_logprobs(response.choices[0]),
         )
 
+    def _first_token_logprobs(self, choice: Any) -> Optional[Dict[str, float]]:
+        if choice.logprobs is None or not choice.logprobs.content:
+            return None
+        return {candidate.token: candidate.logprob for candidate in choice.logprobs.content[0].top_logprobs}
+
+    def _rate_limit_error(self, error: openai.RateLimitError) -> ProviderRateLimitError:
+        return ProviderRateLimitError.from_headers(str(error), error.response.headers)
+
     def close(self) -> None:
         pass
+
+    async def aclose(self) -> None:
+        await self.client.close()
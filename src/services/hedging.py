@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from src.domain.exceptions import CircuitOpenError, ProviderUnavailableError
+from src.domain.llm import CompletionResponse, EmbeddingResponse
+from src.services.base.ai_service import AIService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+SCORING_MAX_TOKENS = 8
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(percentile * len(ordered)) - 1)]
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+    def release(self) -> None:
+        self.trial_in_flight = False
+
+
+class Provider:
+    def __init__(self, service: AIService, breaker: CircuitBreaker, name: str):
+        self.service = service
+        self.breaker = breaker
+        self.name = name
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.calls = 0
+        self.failures = 0
+
+    def tracker(self, kind: str) -> LatencyTracker:
+        return self.latency.setdefault(kind, LatencyTracker())
+
+
+class HedgedAIService(AIService):
+    def __init__(
+        self,
+        services: List[AIService],
+        hedge_percentile: float = 0.95,
+        min_hedge_delay: float = 0.05,
+        max_retries: int = 2,
+        backoff: float = 0.2,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not services:
+            raise ValueError('HedgedAIService needs at least one provider')
+        self.providers = [
+            Provider(service, CircuitBreaker(failure_threshold, reset_timeout, clock), self._name(service, index))
+            for index, service in enumerate(services)
+        ]
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.fallbacks = 0
+        self.retries = 0
+
+    @property
+    def service(self) -> AIService:
+        return self.providers[0].service
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'providers':
+            raise AttributeError(name)
+        return getattr(self.service, name)
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        return await self._retry(lambda: self._primary('embedding', lambda: self.service.create_embedding(text)))
+
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        return await self._retry(lambda: self._primary('embedding', lambda: self.service.create_embeddings(texts)))
+
+    async def create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
+    ) -> CompletionResponse:
+        kind = 'scoring' if max_tokens is not None and max_tokens <= SCORING_MAX_TOKENS else 'completion'
+        return await self._retry(lambda: self._hedge(kind, lambda service: service.create_completion(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_logprobs=top_logprobs
+        )))
+
+    async def _retry(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        retry = 0
+        while True:
+            try:
+                return await attempt()
+            except CircuitOpenError:
+                raise
+            # rate limit errors were already retried by RateLimitedAIService, other errors are not transient
+            except (ProviderUnavailableError, TimeoutError) as error:
+                if retry >= self.max_retries:
+                    raise
+                retry += 1
+                self.retries += 1
+                delay = random.uniform(0, self.backoff * 2 ** retry)
+                logger.warning(f'AI call failed ({error!r}), retry {retry}/{self.max_retries} in {delay:.2f}s')
+                await asyncio.sleep(delay)
+
+    async def _primary(self, kind: str, call: Callable[[], Awaitable[T]]) -> T:
+        provider = self.providers[0]
+        if not provider.breaker.allow():
+            raise CircuitOpenError(f'Circuit breaker for AI provider {provider.name} is open')
+        return await self._timed(provider, kind, call())
+
+    async def _timed(self, provider: Provider, kind: str, call: Awaitable[T]) -> T:
+        provider.calls += 1
+        started = time.monotonic()
+        try:
+            result = await call
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception:
+            provider.failures += 1
+            provider.breaker.record_failure()
+            raise
+        provider.breaker.record_success()
+        provider.tracker(kind).record(time.monotonic() - started)
+        return result
+
+    async def _hedge(self, kind: str, call: Callable[[AIService], Awaitable[T]]) -> T:
+        candidates = [provider for provider in self.providers if provider.breaker.allow()]
+        if not candidates:
+            raise CircuitOpenError('Circuit breakers are open for every AI provider')
+
+        running: Dict[asyncio.Future, Tuple[int, Provider]] = {}
+        launched = 0
+        error: Optional[BaseException] = None
+
+        def launch() -> Provider:
+            nonlocal launched
+            provider = candidates[launched]
+            running[asyncio.ensure_future(self._timed(provider, kind, call(provider.service)))] = (launched, provider)
+            launched += 1
+            return provider
+
+        latest = launch()
+        try:
+            while running:
+                delay = self._hedge_delay(latest, kind) if launched < len(candidates) else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges_fired += 1
+                    latest = launch()
+                    continue
+
+                for task in done:
+                    index, provider = running.pop(task)
+                    if task.exception() is None:
+                        if index > 0:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+                    logger.warning(f'AI provider {provider.name} failed: {error!r}')
+
+                if not running and launched < len(candidates):
+                    self.fallbacks += 1
+                    latest = launch()
+        finally:
+            for task in running:
+                task.cancel()
+            for provider in candidates[launched:]:
+                provider.breaker.release()
+
+        assert error is not None
+        raise error
+
+    def _hedge_delay(self, provider: Provider, kind: str) -> Optional[float]:
+        latency = provider.tracker(kind).percentile(self.hedge_percentile)
+        return None if latency is None else max(self.min_hedge_delay, latency)
+
+    def _name(self, service: AIService, index: int) -> str:
+        model = getattr(service, 'completion_model', None)
+        return f'{index}:{model}' if model else str(index)
+
+    def embedding_size(self) -> Optional[int]:
+        return self.service.embedding_size()
+
+    async def warmup(self) -> None:
+        await asyncio.gather(*[provider.service.warmup() for provider in self.providers])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hedging': {
+                'hedges_fired': self.hedges_fired,
+                'hedges_won': self.hedges_won,
+                'fallbacks': self.fallbacks,
+                'retries': self.retries,
+            },
+            'providers': {
+                provider.name: {
+                    **provider.service.stats(),
+                    'circuit': provider.breaker.state,
+                    'calls': provider.calls,
+                    'failures': provider.failures,
+                    'hedge_delay_ms': {
+                        kind: round(delay * 1000, 2)
+                        for kind in provider.latency
+                        if (delay := self._hedge_delay(provider, kind)) is not None
+                    },
+                }
+                for provider in self.providers
+            },
+        }
+
+    def close(self) -> None:
+        for provider in self.providers:
+            provider.service.close()
+
+    async def aclose(self) -> None:
+        for provider in self.providers:
+            await provider.service.aclose()
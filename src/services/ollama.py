@@ -1,54 +1,153 @@
-from typing import Dict, List, Optional
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
 
 import httpx
 
+from src.domain.exceptions import ProviderRateLimitError, ProviderUnavailableError
 from src.domain.llm import CompletionResponse, EmbeddingResponse
 from src.services.base.ai_service import AIService
 
+OVERLOAD_STATUS_CODES = (429, 503)
+
 
 class OllamaService(AIService):
-    def __init__(self, base_url: str = 'http://localhost:11434'):
+    def __init__(
+            self,
+            base_url: str = 'http://localhost:11434',
+            embedding_model: str = 'llama2',
+            completion_model: str = 'llama2',
+            keep_alive: str = '30m',
+            timeout: float = 120.0,
+            connect_timeout: float = 5.0,
+            max_connections: int = 20,
+            max_keepalive_connections: int = 10,
+            transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(base_url=base_url)
-        self.embedding_model = 'llama2'
-        self.completion_model = 'llama2'
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            transport=transport
+        )
+        self.embedding_model = embedding_model
+        self.completion_model = completion_model
+        self.keep_alive = keep_alive
 
     async def create_embedding(self, text: str) -> EmbeddingResponse:
-        response = await self.client.post(
-            '/api/embeddings',
-            json={
-                'model': self.embedding_model,
-                'prompt': text
-            }
-        )
+        embeddings = await self.create_embeddings([text])
+        return embeddings[0]
+
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        if not texts:
+            return []
+
+        try:
+            response = await self.client.post(
+                '/api/embed',
+                json={
+                    'model': self.embedding_model,
+                    'input': texts,
+                    'keep_alive': self.keep_alive
+                }
+            )
+        except httpx.TransportError as error:
+            raise self._unavailable_error(error) from error
+        self._raise_for_status(response)
         data = response.json()
-        return EmbeddingResponse(
-            embedding=data['embedding'],
-            model=self.embedding_model
-        )
+        return [
+            EmbeddingResponse(embedding=embedding, model=self.embedding_model)
+            for embedding in data['embeddings']
+        ]
 
     async def create_completion(
             self,
             messages: List[Dict[str, str]],
             temperature: float = 0.7,
-            max_tokens: Optional[int] = None
+            max_tokens: Optional[int] = None,
+            top_logprobs: Optional[int] = None
     ) -> CompletionResponse:
-        prompt = '\n'.join([f'{m['role']}: {m['content']}' for m in messages])
-
-        response = await self.client.post(
-            '/api/generate',
-            json={
-                'model': self.completion_model,
-                'prompt': prompt,
-                'temperature': temperature,
-                'max_tokens': max_tokens
-            }
-        )
-        data = response.json()
+        options: Dict[str, Any] = {'temperature': temperature}
+        if max_tokens is not None:
+            options['num_predict'] = max_tokens
+
+        content: List[str] = []
+        usage: Dict[str, int] = {}
+        try:
+            async with self.client.stream(
+                'POST',
+                '/api/chat',
+                json={
+                    'model': self.completion_model,
+                    'messages': messages,
+                    'stream': True,
+                    'options': options,
+                    'keep_alive': self.keep_alive
+                }
+            ) as response:
+                self._raise_for_status(response)
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if 'error' in chunk:
+                        raise RuntimeError(f'Ollama error: {chunk['error']}')
+                    content.append(chunk.get('message', {}).get('content', ''))
+                    if chunk.get('done'):
+                        usage = self._get_usage(chunk)
+        except httpx.TransportError as error:
+            raise self._unavailable_error(error) from error
+
         return CompletionResponse(
-            content=data['response'],
-            model=self.completion_model
+            content=''.join(content),
+            model=self.completion_model,
+            usage=usage
         )
 
+    async def warmup(self) -> None:
+        requests = [
+            self.client.post(
+                '/api/embed',
+                json={'model': self.embedding_model, 'input': 'warmup', 'keep_alive': self.keep_alive}
+            ),
+        ]
+        if self.completion_model != self.embedding_model:
+            requests.append(self.client.post(
+                '/api/chat',
+                json={'model': self.completion_model, 'messages': [], 'keep_alive': self.keep_alive}
+            ))
+
+        for response in await asyncio.gather(*requests):
+            response.raise_for_status()
+
+    def _raise_for_status(self, response: httpx.Response) -> None:
+        if response.status_code in OVERLOAD_STATUS_CODES:
+            raise ProviderRateLimitError.from_headers(
+                f'Ollama is overloaded (HTTP {response.status_code})',
+                response.headers
+            )
+        if response.status_code >= 500:
+            raise ProviderUnavailableError(f'Ollama failed (HTTP {response.status_code})')
+        response.raise_for_status()
+
+    def _unavailable_error(self, error: httpx.TransportError) -> ProviderUnavailableError:
+        return ProviderUnavailableError(f'Ollama is unreachable: {error!r}')
+
+    def _get_usage(self, chunk: Dict[str, Any]) -> Dict[str, int]:
+        prompt_tokens = chunk.get('prompt_eval_count', 0)
+        completion_tokens = chunk.get('eval_count', 0)
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+
     def close(self) -> None:
-        self.client.aclose()  # type: ignore
+        pass
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,124 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.domain.llm import CompletionResponse, EmbeddingResponse
+from src.services.base.ai_service import AIService
+
+PROJECTION_METHODS = ('pca', 'truncate')
+
+
+class EmbeddingProjection:
+    def __init__(
+        self,
+        dimensions: int,
+        method: str = 'truncate',
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+    ):
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f'Unknown projection method: {method}')
+        if method == 'pca' and (mean is None or components is None or components.shape[0] != dimensions):
+            raise ValueError('A PCA projection needs a mean and one component per output dimension')
+        self.dimensions = dimensions
+        self.method = method
+        self.mean = mean
+        self.components = components
+
+    @property
+    def name(self) -> str:
+        return f'{self.method}{self.dimensions}'
+
+    @classmethod
+    def fit(cls, sample: np.ndarray, dimensions: int, method: str = 'pca') -> 'EmbeddingProjection':
+        if method == 'truncate':
+            return cls(dimensions, method)
+        if sample.shape[0] < dimensions:
+            raise ValueError(f'Fitting {dimensions} components needs at least {dimensions} sample vectors')
+
+        sample = np.asarray(sample, dtype=np.float64)
+        mean = sample.mean(axis=0)
+        _, _, components = np.linalg.svd(sample - mean, full_matrices=False)
+        return cls(dimensions, method, mean.astype(np.float32), components[:dimensions].astype(np.float32))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'EmbeddingProjection':
+        with np.load(path) as data:
+            method = str(data['method'])
+            if method == 'truncate':
+                return cls(int(data['dimensions']), method)
+            return cls(int(data['dimensions']), method, data['mean'], data['components'])
+
+    def save(self, path: Union[str, Path]) -> None:
+        arrays: Dict[str, Any] = {'method': self.method, 'dimensions': self.dimensions}
+        if self.method == 'pca':
+            arrays.update(mean=self.mean, components=self.components)
+        with Path(path).open('wb') as file:
+            np.savez(file, **arrays)
+
+    def apply(self, vectors: Union[np.ndarray, Sequence[Sequence[float]]]) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if self.mean is None or self.components is None:
+            projected = matrix[:, :self.dimensions]
+        else:
+            projected = (matrix - self.mean) @ self.components.T
+
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return projected / norms
+
+
+class ProjectedAIService(AIService):
+    def __init__(self, service: AIService, projection: EmbeddingProjection):
+        self.service = service
+        self.projection = projection
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.service, name)
+
+    @property
+    def embedding_model(self) -> str:
+        return f'{getattr(self.service, 'embedding_model', '')}+{self.projection.name}'
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        return (await self.create_embeddings([text]))[0]
+
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        if not texts:
+            return []
+        responses = await self.service.create_embeddings(texts)
+        projected = self.projection.apply([response.embedding for response in responses])
+        return [
+            EmbeddingResponse(embedding=vector.tolist(), model=self.embedding_model)
+            for vector in projected
+        ]
+
+    async def create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
+    ) -> CompletionResponse:
+        return await self.service.create_completion(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_logprobs=top_logprobs
+        )
+
+    def embedding_size(self) -> Optional[int]:
+        return self.projection.dimensions
+
+    async def warmup(self) -> None:
+        await self.service.warmup()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.service.stats()
+
+    def close(self) -> None:
+        self.service.close()
+
+    async def aclose(self) -> None:
+        await self.service.aclose()
@@ -1,3 +1,4 @@
+import math
 import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
@@ -5,33 +6,67 @@ from typing import Any, Dict, List, Optional, Tuple
 from fastapi import HTTPException
 
 from src.domain.chat import QueryRequest
+from src.domain.exceptions import DeadlineExceeded, ProviderUnavailableError
 from src.domain.response import QueryMetadata, QueryResponse, Source
-from src.services.vector import VectorService
+from src.domain.search import SearchHit
+from src.services.base.ai_service import AIService
+from src.services.deadline import Deadline
+from src.services.routing import CollectionRouter
+from src.services.vector import SearchTrace, VectorService
 from src.utils.utils import format_search_result
 
+MAX_NEIGHBORS = 3
+MAX_CONTEXT_TOKENS = 6000
+COMPLETION_SHARE = 0.5
+COMPLETION_TOKENS_PER_SECOND = 40
+MIN_COMPLETION_TOKENS = 64
+DEADLINE_ANSWER = 'The answer could not be generated in time. The sources below matched your question.'
+
 
 class QueryService:
-    def __init__(self, vector_service: VectorService):
+    def __init__(
+        self,
+        vector_service: VectorService,
+        max_context_tokens: int = MAX_CONTEXT_TOKENS,
+        deadline_ms: Optional[int] = None,
+        answer_service: Optional[AIService] = None,
+        collections: Optional[CollectionRouter] = None
+    ):
         self.vector_service = vector_service
+        self.collections = collections or CollectionRouter()
+        self.answer_service = answer_service or vector_service.ai_service
+        self.max_context_tokens = max_context_tokens
+        self.deadline_ms = deadline_ms
 
-    async def process_query(self, request: QueryRequest) -> QueryResponse:
+    async def process_query(self, request: QueryRequest, queue_wait_ms: float = 0.0) -> QueryResponse:
         self._validate_request(request)
+        deadline = Deadline.from_ms(request.deadline_ms or self.deadline_ms, reserve_share=COMPLETION_SHARE)
+        trace = SearchTrace()
 
-        search_results, search_time = await self._perform_search(request)
+        try:
+            search_results, search_time = await self._perform_search(request, deadline, trace)
+        except DeadlineExceeded as error:
+            raise HTTPException(status_code=504, detail=str(error))
+        except ProviderUnavailableError as error:
+            raise HTTPException(status_code=503, detail=str(error))
         if not search_results:
-            return self._create_empty_response(search_time, request.rerank)
+            return self._create_empty_response(search_time, queue_wait_ms, deadline, trace)
 
+        search_results = self._fit_to_deadline(search_results, deadline)
         context = self._create_context(search_results)
         messages = self._prepare_messages(context, request)
 
-        completion, completion_time = await self._get_completion(messages, request)
+        completion, completion_time = await self._get_completion(messages, request, deadline)
 
         return self._create_response(
             completion,
             search_results,
             search_time,
             completion_time,
-            request
+            request,
+            queue_wait_ms,
+            deadline,
+            trace
         )
 
     def _validate_request(self, request: QueryRequest) -> None:
@@ -39,20 +74,42 @@ class QueryService:
             raise HTTPException(status_code=400, detail='Query cannot be empty')
         if request.top_k < 1:
             raise HTTPException(status_code=400, detail='top_k must be at least 1')
+        if not 0 <= request.neighbors <= MAX_NEIGHBORS:
+            raise HTTPException(status_code=400, detail=f'neighbors must be between 0 and {MAX_NEIGHBORS}')
+        if request.deadline_ms is not None and request.deadline_ms < 1:
+            raise HTTPException(status_code=400, detail='deadline_ms must be positive')
+        if request.mmr_lambda is not None and not 0 <= request.mmr_lambda <= 1:
+            raise HTTPException(status_code=400, detail='mmr_lambda must be between 0 and 1')
 
-    async def _perform_search(self, request: QueryRequest) -> Tuple[List[Dict[str, Any]], float]:
+    async def _perform_search(
+            self,
+            request: QueryRequest,
+            deadline: Deadline,
+            trace: SearchTrace
+    ) -> Tuple[List[SearchHit], float]:
         start_time = time.time()
         results = await self.vector_service.perform_search(
-            collection_name='ai_course_docs',
+            collection_name=self.collections.resolve(request.collection),
             query=request.query,
             filter_=request.filter_,
             limit=request.top_k,
-            rerank=request.rerank
+            rerank=request.rerank,
+            neighbors=request.neighbors,
+            max_context_tokens=self.max_context_tokens,
+            deadline=deadline,
+            trace=trace,
+            mmr_lambda=request.mmr_lambda
         )
         search_time = time.time() - start_time
         return results, search_time
 
-    def _create_context(self, search_results: List[Dict[str, Any]]) -> str:
+    def _fit_to_deadline(self, search_results: List[SearchHit], deadline: Deadline) -> List[SearchHit]:
+        if deadline.remaining() >= deadline.reserve / 2 or len(search_results) < 2:
+            return search_results
+        deadline.degrade('context_shrunk')
+        return search_results[:math.ceil(len(search_results) / 2)]
+
+    def _create_context(self, search_results: List[SearchHit]) -> str:
         context_parts = [
             format_search_result(result)
             for result in search_results
@@ -93,63 +150,119 @@ class QueryService:
 
         return messages
 
-    async def _get_completion(self, messages: List[Dict[str, str]], request: QueryRequest) -> Tuple[Any, float]:
+    async def _get_completion(
+            self,
+            messages: List[Dict[str, str]],
+            request: QueryRequest,
+            deadline: Deadline
+    ) -> Tuple[Any, float]:
+        max_tokens = None
+        if deadline.remaining() < deadline.reserve:
+            deadline.degrade('max_tokens_capped')
+            max_tokens = max(MIN_COMPLETION_TOKENS, int(deadline.remaining() * COMPLETION_TOKENS_PER_SECOND))
+
         start_time = time.time()
-        completion = await self.vector_service.ai_service.create_completion(
-            messages=messages,
-            temperature=request.temperature,
-        )
+        try:
+            completion = await deadline.run(self.answer_service.create_completion(
+                messages=messages,
+                temperature=request.temperature,
+                max_tokens=max_tokens,
+            ))
+        except DeadlineExceeded:
+            deadline.degrade('completion_timeout')
+            completion = None
+        except ProviderUnavailableError as error:
+            raise HTTPException(status_code=503, detail=str(error))
         completion_time = time.time() - start_time
         return completion, completion_time
 
-    def _create_empty_response(self, search_time: float, reranked: bool) -> QueryResponse:
+    @staticmethod
+    def create_sources(search_results: List[SearchHit]) -> List[Source]:
+        return [
+            Source.model_construct(
+                filename=result.payload.get('filename', 'unknown'),
+                sources=result.payload.get('sources', []),
+                chunk_index=result.payload.get('chunk_index'),
+                relevance_score=result.relevance_score,
+                combined_score=result.combined_score,
+                vector_score=result.score,
+                headers=result.payload.get('headers', {}),
+                urls=result.payload.get('urls', []),
+                neighbor_chunks=[neighbor['chunk_index'] for neighbor in result.neighbors],
+            )
+            for result in search_results
+        ]
+
+    def _create_empty_response(
+            self,
+            search_time: float,
+            queue_wait_ms: float,
+            deadline: Deadline,
+            trace: SearchTrace
+    ) -> QueryResponse:
         return QueryResponse(
             answer="I couldn't find any relevant information to answer your question.",
             sources=[],
             metadata=QueryMetadata(
-                reranked=reranked,
+                reranked=self._reranked(trace),
                 search_time_ms=round(search_time * 1000, 2),
                 completion_time_ms=0,
                 total_tokens=None,
                 timestamp=datetime.utcnow(),
-                history_length=0
+                history_length=0,
+                queue_wait_ms=queue_wait_ms,
+                deadline_ms=self._budget_ms(deadline),
+                degradations=deadline.degradations,
+                rerank_decision=trace.rerank_decision,
+                mmr_dropped=trace.mmr_dropped,
+                rerank_failed=trace.rerank_failed
             )
         )
 
     def _create_response(
             self,
             completion: Any,
-            search_results: List[Dict[str, Any]],
+            search_results: List[SearchHit],
             search_time: float,
             completion_time: float,
-            request: QueryRequest
+            request: QueryRequest,
+            queue_wait_ms: float,
+            deadline: Deadline,
+            trace: SearchTrace
     ) -> QueryResponse:
         total_tokens = self._get_total_tokens(completion)
 
+        if completion is None:
+            answer = DEADLINE_ANSWER
+        else:
+            answer = completion.content if hasattr(completion, 'content') else completion.get('content', '')
+
         return QueryResponse(
-            answer=completion.content if hasattr(completion, 'content') else completion.get('content', ''),
-            sources=[
-                Source(
-                    filename=result['payload'].get('filename', 'unknown'),
-                    chunk_index=result['payload'].get('chunk_index'),
-                    relevance_score=result.get('relevance_score'),
-                    combined_score=result.get('combined_score'),
-                    vector_score=result['score'],
-                    headers=result['payload'].get('headers', {}),
-                    urls=result['payload'].get('urls', []),
-                )
-                for result in search_results
-            ],
+            answer=answer,
+            sources=self.create_sources(search_results),
             metadata=QueryMetadata(
-                reranked=request.rerank,
+                reranked=self._reranked(trace),
                 search_time_ms=round(search_time * 1000, 2),
                 completion_time_ms=round(completion_time * 1000, 2),
                 total_tokens=total_tokens,
                 timestamp=datetime.utcnow(),
-                history_length=len(request.chat_history) if request.chat_history else 0
+                history_length=len(request.chat_history) if request.chat_history else 0,
+                queue_wait_ms=queue_wait_ms,
+                deadline_ms=self._budget_ms(deadline),
+                degradations=deadline.degradations,
+                rerank_decision=trace.rerank_decision,
+                mmr_dropped=trace.mmr_dropped,
+                rerank_failed=trace.rerank_failed
             )
         )
 
+    def _reranked(self, trace: SearchTrace) -> bool:
+        decision = trace.rerank_decision
+        return decision is not None and decision.reranked and trace.rerank_scored > 0
+
+    def _budget_ms(self, deadline: Deadline) -> Optional[int]:
+        return round(deadline.budget * 1000) if deadline.budget is not None else None
+
     def _get_total_tokens(self, completion: Any) -> Optional[int]:
         if isinstance(completion, dict):
             return completion.get('usage', {}).get('total_tokens')
@@ -0,0 +1,286 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from src.domain.exceptions import ProviderRateLimitError
+from src.domain.llm import CompletionResponse, EmbeddingResponse
+from src.services.base.ai_service import AIService
+from src.splitters.text_splitter import TiktokenCounter, TokenCounter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BULK = 1
+
+
+_current_priority: ContextVar[Priority] = ContextVar('ai_request_priority', default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.available = per_minute
+        self.clock = clock
+        self.updated = clock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def wait_time(self, amount: float) -> float:
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if self.enabled:
+            self._refill()
+            self.available -= min(amount, self.capacity)
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class AdaptiveConcurrency:
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: Optional[int] = None,
+        decrease_factor: float = 0.5,
+        latency_spike_factor: float = 3.0,
+        smoothing: float = 0.2,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = float(max(minimum, min(initial, self.maximum)))
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.smoothing = smoothing
+        self.latency: Dict[str, float] = {}
+
+    @property
+    def slots(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def on_success(self, kind: str, latency: float) -> None:
+        average = self.latency.get(kind)
+        if average is not None and latency > average * self.latency_spike_factor:
+            self.on_overload()
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+        self.latency[kind] = latency if average is None else average + self.smoothing * (latency - average)
+
+    def on_overload(self) -> None:
+        self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency, max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE) -> None:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self, kind: Optional[str] = None, latency: Optional[float] = None) -> None:
+        self.in_flight -= 1
+        if kind is not None and latency is not None:
+            self.concurrency.on_success(kind, latency)
+        self._dispatch()
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        self.throttled += 1
+        self.concurrency.on_overload()
+        if retry_after:
+            self._paused_until = max(self._paused_until, self.clock() + retry_after)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self.concurrency.slots:
+                return
+
+            wait = max(
+                self._paused_until - self.clock(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(tokens),
+            )
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        queued = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                queued[Priority(priority).name.lower()] += 1
+
+        return {
+            'concurrency_limit': self.concurrency.slots,
+            'in_flight': self.in_flight,
+            'queued': queued,
+            'requests_available': round(self.requests.available, 2) if self.requests.enabled else None,
+            'tokens_available': round(self.tokens.available, 2) if self.tokens.enabled else None,
+            'latency_ms': {kind: round(value * 1000, 2) for kind, value in self.concurrency.latency.items()},
+            'throttled_total': self.throttled,
+            'paused_for_s': round(max(0.0, self._paused_until - self.clock()), 2),
+        }
+
+
+class RateLimitedAIService(AIService):
+    def __init__(
+        self,
+        service: AIService,
+        limiter: RateLimiter,
+        token_counter: Optional[TokenCounter] = None,
+        max_retries: int = 3,
+        completion_tokens_estimate: int = 512,
+        backoff: float = 0.5,
+    ):
+        self.service = service
+        self.limiter = limiter
+        self.token_counter = token_counter or TiktokenCounter()
+        self.max_retries = max_retries
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self.backoff = backoff
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.service, name)
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        return await self._call(
+            'embedding',
+            await self._count_tokens([text]),
+            lambda: self.service.create_embedding(text)
+        )
+
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        return await self._call(
+            'embedding',
+            await self._count_tokens(texts),
+            lambda: self.service.create_embeddings(texts)
+        )
+
+    async def create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
+    ) -> CompletionResponse:
+        contents = [message['content'] for message in messages]
+        prompt_tokens = await self._count_tokens(contents) + 4 * len(messages)
+        return await self._call(
+            'completion',
+            prompt_tokens + (max_tokens or self.completion_tokens_estimate),
+            lambda: self.service.create_completion(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_logprobs=top_logprobs
+            )
+        )
+
+    async def _count_tokens(self, texts: List[str]) -> int:
+        # tokenizing a batch of chunks is CPU-bound, keep it off the event loop
+        return sum(await asyncio.to_thread(self.token_counter.count_tokens_batch, texts))
+
+    async def _call(self, kind: str, tokens: int, call: Callable[[], Awaitable[T]]) -> T:
+        priority = _current_priority.get()
+        attempt = 0
+        while True:
+            await self.limiter.acquire(tokens, priority)
+            started = time.monotonic()
+            try:
+                result = await call()
+            except ProviderRateLimitError as error:
+                self.limiter.throttle(error.retry_after or self.backoff * 2 ** attempt)
+                self.limiter.release()
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                logger.warning(f'Provider rate limited {kind} call, retry {attempt}/{self.max_retries}')
+                continue
+            except BaseException:
+                self.limiter.release()
+                raise
+            self.limiter.release(kind, time.monotonic() - started)
+            return result
+
+    def embedding_size(self) -> Optional[int]:
+        return self.service.embedding_size()
+
+    async def warmup(self) -> None:
+        await self.service.warmup()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.service.stats(), 'rate_limit': self.limiter.snapshot()}
+
+    def close(self) -> None:
+        self.service.close()
+
+    async def aclose(self) -> None:
+        await self.service.aclose()
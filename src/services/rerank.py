@@ -0,0 +1,139 @@
+import logging
+import math
+import re
+from typing import Dict, List, Optional
+
+from src.domain.llm import CompletionResponse
+from src.domain.response import RerankDecision
+from src.services.base.ai_service import AIService
+
+logger = logging.getLogger(__name__)
+
+RERANK_MODES = ('always', 'adaptive')
+SCORING_MODES = ('logprobs', 'text')
+SCORE_LOGPROBS = 10
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+YES_NO_PATTERN = re.compile(r'(yes|no)\b')
+RELEVANCE_PROMPT = '''
+You rate how relevant a text is to a query.
+Answer with a single digit from 0 to 9, where 9 means highly relevant and 0 means not relevant at all.
+Do not write anything else.
+'''
+
+
+class RerankPolicy:
+    def __init__(
+        self,
+        mode: str = 'always',
+        margin_threshold: float = 0.03,
+        gap_threshold: float = 0.02,
+        entropy_threshold: float = 0.85,
+        temperature: float = 0.02,
+    ):
+        if mode not in RERANK_MODES:
+            raise ValueError(f'Unknown rerank mode: {mode}')
+        self.mode = mode
+        self.margin_threshold = margin_threshold
+        self.gap_threshold = gap_threshold
+        self.entropy_threshold = entropy_threshold
+        self.temperature = temperature
+
+    def decide(self, scores: List[float], limit: int) -> RerankDecision:
+        count = len(scores)
+        if self.mode == 'always':
+            return RerankDecision(mode=self.mode, reranked=count > 0, candidates=count, reason='always')
+        if count < 2:
+            return RerankDecision(mode=self.mode, reranked=False, candidates=0, reason='single_candidate')
+
+        entropy = self.entropy(scores)
+        margin = scores[limit - 1] - scores[limit] if count > limit else 0.0
+        gap, cut = max(
+            ((scores[index] - scores[index + 1], index + 1) for index in range(min(limit, count) - 1, count - 1)),
+            default=(0.0, count)
+        )
+        metrics = {'margin': round(margin, 4), 'gap': round(gap, 4), 'entropy': round(entropy, 4)}
+
+        if entropy <= self.entropy_threshold:
+            reason = None
+            if count > limit and margin >= self.margin_threshold:
+                reason = 'clear_margin'
+            elif count <= limit:
+                reason = 'confident_order'
+            if reason:
+                return RerankDecision(mode=self.mode, reranked=False, candidates=0, reason=reason, **metrics)
+
+        candidates = cut if gap >= self.gap_threshold else count
+        return RerankDecision(
+            mode=self.mode,
+            reranked=True,
+            candidates=max(candidates, min(limit, count)),
+            reason='ambiguous',
+            **metrics
+        )
+
+    def entropy(self, scores: List[float]) -> float:
+        top = max(scores)
+        weights = [math.exp((score - top) / self.temperature) for score in scores]
+        total = sum(weights)
+        entropy = -sum(weight / total * math.log(weight / total) for weight in weights if weight > 0)
+        return entropy / math.log(len(scores))
+
+
+class RelevanceScorer:
+    def __init__(self, ai_service: AIService, mode: str = 'logprobs'):
+        if mode not in SCORING_MODES:
+            raise ValueError(f'Unknown relevance scoring mode: {mode}')
+        self.ai_service = ai_service
+        self.mode = mode
+
+    async def score(self, query: str, text: str) -> Optional[float]:
+        try:
+            response = await self.ai_service.create_completion(
+                messages=[
+                    {'role': 'system', 'content': RELEVANCE_PROMPT},
+                    {'role': 'user', 'content': f'Query: {query}\nText: {text}'}
+                ],
+                temperature=0.0,
+                max_tokens=1,
+                top_logprobs=SCORE_LOGPROBS if self.mode == 'logprobs' else None
+            )
+        except Exception as error:
+            logger.warning(f'Relevance scoring failed, keeping vector score: {error}')
+            return None
+        return self.parse(response)
+
+    def parse(self, response: CompletionResponse) -> Optional[float]:
+        if response.top_logprobs:
+            score = self.expected_digit(response.top_logprobs)
+            if score is not None:
+                return score
+        return self.parse_text(response.content)
+
+    @staticmethod
+    def expected_digit(top_logprobs: Dict[str, float]) -> Optional[float]:
+        weights: Dict[int, float] = {}
+        for token, logprob in top_logprobs.items():
+            token = token.strip()
+            if len(token) == 1 and token.isdigit():
+                weights[int(token)] = weights.get(int(token), 0.0) + math.exp(logprob)
+
+        total = sum(weights.values())
+        if not total:
+            return None
+        return sum(digit * weight for digit, weight in weights.items()) / total / 9
+
+    @staticmethod
+    def parse_text(content: Optional[str]) -> Optional[float]:
+        if not content:
+            return None
+        answer = content.strip().lower()
+        yes_no = YES_NO_PATTERN.match(answer)
+        if yes_no is not None:
+            return 1.0 if yes_no.group(1) == 'yes' else 0.0
+
+        match = NUMBER_PATTERN.search(answer)
+        if match is None:
+            return None
+        if '.' in match.group():
+            return min(1.0, float(match.group()))
+        return min(1.0, int(match.group()) / 9)
@@ -0,0 +1,76 @@
+import asyncio
+import re
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException
+from qdrant_client import QdrantClient
+
+T = TypeVar('T')
+
+COLLECTION_NAME = 'ai_course_docs'
+COLLECTION_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+ROUTING_FIELD = 'filename'
+
+
+class CollectionRouter:
+    def __init__(self, default: str = COLLECTION_NAME, collections: Iterable[str] = ()):
+        self.default = default
+        self.collections = [default, *[name for name in collections if name != default]]
+        for name in self.collections:
+            if not COLLECTION_NAME_PATTERN.match(name):
+                raise ValueError(f'Invalid collection name: {name!r}')
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        if not name:
+            return self.default
+        if name not in self.collections:
+            raise HTTPException(status_code=404, detail=f'Unknown collection: {name}')
+        return name
+
+
+class ShardRouter:
+    def __init__(self, clients: Sequence[QdrantClient]):
+        if not clients:
+            raise ValueError('ShardRouter needs at least one Qdrant client')
+        self.clients = list(clients)
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def shard_for(self, routing_key: str) -> int:
+        return zlib.crc32(routing_key.encode()) % len(self.clients)
+
+    def shard_for_point(self, point_id: Any, payload: Optional[Dict[str, Any]]) -> int:
+        key = (payload or {}).get(ROUTING_FIELD)
+        return self.shard_for(str(point_id if key is None else key))
+
+    def partition(self, items: Iterable[T], shard: Callable[[T], int]) -> Dict[int, List[T]]:
+        groups: Dict[int, List[T]] = {}
+        for item in items:
+            groups.setdefault(shard(item) if len(self.clients) > 1 else 0, []).append(item)
+        return groups
+
+    async def gather(self, call: Callable[[QdrantClient], T]) -> List[T]:
+        if len(self.clients) == 1:
+            return [call(self.clients[0])]
+        return list(await asyncio.gather(*[asyncio.to_thread(call, client) for client in self.clients]))
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return all(client.collection_exists(collection_name) for client in self.clients)
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.close()
+
+
+def create_qdrant_clients(host: str, port: int, shards: str = '') -> List[QdrantClient]:
+    endpoints = [endpoint.strip() for endpoint in shards.split(',') if endpoint.strip()]
+    if not endpoints:
+        return [QdrantClient(host=host, port=port)]
+
+    clients = []
+    for endpoint in endpoints:
+        shard_host, _, shard_port = endpoint.partition(':')
+        clients.append(QdrantClient(host=shard_host, port=int(shard_port or port)))
+    return clients
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from src.domain.llm import CompletionResponse, EmbeddingResponse
+from src.services.base.ai_service import AIService
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            'started': self.started,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._calls),
+        }
+
+
+def payload_key(kind: str, model: str, payload: Any) -> str:
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return f'{kind}:{model}:{digest}'
+
+
+class CoalescingAIService(AIService):
+    def __init__(self, service: AIService, flight: Optional[SingleFlight] = None):
+        self.service = service
+        self.flight = flight or SingleFlight()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.service, name)
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        return await self.flight.do(
+            payload_key('embedding', self._model('embedding_model'), text),
+            lambda: self.service.create_embedding(text)
+        )
+
+    async def create_embeddings(self, texts: List[str]) -> List[EmbeddingResponse]:
+        return await self.flight.do(
+            payload_key('embeddings', self._model('embedding_model'), texts),
+            lambda: self.service.create_embeddings(texts)
+        )
+
+    async def create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
+    ) -> CompletionResponse:
+        return await self.flight.do(
+            payload_key(
+                'completion',
+                self._model('completion_model'),
+                {
+                    'messages': messages,
+                    'temperature': temperature,
+                    'max_tokens': max_tokens,
+                    'top_logprobs': top_logprobs,
+                }
+            ),
+            lambda: self.service.create_completion(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_logprobs=top_logprobs
+            )
+        )
+
+    def _model(self, attribute: str) -> str:
+        return str(getattr(self.service, attribute, ''))
+
+    def embedding_size(self) -> Optional[int]:
+        return self.service.embedding_size()
+
+    async def warmup(self) -> None:
+        await self.service.warmup()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.service.stats(), 'singleflight': self.flight.snapshot()}
+
+    def close(self) -> None:
+        self.service.close()
+
+    async def aclose(self) -> None:
+        await self.service.aclose()
@@ -0,0 +1,234 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import msgpack  # type: ignore[import-untyped]
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.services.filter import ensure_payload_indexes
+from src.services.projection import EmbeddingProjection
+from src.services.routing import ShardRouter
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 'chat-rag-snapshot'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BATCH_SIZE = 256
+
+
+class SnapshotError(Exception):
+    pass
+
+
+@dataclass
+class SnapshotInfo:
+    collection: str
+    count: int
+    dimensions: int
+    distance: str
+    embedding_model: Optional[str]
+    seconds: float = 0.0
+
+
+class SnapshotService:
+    def __init__(self, client: Union[QdrantClient, ShardRouter], batch_size: int = SNAPSHOT_BATCH_SIZE):
+        self.router = client if isinstance(client, ShardRouter) else ShardRouter([client])
+        self.client = self.router.clients[0]
+        self.batch_size = batch_size
+
+    def export(
+            self,
+            collection_name: str,
+            path: Union[str, Path],
+            embedding_model: Optional[str] = None
+    ) -> SnapshotInfo:
+        started = time.monotonic()
+        params = self.client.get_collection(collection_name).config.params.vectors
+        if not isinstance(params, models.VectorParams):
+            raise SnapshotError(f'Collection {collection_name} uses named vectors, which snapshots do not support')
+
+        header = {
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'collection': collection_name,
+            'count': sum(client.count(collection_name, exact=True).count for client in self.router.clients),
+            'dimensions': params.size,
+            'distance': params.distance.value,
+            'embedding_model': embedding_model,
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('wb') as file:
+            packer = msgpack.Packer()
+            file.write(packer.pack(header))
+            for client in self.router.clients:
+                for batch in self._scroll(client, collection_name):
+                    file.write(packer.pack(batch))
+
+        info = self._info(header, time.monotonic() - started)
+        logger.info(f'Exported {info.count} points from {collection_name} to {path} in {info.seconds:.2f}s')
+        return info
+
+    def load(
+            self,
+            path: Union[str, Path],
+            collection_name: Optional[str] = None,
+            embedding_model: Optional[str] = None,
+            parallel: int = 4,
+            projection: Optional[EmbeddingProjection] = None,
+    ) -> SnapshotInfo:
+        started = time.monotonic()
+        if self._is_local():
+            parallel = 1
+
+        with Path(path).open('rb') as file:
+            unpacker = msgpack.Unpacker(file, raw=False)
+            header = self._read_header(unpacker, embedding_model)
+            collection_name = collection_name or header['collection']
+            target = self._project_header(header, projection)
+            self._create_collection(collection_name, target)
+
+            pending: List[Future] = []
+            with ThreadPoolExecutor(max_workers=max(1, parallel), thread_name_prefix='snapshot') as executor:
+                for batch in unpacker:
+                    if len(pending) >= parallel * 2:
+                        pending.pop(0).result()
+                    pending.append(executor.submit(
+                        self._upsert, collection_name, header['dimensions'], batch, projection
+                    ))
+                for future in pending:
+                    future.result()
+
+        info = self._info({**target, 'collection': collection_name}, time.monotonic() - started)
+        logger.info(f'Loaded {info.count} points into {collection_name} in {info.seconds:.2f}s')
+        return info
+
+    def read_info(self, path: Union[str, Path]) -> SnapshotInfo:
+        with Path(path).open('rb') as file:
+            return self._info(self._read_header(msgpack.Unpacker(file, raw=False), None), 0.0)
+
+    @staticmethod
+    def read_vectors(path: Union[str, Path], limit: Optional[int] = None) -> np.ndarray:
+        matrices: List[np.ndarray] = []
+        with Path(path).open('rb') as file:
+            unpacker = msgpack.Unpacker(file, raw=False)
+            dimensions = SnapshotService._read_header(unpacker, None)['dimensions']
+            read = 0
+            for batch in unpacker:
+                matrices.append(np.frombuffer(batch['vectors'], dtype='<f4').reshape(-1, dimensions))
+                read += len(matrices[-1])
+                if limit is not None and read >= limit:
+                    break
+        if not matrices:
+            return np.empty((0, dimensions), dtype=np.float32)
+        return np.concatenate(matrices)[:limit]
+
+    def _scroll(self, client: QdrantClient, collection_name: str) -> Iterator[Dict[str, Any]]:
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                yield {
+                    'ids': [point.id for point in points],
+                    'payloads': [point.payload or {} for point in points],
+                    'vectors': np.asarray([point.vector for point in points], dtype='<f4').tobytes(),
+                }
+            if offset is None:
+                return
+
+    @staticmethod
+    def _read_header(unpacker: msgpack.Unpacker, embedding_model: Optional[str]) -> Dict[str, Any]:
+        try:
+            header = next(unpacker)
+        except StopIteration:
+            raise SnapshotError('Snapshot file is empty')
+        if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+            raise SnapshotError('File is not a collection snapshot')
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise SnapshotError(f'Unsupported snapshot version: {header.get('version')}')
+        if embedding_model and header.get('embedding_model') and header['embedding_model'] != embedding_model:
+            raise SnapshotError(
+                f'Snapshot was embedded with {header['embedding_model']}, but {embedding_model} is configured'
+            )
+        return header
+
+    def _create_collection(self, collection_name: str, header: Dict[str, Any]) -> None:
+        for client in self.router.clients:
+            if client.collection_exists(collection_name):
+                params = client.get_collection(collection_name).config.params.vectors
+                if isinstance(params, models.VectorParams) and params.size != header['dimensions']:
+                    raise SnapshotError(
+                        f'Collection {collection_name} has {params.size} dimensions, '
+                        f'snapshot has {header['dimensions']}'
+                    )
+            else:
+                client.create_collection(
+                    collection_name=collection_name,
+                    vectors_config=models.VectorParams(
+                        size=header['dimensions'],
+                        distance=models.Distance(header['distance'])
+                    )
+                )
+            ensure_payload_indexes(client, collection_name)
+
+    def _project_header(self, header: Dict[str, Any], projection: Optional[EmbeddingProjection]) -> Dict[str, Any]:
+        if projection is None:
+            return header
+        return {
+            **header,
+            'dimensions': projection.dimensions,
+            'embedding_model': f'{header.get('embedding_model') or ''}+{projection.name}',
+        }
+
+    def _upsert(
+            self,
+            collection_name: str,
+            dimensions: int,
+            batch: Dict[str, Any],
+            projection: Optional[EmbeddingProjection] = None
+    ) -> None:
+        vectors = np.frombuffer(batch['vectors'], dtype='<f4').reshape(-1, dimensions)
+        if projection is not None:
+            vectors = projection.apply(vectors)
+        rows = self.router.partition(
+            range(len(batch['ids'])),
+            lambda row: self.router.shard_for_point(batch['ids'][row], batch['payloads'][row])
+        )
+        for shard, shard_rows in rows.items():
+            self.router.clients[shard].upsert(
+                collection_name=collection_name,
+                points=models.Batch(
+                    ids=[batch['ids'][row] for row in shard_rows],
+                    vectors=vectors[shard_rows].tolist(),
+                    payloads=[batch['payloads'][row] for row in shard_rows]
+                ),
+                wait=True,
+            )
+
+    def _is_local(self) -> bool:
+        return any(
+            client.init_options.get('location') == ':memory:' or client.init_options.get('path') is not None
+            for client in self.router.clients
+        )
+
+    def _info(self, header: Dict[str, Any], seconds: float) -> SnapshotInfo:
+        return SnapshotInfo(
+            collection=header['collection'],
+            count=header['count'],
+            dimensions=header['dimensions'],
+            distance=header['distance'],
+            embedding_model=header.get('embedding_model'),
+            seconds=round(seconds, 3),
+        )
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from src.domain.document import Document
+from src.domain.exceptions import IngestBusyError
+from src.splitters.text_splitter import MarkdownChunkStrategy, TextSplitter, TiktokenCounter
+
+logger = logging.getLogger(__name__)
+
+_worker_splitter: Optional[TextSplitter] = None
+
+
+def clean_markdown_links(text: str) -> str:
+    return re.sub(r'\[(.*?)\]\((.*?)\)', r'\1 (\2)', text)
+
+
+def create_splitter(num_threads: Optional[int] = None) -> TextSplitter:
+    return TextSplitter(
+        token_counter=TiktokenCounter(num_threads=num_threads),
+        chunk_strategy=MarkdownChunkStrategy()
+    )
+
+
+def split_document(text: str, limit: int, splitter: Optional[TextSplitter] = None) -> List[Document]:
+    splitter = splitter or _worker_splitter or create_splitter()
+    return splitter.split(clean_markdown_links(text), limit)
+
+
+def _init_worker(splitter_factory: Callable[..., TextSplitter] = create_splitter) -> None:
+    global _worker_splitter
+    _worker_splitter = splitter_factory(num_threads=1)
+    try:
+        _worker_splitter.token_counter.count_tokens('warmup')
+    except Exception:
+        logger.exception('Failed to preload tokenizer in splitter worker')
+
+
+def _ping() -> bool:
+    return _worker_splitter is not None
+
+
+class SplitterPool:
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 8,
+        retry_after: float = 5.0,
+        splitter_factory: Callable[..., TextSplitter] = create_splitter
+    ):
+        self.workers = workers
+        self.splitter_factory = splitter_factory
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self.splitter = splitter_factory() if workers <= 0 else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.splitter_factory,),
+            )
+        return self._executor
+
+    async def split(self, text: str, limit: int) -> List[Document]:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise IngestBusyError(retry_after=self.retry_after)
+
+        self.pending += 1
+        try:
+            executor = self.executor
+            if executor is None:
+                return await asyncio.to_thread(split_document, text, limit, self.splitter)
+            return await asyncio.get_running_loop().run_in_executor(executor, split_document, text, limit)
+        except BrokenProcessPool:
+            logger.error('Splitter worker pool broke, recreating it for the next request')
+            self._discard_executor()
+            raise
+        finally:
+            self.pending -= 1
+
+    async def warmup(self) -> None:
+        executor = self.executor
+        if executor is None:
+            if self.splitter is not None:
+                await asyncio.to_thread(self.splitter.token_counter.count_tokens, 'warmup')
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(self.workers)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'rejected_total': self.rejected,
+        }
+
+    def close(self) -> None:
+        self._discard_executor()
+
+    def _discard_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,160 @@
+import hashlib
+import inspect
+import json
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+import httpx
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.domain.llm import CompletionResponse, EmbeddingResponse
+from src.services.base.ai_service import AIService
+
+
+def constant_embedding(text: str) -> List[float]:
+    return [1.0, 0.0, 0.0, 0.0]
+
+
+def hash_embedding(text: str) -> List[float]:
+    digest = hashlib.sha256(text.encode()).digest()
+    return [byte / 255 + 0.01 for byte in digest[:4]]
+
+
+class FakeAIService(AIService):
+    def __init__(
+        self,
+        embed: Callable[[str], Any] = constant_embedding,
+        complete: Optional[Callable[..., Any]] = None,
+        model: str = 'fake',
+    ) -> None:
+        self.embed = embed
+        self.complete = complete or (lambda messages, **options: '0.5')
+        self.embedding_model = model
+        self.completion_model = model
+        self.embedded: List[str] = []
+        self.completions: List[Dict[str, Any]] = []
+
+    @property
+    def embedding_calls(self) -> int:
+        return len(self.embedded)
+
+    @property
+    def completion_calls(self) -> int:
+        return len(self.completions)
+
+    async def create_embedding(self, text: str) -> EmbeddingResponse:
+        self.embedded.append(text)
+        vector = self.embed(text)
+        if inspect.isawaitable(vector):
+            vector = await vector
+        return EmbeddingResponse(embedding=vector, model=self.embedding_model)
+
+    async def create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        top_logprobs: Optional[int] = None
+    ) -> CompletionResponse:
+        options = {'temperature': temperature, 'max_tokens': max_tokens, 'top_logprobs': top_logprobs}
+        self.completions.append({'messages': messages, **options})
+        result = self.complete(messages, **options)
+        if inspect.isawaitable(result):
+            result = await result
+        if isinstance(result, CompletionResponse):
+            return result
+        return CompletionResponse(content=result, model=self.completion_model)
+
+    def close(self) -> None:
+        pass
+
+
+def create_points(texts_per_file: Dict[str, Sequence[str]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            'id': str(uuid.uuid5(uuid.NAMESPACE_URL, f'{filename}#{index}')),
+            'text': text,
+            'payload': {
+                'filename': filename,
+                'chunk_index': index,
+                'headers': {},
+                'urls': [],
+                'images': [],
+                'tokens': 10,
+            },
+        }
+        for filename, texts in texts_per_file.items()
+        for index, text in enumerate(texts)
+    ]
+
+
+class OllamaStub:
+    def __init__(self) -> None:
+        self.requests: List[Dict[str, Any]] = []
+        self.reply = 'Hello from the stub'
+        self.dimensions = 4
+        self.transport = httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else {}
+        self.requests.append({'path': request.url.path, 'body': body})
+
+        if request.url.path == '/api/embed':
+            inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+            return httpx.Response(200, json={
+                'model': body['model'],
+                'embeddings': [[float(len(text))] * self.dimensions for text in inputs],
+            })
+        if request.url.path == '/api/chat':
+            if not body.get('messages'):
+                return httpx.Response(200, json={'model': body['model'], 'done': True, 'done_reason': 'load'})
+            return httpx.Response(200, content=self._stream_chat(body))
+        return httpx.Response(404, json={'error': 'not found'})
+
+    async def _stream_chat(self, body: Dict[str, Any]) -> AsyncIterator[bytes]:
+        for word in self.reply.split(' '):
+            yield self._line({'model': body['model'], 'message': {'role': 'assistant', 'content': word + ' '}})
+        yield self._line({
+            'model': body['model'],
+            'message': {'role': 'assistant', 'content': ''},
+            'done': True,
+            'prompt_eval_count': 12,
+            'eval_count': 4,
+        })
+
+    def _line(self, data: Dict[str, Any]) -> bytes:
+        return (json.dumps(data) + '\n').encode()
+
+
+@pytest.fixture
+def ollama_server() -> OllamaStub:
+    return OllamaStub()
+
+
+@pytest.fixture
+def fake_ai() -> FakeAIService:
+    return FakeAIService()
+
+
+@pytest.fixture
+def hash_ai() -> FakeAIService:
+    return FakeAIService(embed=hash_embedding, complete=lambda messages, **options: 'answer', model='hash')
+
+
+@pytest.fixture
+def points() -> List[Dict[str, Any]]:
+    return create_points({
+        f'file_{file}.md': [f'file {file} chunk {chunk}' for chunk in range(4)] for file in range(6)
+    })
+
+
+@pytest.fixture
+def store() -> QdrantClient:
+    client = QdrantClient(':memory:')
+    client.create_collection(
+        collection_name='docs',
+        vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE)
+    )
+    return client
@@ -0,0 +1,127 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.domain.chat import QueryRequest
+from src.domain.exceptions import DeadlineExceeded
+from src.services.deadline import Deadline
+from src.services.query import DEADLINE_ANSWER, QueryService
+from src.services.routing import CollectionRouter
+from src.services.vector import SearchTrace, VectorService
+
+RERANK_PROMPT = 'rate how relevant'
+
+
+def slow_completion(rerank_delays: Dict[str, float], answer_delay: float = 0.0) -> Callable[..., Awaitable[str]]:
+    async def complete(messages: List[Dict[str, str]], **options) -> str:
+        if RERANK_PROMPT in messages[0]['content']:
+            text = messages[-1]['content'].rsplit('Text: ', 1)[1]
+            await asyncio.sleep(rerank_delays.get(text, 0.0))
+            return '1.0'
+        await asyncio.sleep(answer_delay)
+        return 'answer'
+
+    return complete
+
+
+def add_texts(client: QdrantClient, texts: List[str]) -> QdrantClient:
+    client.upsert(collection_name='docs', points=[
+        models.PointStruct(
+            id=index,
+            vector=[1.0, 0.1 * index, 0.0, 0.0],
+            payload={'filename': 'a.md', 'chunk_index': index, 'tokens': 10, 'text': text},
+        )
+        for index, text in enumerate(texts)
+    ])
+    return client
+
+
+def test_deadline_run_raises_when_budget_is_spent():
+    async def scenario():
+        await Deadline(0.01).run(asyncio.sleep(1))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(scenario())
+
+
+def test_deadline_without_budget_never_expires():
+    deadline = Deadline.from_ms(None, reserve_share=0.5)
+
+    assert not deadline.enabled
+    assert deadline.available() > 0
+    assert asyncio.run(deadline.run(asyncio.sleep(0, result='done'))) == 'done'
+
+
+def test_rerank_returns_partial_results_when_budget_runs_out(fake_ai, store):
+    fake_ai.complete = slow_completion({'slow': 5.0})
+    service = VectorService(fake_ai, add_texts(store, ['fast', 'slow', 'other']))
+    deadline = Deadline(0.2, reserve_share=0.5)
+
+    results = asyncio.run(service.perform_search('docs', 'query', limit=3, rerank=True, deadline=deadline))
+
+    assert deadline.degradations == ['rerank_partial']
+    by_text = {result.payload['text']: result for result in results}
+    assert by_text['slow'].relevance_score is None
+    assert by_text['slow'].combined_score == by_text['slow'].score
+    assert by_text['fast'].relevance_score == 1.0
+
+
+def test_rerank_is_skipped_when_only_the_completion_budget_is_left(fake_ai, store):
+    fake_ai.complete = slow_completion({})
+    service = VectorService(fake_ai, add_texts(store, ['fast', 'other']))
+    deadline = Deadline(0.2, reserve_share=1.0)
+
+    results = asyncio.run(
+        service.perform_search('docs', 'query', limit=1, rerank=True, neighbors=1, deadline=deadline)
+    )
+
+    assert deadline.degradations == ['rerank_skipped', 'neighbors_skipped']
+    assert len(results) == 1
+    assert results[0].combined_score is None
+
+
+def test_query_returns_sources_when_completion_misses_deadline(fake_ai, store):
+    fake_ai.complete = slow_completion({}, answer_delay=5.0)
+    query_service = QueryService(
+        VectorService(fake_ai, add_texts(store, ['fast', 'other'])),
+        collections=CollectionRouter('docs')
+    )
+
+    response = asyncio.run(query_service.process_query(QueryRequest(query='query', rerank=False, deadline_ms=200)))
+
+    assert response.answer == DEADLINE_ANSWER
+    assert response.metadata.deadline_ms == 200
+    assert 'completion_timeout' in response.metadata.degradations
+    assert [source.chunk_index for source in response.sources] == [0, 1]
+
+
+def test_query_sends_completion_to_answer_service(fake_ai, hash_ai, store):
+    query_service = QueryService(
+        VectorService(fake_ai, add_texts(store, ['fast'])),
+        answer_service=hash_ai,
+        collections=CollectionRouter('docs')
+    )
+
+    response = asyncio.run(query_service.process_query(QueryRequest(query='query', rerank=False)))
+
+    assert response.answer == 'answer'
+    assert fake_ai.completion_calls == 0
+    assert hash_ai.completion_calls == 1
+
+
+def test_scorer_failures_are_not_reported_as_deadline_degradation(fake_ai, store):
+    fake_ai.complete = lambda messages, **options: 'not sure'
+    service = VectorService(fake_ai, add_texts(store, ['fast', 'other']))
+    deadline = Deadline(5.0, reserve_share=0.5)
+    trace = SearchTrace()
+
+    results = asyncio.run(
+        service.perform_search('docs', 'query', limit=2, rerank=True, deadline=deadline, trace=trace)
+    )
+
+    assert deadline.degradations == []
+    assert (trace.rerank_scored, trace.rerank_failed) == (0, 2)
+    assert [result.payload['text'] for result in results] == ['fast', 'other']
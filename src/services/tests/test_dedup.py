@@ -0,0 +1,105 @@
+import asyncio
+import uuid
+from typing import List
+
+from qdrant_client import QdrantClient
+
+from src.domain.filter import SearchFilter
+from src.services.dedup import DuplicateEntry, NearDuplicateIndex
+from src.services.document import DocumentService
+from src.services.routing import ShardRouter
+from src.services.vector import VectorService
+
+FOOTER = (
+    'This course material is shared under a Creative Commons licence. Join the community forum to ask questions, '
+    'share your solutions and find study partners who are working through the same lessons on retrieval and agents.'
+)
+
+
+def create_points(filename: str, texts: List[str]) -> List[dict]:
+    return [
+        {
+            'id': str(uuid.uuid5(uuid.NAMESPACE_URL, f'{filename}#{index}')),
+            'text': text,
+            'payload': {
+                'filename': filename,
+                'chunk_index': index,
+                'headers': {},
+                'urls': [],
+                'images': [],
+                'tokens': 10,
+            },
+        }
+        for index, text in enumerate(texts)
+    ]
+
+
+def test_index_matches_near_duplicates_and_persists(tmp_path):
+    path = tmp_path / 'dedup.msgpack'
+    index = NearDuplicateIndex(path)
+    index.add('docs', DuplicateEntry('a', 'a.md', index.signature(FOOTER)))
+    index.save()
+
+    loaded = NearDuplicateIndex.load(path)
+    edited = FOOTER.replace('Join the community', 'Join our community')
+    assert len(loaded) == 1
+    assert loaded.find('docs', loaded.signature(edited)).point_id == 'a'  # type: ignore
+    assert loaded.find('docs', loaded.signature('Vectors are compared with cosine similarity.')) is None
+    assert loaded.find('other', loaded.signature(FOOTER)) is None
+
+
+def test_duplicate_chunks_are_collapsed_across_uploads(hash_ai, tmp_path):
+    router = ShardRouter([QdrantClient(':memory:') for _ in range(2)])
+    vector_service = VectorService(hash_ai, router, vector_size=4)
+    service = DocumentService(vector_service, duplicates=NearDuplicateIndex(tmp_path / 'dedup.msgpack'))
+
+    first = create_points('a.md', ['Chapter one explains tokenizers and embeddings in detail.', FOOTER])
+    second = create_points('b.md', ['Chapter two covers vector databases and indexes.', FOOTER + ' '])
+    assert asyncio.run(service._store_points('docs', first, 'a.md')) == 2
+
+    restarted = DocumentService(vector_service, duplicates=NearDuplicateIndex.load(tmp_path / 'dedup.msgpack'))
+    assert asyncio.run(restarted._store_points('docs', second, 'b.md')) == 1
+
+    footer_id = first[1]['id']
+    point = router.clients[router.shard_for('a.md')].retrieve('docs', ids=[footer_id])[0]
+    assert point.payload['sources'] == ['a.md', 'b.md']  # type: ignore
+    assert sum(client.count('docs').count for client in router.clients) == 3
+
+
+def test_stale_entries_are_stored_again(hash_ai):
+    vector_service = VectorService(hash_ai, QdrantClient(':memory:'), vector_size=4)
+    index = NearDuplicateIndex()
+    index.add('docs', DuplicateEntry('00000000-0000-0000-0000-000000000001', 'old.md', index.signature(FOOTER)))
+    service = DocumentService(vector_service, duplicates=index)
+
+    points = create_points('b.md', [FOOTER])
+    assert asyncio.run(service._store_points('docs', points, 'b.md')) == 1
+
+    assert vector_service.client.count('docs').count == 1
+    assert index.find('docs', index.signature(FOOTER)).point_id == points[0]['id']  # type: ignore
+
+
+def test_filename_filter_returns_collapsed_chunks(hash_ai):
+    vector_service = VectorService(hash_ai, QdrantClient(':memory:'), vector_size=4)
+    service = DocumentService(vector_service, duplicates=NearDuplicateIndex())
+    asyncio.run(service._store_points('docs', create_points('a.md', [FOOTER]), 'a.md'))
+    asyncio.run(service._store_points('docs', create_points('b.md', ['Chapter two.', FOOTER]), 'b.md'))
+
+    search_filter = SearchFilter.model_validate({'must': [{'key': 'filename', 'match': 'b.md'}]})
+    hits = asyncio.run(vector_service.perform_search('docs', FOOTER, search_filter, limit=5, rerank=False))
+
+    assert sorted(hit.payload['text'] for hit in hits) == sorted(['Chapter two.', FOOTER])
+
+
+def test_reupload_of_the_same_file_keeps_edited_chunks(hash_ai):
+    vector_service = VectorService(hash_ai, QdrantClient(':memory:'), vector_size=4)
+    service = DocumentService(vector_service, duplicates=NearDuplicateIndex())
+    edited = FOOTER.replace('Join the community', 'Join our community')
+    asyncio.run(service._store_points('docs', create_points('a.md', [FOOTER]), 'a.md'))
+
+    reuploaded = create_points('a.md', [edited])
+    reuploaded[0]['id'] = str(uuid.uuid4())
+
+    assert asyncio.run(service._store_points('docs', reuploaded, 'a.md')) == 1
+    points, _ = vector_service.client.scroll('docs', limit=10)
+    assert sorted(point.payload['text'] for point in points) == sorted([FOOTER, edited])  # type: ignore
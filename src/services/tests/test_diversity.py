@@ -0,0 +1,33 @@
+import asyncio
+
+import numpy as np
+from qdrant_client.http import models
+
+from src.services.diversity import mmr_select
+from src.services.vector import SearchTrace, VectorService
+
+
+def test_mmr_prefers_diverse_candidate_over_near_duplicate():
+    vectors = np.array([[1.0, 0.0], [0.99, 0.05], [0.6, 0.8]])
+    scores = np.array([0.9, 0.89, 0.7])
+
+    assert mmr_select(vectors, scores, 2, mmr_lambda=0.5) == [0, 2]
+    assert mmr_select(vectors, scores, 2, mmr_lambda=1.0) == [0, 1]
+    assert mmr_select(vectors, scores, 5, mmr_lambda=0.5) == [0, 1, 2]
+
+
+def test_perform_search_drops_redundant_candidates_before_rerank(fake_ai, store):
+    vectors = [[1.0, 0.8, 0.0, 0.0], [1.0, 0.81, 0.0, 0.0], [1.0, 0.82, 0.0, 0.0], [1.0, 0.0, 0.9, 0.0]]
+    store.upsert('docs', points=[
+        models.PointStruct(id=index, vector=vector, payload={'text': f'chunk {index}', 'tokens': 10})
+        for index, vector in enumerate(vectors)
+    ])
+    service = VectorService(fake_ai, store, mmr_lambda=0.5)
+    trace = SearchTrace()
+
+    results = asyncio.run(service.perform_search('docs', 'query', limit=2, rerank=True, trace=trace))
+
+    assert sorted(result.id for result in results) == [0, 3]
+    assert trace.mmr_dropped == 2
+    assert fake_ai.completion_calls == 2
+    assert all(result.vector is None for result in results)
@@ -0,0 +1,64 @@
+import asyncio
+
+from qdrant_client import QdrantClient
+
+from src.domain.search import SearchHit
+from src.services.evaluation import (
+    CountingAIService,
+    LabeledQuery,
+    RetrievalSweep,
+    SweepTarget,
+    cheapest,
+    load_queries,
+    score_hits,
+    sweep_grid,
+)
+from src.services.rerank import RelevanceScorer
+from src.services.vector import VectorService
+
+
+def test_load_queries_and_score_hits(tmp_path):
+    path = tmp_path / 'queries.jsonl'
+    path.write_text(
+        '{"query": "q", "relevant": ["a.md", {"filename": "b.md", "chunk_index": 2}]}\n\n'
+    )
+    queries = load_queries(path)
+    hits = [
+        SearchHit(1, 0.9, {'filename': 'c.md', 'chunk_index': 0}),
+        SearchHit(2, 0.8, {'filename': 'b.md', 'chunk_index': 2}),
+        SearchHit(3, 0.7, {'filename': 'c.md', 'chunk_index': 1, 'sources': ['c.md', 'a.md']}),
+    ]
+
+    assert queries == [LabeledQuery('q', [('a.md', None), ('b.md', 2)])]
+    assert score_hits(hits, queries[0].relevant) == (1.0, 0.5)
+    assert score_hits(hits[:1], queries[0].relevant) == (0.0, 0.0)
+
+
+def test_sweep_grid_skips_oversampling_without_rerank_or_mmr():
+    grid = sweep_grid(['full'], [1, 2, 4], ['off', 'always'])
+
+    assert [(config.oversampling, config.rerank) for config in grid] == [
+        (1, 'off'), (1, 'always'), (2, 'always'), (4, 'always')
+    ]
+
+
+def test_sweep_reports_quality_and_provider_calls(hash_ai, points):
+    ai_service = CountingAIService(hash_ai)
+    vector_service = VectorService(
+        ai_service,
+        QdrantClient(':memory:'),
+        relevance_scorer=RelevanceScorer(ai_service, mode='text'),
+        vector_size=4
+    )
+    asyncio.run(vector_service.add_points('docs', points))
+    queries = [LabeledQuery(f'file {file} chunk 1', [(f'file_{file}.md', 1)]) for file in range(3)]
+
+    sweep = RetrievalSweep([SweepTarget('full', vector_service, 'docs')], queries, k=3)
+    off, always = asyncio.run(sweep.run(sweep_grid(['full'], [2], ['off', 'always'])))
+
+    assert (off.recall, off.mrr) == (1.0, 1.0)
+    assert (off.embedding_calls, off.completion_calls) == (1.0, 0.0)
+    assert always.embedding_calls == 1.0
+    assert hash_ai.embedding_calls == 24 + 2 * len(queries)
+    assert always.completion_calls == 6.0
+    assert cheapest([off, always], min_recall=1.0) is off
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.domain.chat import QueryRequest
+from src.domain.filter import SearchFilter
+from src.services.filter import build_qdrant_filter, payload_index_schema
+from src.services.vector import VectorService
+
+
+def test_empty_filter_compiles_to_none():
+    assert build_qdrant_filter(None) is None
+    assert build_qdrant_filter(SearchFilter()) is None
+
+
+def test_filter_compiles_to_qdrant_conditions():
+    search_filter = SearchFilter.model_validate({
+        'must': [
+            {'key': 'filename', 'match': 'lesson_01.md'},
+            {'key': 'chunk_index', 'range': {'gte': 2, 'lt': 5}},
+        ],
+        'must_not': [{'key': 'headers.h2', 'any': ['Intro', 'Outro']}],
+    })
+
+    compiled = build_qdrant_filter(search_filter)
+
+    assert isinstance(compiled, models.Filter)
+    assert compiled.should is None
+    filename, chunk_index = compiled.must  # type: ignore
+    assert [condition.key for condition in filename.should] == ['filename', 'sources']
+    assert filename.should[1].match == models.MatchValue(value='lesson_01.md')
+    assert chunk_index.range == models.Range(gte=2, lt=5)
+    assert compiled.must_not[0].match == models.MatchAny(any=['Intro', 'Outro'])  # type: ignore
+
+
+@pytest.mark.parametrize('condition', [
+    {'key': 'payload.text', 'match': 'x'},
+    {'key': 'filename', 'range': {'gte': 1}},
+    {'key': 'chunk_index', 'match': '3'},
+    {'key': 'filename'},
+    {'key': 'filename', 'match': 'a.md', 'any': ['b.md']},
+])
+def test_invalid_conditions_are_rejected(condition):
+    with pytest.raises(ValidationError):
+        SearchFilter.model_validate({'must': [condition]})
+
+
+def test_query_request_rejects_raw_qdrant_filters():
+    with pytest.raises(ValidationError):
+        QueryRequest.model_validate({
+            'query': 'q',
+            'filter_': {'must': [{'key': 'filename', 'match': {'value': 'a.md'}}]},
+        })
+
+
+def test_ensure_collection_creates_indexes_once():
+    client = QdrantClient(':memory:')
+    calls = []
+    original = client.create_payload_index
+
+    def create_payload_index(**kwargs):
+        calls.append(kwargs['field_name'])
+        return original(**kwargs)
+
+    client.create_payload_index = create_payload_index  # type: ignore
+    service = VectorService(ai_service=None, qdrant_client=client, vector_size=4)  # type: ignore
+
+    asyncio.run(service.ensure_collection('docs'))
+    asyncio.run(service.ensure_collection('docs'))
+
+    assert client.collection_exists('docs')
+    assert sorted(calls) == sorted(payload_index_schema())
@@ -0,0 +1,163 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+from fastapi import HTTPException
+
+from src.domain.chat import QueryRequest
+from src.domain.exceptions import CircuitOpenError, ProviderUnavailableError
+from src.domain.llm import CompletionResponse
+from src.services.hedging import CircuitBreaker, HedgedAIService
+from src.services.query import QueryService
+from src.services.routing import CollectionRouter
+from src.services.vector import VectorService
+
+
+class Script:
+    def __init__(self, name: str, delay: float = 0.0, failures: int = 0) -> None:
+        self.name = name
+        self.delay = delay
+        self.failures = failures
+        self.cancelled = 0
+
+    async def __call__(self, messages: List[Dict[str, str]], **options) -> str:
+        if self.failures:
+            self.failures -= 1
+            raise ProviderUnavailableError(f'{self.name} failed')
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return 'answer'
+
+
+def scripted(service, name: str):
+    service.script = Script(name)
+    service.complete = service.script
+    service.embedding_model = service.completion_model = name
+    return service
+
+
+@pytest.fixture
+def primary(fake_ai):
+    return scripted(fake_ai, 'primary')
+
+
+@pytest.fixture
+def secondary(hash_ai):
+    return scripted(hash_ai, 'secondary')
+
+
+MESSAGES = [{'role': 'user', 'content': 'hi'}]
+
+
+def test_slow_primary_is_hedged_once_latency_exceeds_percentile(primary, secondary):
+    service = HedgedAIService([primary, secondary], min_hedge_delay=0.01)
+
+    async def scenario() -> CompletionResponse:
+        for _ in range(20):
+            await service.create_completion(MESSAGES)
+        primary.script.delay = 1.0
+        return await service.create_completion(MESSAGES)
+
+    response = asyncio.run(scenario())
+
+    assert response.model == 'secondary'
+    assert primary.script.cancelled == 1
+    assert service.stats()['hedging'] == {'hedges_fired': 1, 'hedges_won': 1, 'fallbacks': 0, 'retries': 0}
+
+
+def test_failed_primary_falls_back_to_secondary(primary, secondary):
+    primary.script.failures = 1
+    service = HedgedAIService([primary, secondary])
+
+    response = asyncio.run(service.create_completion(MESSAGES))
+
+    assert response.model == 'secondary'
+    assert service.fallbacks == 1
+    assert service.hedges_fired == 0
+
+
+def test_failed_round_is_retried_with_backoff(primary):
+    primary.script.failures = 1
+    service = HedgedAIService([primary], max_retries=1, backoff=0.001)
+
+    response = asyncio.run(service.create_completion(MESSAGES))
+
+    assert response.model == 'primary'
+    assert service.retries == 1
+
+
+def test_non_transient_errors_are_not_retried(primary):
+    def reject(messages, **options):
+        raise ValueError('invalid request')
+
+    primary.complete = reject
+    service = HedgedAIService([primary], max_retries=2, backoff=0.001)
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.create_completion(MESSAGES))
+    assert primary.completion_calls == 1
+    assert service.retries == 0
+
+
+def test_open_circuit_routes_around_failing_provider(primary, secondary):
+    primary.script.failures = 2
+    service = HedgedAIService([primary, secondary], max_retries=0, failure_threshold=2)
+
+    async def scenario() -> None:
+        for _ in range(3):
+            await service.create_completion(MESSAGES)
+
+    asyncio.run(scenario())
+
+    assert primary.completion_calls == 2
+    assert secondary.completion_calls == 3
+    assert service.stats()['providers']['0:primary']['circuit'] == 'open'
+
+
+def test_every_open_circuit_fails_fast(primary):
+    primary.script.failures = 5
+    service = HedgedAIService([primary], max_retries=0, failure_threshold=1)
+
+    async def scenario() -> None:
+        with pytest.raises(ProviderUnavailableError):
+            await service.create_completion(MESSAGES)
+        with pytest.raises(CircuitOpenError):
+            await service.create_completion(MESSAGES)
+
+    asyncio.run(scenario())
+
+
+def test_circuit_half_opens_after_reset_timeout():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_embeddings_only_use_primary(primary, secondary):
+    service = HedgedAIService([primary, secondary])
+
+    asyncio.run(service.create_embeddings(['a', 'b']))
+
+    assert primary.embedding_calls == 2
+    assert secondary.embedding_calls == 0
+
+
+def test_open_circuit_on_search_is_a_503(primary, store):
+    service = HedgedAIService([primary], max_retries=0, failure_threshold=1)
+    service.providers[0].breaker.record_failure()
+    query_service = QueryService(VectorService(service, store), collections=CollectionRouter('docs'))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(query_service.process_query(QueryRequest(query='query', rerank=False)))
+    assert error.value.status_code == 503
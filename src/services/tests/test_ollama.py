@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.domain.exceptions import ProviderUnavailableError
+from src.services.ollama import OllamaService
+
+
+def create_service(ollama_server, **kwargs) -> OllamaService:
+    return OllamaService(base_url='http://ollama.test', transport=ollama_server.transport, **kwargs)
+
+
+def test_create_embeddings_sends_one_batched_request(ollama_server):
+    service = create_service(ollama_server, keep_alive='1h')
+
+    embeddings = asyncio.run(service.create_embeddings(['a', 'bb', 'ccc']))
+
+    assert [e.embedding[0] for e in embeddings] == [1.0, 2.0, 3.0]
+    assert len(ollama_server.requests) == 1
+    request = ollama_server.requests[0]
+    assert request['path'] == '/api/embed'
+    assert request['body']['input'] == ['a', 'bb', 'ccc']
+    assert request['body']['keep_alive'] == '1h'
+
+
+def test_create_embedding_uses_batch_endpoint(ollama_server):
+    service = create_service(ollama_server)
+
+    embedding = asyncio.run(service.create_embedding('abcd'))
+
+    assert embedding.embedding == [4.0] * 4
+    assert ollama_server.requests[0]['path'] == '/api/embed'
+
+
+def test_create_completion_reads_streamed_chat(ollama_server):
+    service = create_service(ollama_server, completion_model='mistral')
+    messages = [{'role': 'system', 'content': 'Be brief'}, {'role': 'user', 'content': 'Hi'}]
+
+    completion = asyncio.run(service.create_completion(messages, temperature=0.2, max_tokens=16))
+
+    assert completion.content.strip() == 'Hello from the stub'
+    assert completion.usage == {'prompt_tokens': 12, 'completion_tokens': 4, 'total_tokens': 16}
+    body = ollama_server.requests[0]['body']
+    assert ollama_server.requests[0]['path'] == '/api/chat'
+    assert body['messages'] == messages
+    assert body['stream'] is True
+    assert body['options'] == {'temperature': 0.2, 'num_predict': 16}
+
+
+def test_warmup_loads_both_models(ollama_server):
+    service = create_service(ollama_server, embedding_model='nomic-embed-text', completion_model='llama3')
+
+    asyncio.run(service.warmup())
+
+    assert sorted(request['path'] for request in ollama_server.requests) == ['/api/chat', '/api/embed']
+    assert all(request['body']['keep_alive'] == '30m' for request in ollama_server.requests)
+
+
+def test_server_errors_and_unreachable_server_are_unavailable():
+    def failing(request: httpx.Request) -> httpx.Response:
+        if request.url.path == '/api/embed':
+            return httpx.Response(500, json={'error': 'model crashed'})
+        raise httpx.ConnectError('connection refused', request=request)
+
+    service = OllamaService(base_url='http://ollama.test', transport=httpx.MockTransport(failing))
+
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(service.create_embeddings(['a']))
+    with pytest.raises(ProviderUnavailableError):
+        asyncio.run(service.create_completion([{'role': 'user', 'content': 'hi'}]))
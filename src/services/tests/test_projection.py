@@ -0,0 +1,109 @@
+import asyncio
+from typing import Callable, List
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.domain.exceptions import SearchException
+from src.services.projection import EmbeddingProjection, ProjectedAIService
+from src.services.snapshot import SnapshotService
+from src.services.vector import VectorService
+
+
+def raw_embedding(dimensions: int) -> Callable[[str], List[float]]:
+    return lambda text: [float(len(text) % (index + 2)) + 1.0 for index in range(dimensions)]
+
+
+@pytest.fixture
+def raw_ai(fake_ai):
+    fake_ai.embed = raw_embedding(8)
+    fake_ai.embedding_model = 'raw'
+    return fake_ai
+
+
+def low_rank_sample(rows: int = 200, dimensions: int = 16, rank: int = 3) -> np.ndarray:
+    generator = np.random.default_rng(7)
+    return generator.normal(size=(rows, rank)) @ generator.normal(size=(rank, dimensions))
+
+
+def test_pca_projection_keeps_low_rank_structure():
+    sample = low_rank_sample()
+    projection = EmbeddingProjection.fit(sample, dimensions=3)
+
+    projected = projection.apply(sample)
+
+    assert projected.shape == (200, 3)
+    assert np.allclose(np.linalg.norm(projected, axis=1), 1.0)
+    centered = sample - sample.mean(axis=0)
+    original = centered / np.linalg.norm(centered, axis=1, keepdims=True)
+    assert np.allclose(original @ original.T, projected @ projected.T, atol=1e-4)
+
+
+def test_pca_needs_enough_samples():
+    with pytest.raises(ValueError):
+        EmbeddingProjection.fit(low_rank_sample(rows=2), dimensions=3)
+
+
+@pytest.mark.parametrize('method', ['pca', 'truncate'])
+def test_projection_save_and_load(tmp_path, method):
+    sample = low_rank_sample()
+    projection = EmbeddingProjection.fit(sample, dimensions=4, method=method)
+    projection.save(tmp_path / 'projection.npz')
+
+    loaded = EmbeddingProjection.load(tmp_path / 'projection.npz')
+
+    assert loaded.name == f'{method}4'
+    assert np.allclose(loaded.apply(sample[:5]), projection.apply(sample[:5]))
+
+
+def test_projected_service_reduces_embeddings(raw_ai):
+    service = ProjectedAIService(raw_ai, EmbeddingProjection(4, 'truncate'))
+
+    embeddings = asyncio.run(service.create_embeddings(['a', 'bb']))
+
+    assert service.embedding_size() == 4
+    assert service.embedding_model == 'raw+truncate4'
+    assert all(len(response.embedding) == 4 for response in embeddings)
+    assert embeddings[0].model == 'raw+truncate4'
+
+
+def test_ensure_collection_follows_embedding_size(raw_ai):
+    client = QdrantClient(':memory:')
+    service = VectorService(ProjectedAIService(raw_ai, EmbeddingProjection(4, 'truncate')), client)
+
+    asyncio.run(service.ensure_collection('docs'))
+
+    assert client.get_collection('docs').config.params.vectors.size == 4
+
+
+def test_ensure_collection_probes_unknown_size_and_rejects_mismatch(raw_ai):
+    ai_service = raw_ai
+    ai_service.embed = raw_embedding(6)
+    client = QdrantClient(':memory:')
+    client.create_collection('docs', vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE))
+    service = VectorService(ai_service, client)
+
+    with pytest.raises(SearchException):
+        asyncio.run(service.ensure_collection('docs'))
+    assert service.vector_size == 6
+    assert ai_service.embedding_calls == 1
+
+
+def test_snapshot_load_applies_projection(tmp_path):
+    source = QdrantClient(':memory:')
+    source.create_collection('docs', vectors_config=models.VectorParams(size=16, distance=models.Distance.COSINE))
+    sample = low_rank_sample(rows=20)
+    source.upsert('docs', points=models.Batch(ids=list(range(20)), vectors=sample.tolist(), payloads=[{}] * 20))
+    SnapshotService(source).export('docs', tmp_path / 'docs.snap', embedding_model='raw')
+
+    vectors = SnapshotService.read_vectors(tmp_path / 'docs.snap', limit=10)
+    projection = EmbeddingProjection.fit(vectors, dimensions=3)
+    target = QdrantClient(':memory:')
+    info = SnapshotService(target).load(tmp_path / 'docs.snap', projection=projection)
+
+    assert vectors.shape == (10, 16)
+    assert info.dimensions == 3
+    assert info.embedding_model == 'raw+pca3'
+    assert target.get_collection('docs').config.params.vectors.size == 3
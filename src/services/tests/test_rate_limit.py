@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from typing import Callable, List
+
+import pytest
+
+from src.domain.exceptions import ProviderRateLimitError
+from src.services.rate_limit import (
+    AdaptiveConcurrency,
+    Priority,
+    RateLimitedAIService,
+    RateLimiter,
+    TokenBucket,
+    request_priority,
+)
+
+
+def fail_first(failures: int) -> Callable[[str], List[float]]:
+    calls = [0]
+
+    def embed(text: str) -> List[float]:
+        calls[0] += 1
+        if calls[0] <= failures:
+            raise ProviderRateLimitError(retry_after=0.01)
+        return [0.1]
+
+    return embed
+
+
+def test_token_bucket_refills_over_time():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    assert bucket.wait_time(1000) == pytest.approx(60.0)
+
+    now[0] = 30.0
+    assert bucket.wait_time(30) == 0.0
+
+
+def test_disabled_bucket_never_waits():
+    bucket = TokenBucket(0)
+    bucket.consume(10_000)
+    assert bucket.wait_time(10_000) == 0.0
+
+
+def test_adaptive_concurrency_is_aimd():
+    concurrency = AdaptiveConcurrency(initial=4, minimum=1, maximum=8)
+
+    concurrency.on_success('completion', 1.0)
+    assert concurrency.limit == pytest.approx(4.25)
+
+    concurrency.on_success('completion', 10.0)
+    assert concurrency.slots == 2
+
+    concurrency.on_overload()
+    concurrency.on_overload()
+    assert concurrency.slots == 1
+
+
+def test_interactive_requests_are_served_before_bulk():
+    async def scenario() -> List[str]:
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrency=1)
+        order: List[str] = []
+        await limiter.acquire(1)
+
+        async def request(name: str, priority: Priority) -> None:
+            await limiter.acquire(1, priority)
+            order.append(name)
+            limiter.release()
+
+        tasks = [
+            asyncio.create_task(request('bulk', Priority.BULK)),
+            asyncio.create_task(request('interactive', Priority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert limiter.snapshot()['queued'] == {'interactive': 1, 'bulk': 1}
+
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ['interactive', 'bulk']
+
+
+def test_rate_limited_calls_are_retried_and_reduce_concurrency(fake_ai, word_counter):
+    fake_ai.embed = fail_first(2)
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrency=8)
+    service = RateLimitedAIService(fake_ai, limiter, token_counter=word_counter, max_retries=3)
+
+    response = asyncio.run(service.create_embedding('hello world'))
+
+    assert response.embedding == [0.1]
+    assert fake_ai.embedding_calls == 3
+    stats = service.stats()['rate_limit']
+    assert stats['throttled_total'] == 2
+    assert stats['concurrency_limit'] < 8
+    assert stats['in_flight'] == 0
+
+
+def test_rate_limit_error_is_raised_after_retries(fake_ai, word_counter):
+    fake_ai.embed = fail_first(5)
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_concurrency=2)
+    service = RateLimitedAIService(fake_ai, limiter, token_counter=word_counter, max_retries=1)
+
+    with pytest.raises(ProviderRateLimitError):
+        with request_priority(Priority.BULK):
+            asyncio.run(service.create_embedding('hello'))
+    assert fake_ai.embedding_calls == 2
+    assert limiter.in_flight == 0
+
+
+def test_tokens_are_counted_off_the_event_loop(fake_ai, word_counter):
+    threads = []
+
+    def count_tokens_batch(texts):
+        threads.append(threading.get_ident())
+        return [len(text.split()) for text in texts]
+
+    word_counter.count_tokens_batch = count_tokens_batch
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=1000, max_concurrency=2)
+    service = RateLimitedAIService(fake_ai, limiter, token_counter=word_counter)
+
+    asyncio.run(service.create_embeddings(['one two', 'three']))
+
+    assert threads and threading.get_ident() not in threads
+    assert limiter.snapshot()['tokens_available'] < 1000
@@ -0,0 +1,118 @@
+import asyncio
+import math
+from functools import partialmethod
+from typing import Dict, List
+
+import pytest
+
+from src.domain.llm import CompletionResponse
+from src.services.ollama import OllamaService
+from src.services.rerank import RelevanceScorer, RerankPolicy
+from src.settings import Settings
+from src.splitters.text_splitter import TiktokenCounter
+from src.utils.utils import create_ai_service, create_stage_ai_service
+
+
+def test_always_mode_reranks_every_candidate():
+    decision = RerankPolicy('always').decide([0.9, 0.9, 0.9, 0.9], limit=2)
+
+    assert decision.reranked
+    assert decision.candidates == 4
+    assert decision.reason == 'always'
+
+
+def test_adaptive_skips_when_top_k_is_clearly_separated():
+    decision = RerankPolicy('adaptive').decide([0.95, 0.80, 0.72, 0.70], limit=1)
+
+    assert not decision.reranked
+    assert decision.reason == 'clear_margin'
+    assert decision.margin == 0.15
+
+
+def test_adaptive_reranks_flat_scores_and_cuts_at_largest_gap():
+    decision = RerankPolicy('adaptive').decide([0.810, 0.805, 0.800, 0.798, 0.740, 0.735], limit=2)
+
+    assert decision.reranked
+    assert decision.reason == 'ambiguous'
+    assert decision.candidates == 4
+    assert decision.gap == 0.058
+
+
+def test_adaptive_skips_single_candidate():
+    decision = RerankPolicy('adaptive').decide([0.9], limit=3)
+
+    assert not decision.reranked
+    assert decision.reason == 'single_candidate'
+
+
+def test_entropy_is_normalized():
+    policy = RerankPolicy('adaptive')
+
+    assert policy.entropy([0.5, 0.5, 0.5]) == pytest.approx(1.0)
+    assert policy.entropy([0.9, 0.1, 0.1]) < 0.01
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        RerankPolicy('sometimes')
+
+
+def test_expected_digit_from_logprobs():
+    score = RelevanceScorer.expected_digit({'9': math.log(0.5), ' 0': math.log(0.25), 'yes': math.log(0.25)})
+
+    assert score == pytest.approx(0.5 * 9 / 0.75 / 9)
+
+
+def test_parse_text_tolerates_free_form_answers():
+    assert RelevanceScorer.parse_text('0.8') == 0.8
+    assert RelevanceScorer.parse_text('7') == pytest.approx(7 / 9)
+    assert RelevanceScorer.parse_text('1') == pytest.approx(1 / 9)
+    assert RelevanceScorer.parse_text('10') == 1.0
+    assert RelevanceScorer.parse_text('No') == 0.0
+    assert RelevanceScorer.parse_text('not sure') is None
+    assert RelevanceScorer.parse_text('nothing relevant') is None
+    assert RelevanceScorer.parse_text('Yes, it is relevant') == 1.0
+    assert RelevanceScorer.parse_text('Relevance: 9/9') == 1.0
+    assert RelevanceScorer.parse_text('I cannot tell') is None
+    assert RelevanceScorer.parse_text('') is None
+
+
+def fail(messages: List[Dict[str, str]], **options) -> CompletionResponse:
+    raise RuntimeError('provider down')
+
+
+def test_scorer_requests_one_token_with_logprobs(fake_ai):
+    response = CompletionResponse(content='8', model='fake', top_logprobs={'8': 0.0})
+    fake_ai.complete = lambda messages, **options: response
+
+    score = asyncio.run(RelevanceScorer(fake_ai).score('query', 'text'))
+
+    assert score == pytest.approx(8 / 9)
+    assert [(call['max_tokens'], call['top_logprobs']) for call in fake_ai.completions] == [(1, 10)]
+
+
+def test_scorer_never_raises(fake_ai):
+    fake_ai.complete = fail
+
+    assert asyncio.run(RelevanceScorer(fake_ai, mode='text').score('query', 'text')) is None
+    assert [(call['max_tokens'], call['top_logprobs']) for call in fake_ai.completions] == [(1, None)]
+
+
+def test_rerank_model_routes_scorer_calls_and_shares_the_provider_limit(ollama_server, monkeypatch):
+    stubbed_init = partialmethod(OllamaService.__init__, transport=ollama_server.transport)
+    monkeypatch.setattr(OllamaService, '__init__', stubbed_init)
+    monkeypatch.setattr(TiktokenCounter, 'count_tokens', lambda self, text: len(text.split()))
+    settings = Settings(AI_PROVIDER='ollama', RERANK_MODEL='small-judge', AI_FALLBACK_PROVIDERS='')
+    limiters: dict = {}
+    ai_service = create_ai_service('ollama', settings, limiters)
+    ollama_server.reply = '7'
+
+    rerank_ai = create_stage_ai_service(
+        settings, settings.RERANK_PROVIDER, settings.RERANK_MODEL, ai_service, limiters
+    )
+    score = asyncio.run(RelevanceScorer(rerank_ai, mode='text').score('query', 'text'))
+
+    assert score == pytest.approx(7 / 9)
+    assert ollama_server.requests[-1]['body']['model'] == 'small-judge'
+    assert list(limiters) == ['ollama']
+    assert 'completion' in ai_service.stats()['rate_limit']['latency_ms']
@@ -0,0 +1,66 @@
+import asyncio
+from typing import List
+
+import pytest
+from fastapi import HTTPException
+from qdrant_client import QdrantClient
+
+from src.services.base.ai_service import AIService
+from src.services.routing import CollectionRouter, ShardRouter
+from src.services.snapshot import SnapshotService
+from src.services.vector import VectorService
+
+
+def create_service(ai_service: AIService, points: List[dict], shards: int) -> VectorService:
+    router = ShardRouter([QdrantClient(':memory:') for _ in range(shards)])
+    service = VectorService(ai_service, router, vector_size=4)
+    asyncio.run(service.add_points('docs', points))
+    return service
+
+
+def test_points_are_sharded_by_filename(hash_ai, points):
+    service = create_service(hash_ai, points, 2)
+
+    counts = [client.count('docs').count for client in service.router.clients]
+    assert counts == [12, 12]
+    for shard, client in enumerate(service.router.clients):
+        points, _ = client.scroll('docs', limit=100)
+        assert {service.router.shard_for(point.payload['filename']) for point in points} == {shard}  # type: ignore
+
+
+def test_scatter_gather_matches_single_store(hash_ai, points):
+    single = create_service(hash_ai, points, 1)
+    sharded = create_service(hash_ai, points, 3)
+
+    async def search(service: VectorService) -> list:
+        return await service.perform_search('docs', 'file 2 chunk 1', limit=5, rerank=False, neighbors=1)
+
+    expected = asyncio.run(search(single))
+    results = asyncio.run(search(sharded))
+
+    assert [(hit.id, hit.score) for hit in results] == [(hit.id, hit.score) for hit in expected]
+    assert [hit.neighbors for hit in results] == [hit.neighbors for hit in expected]
+
+
+def test_snapshot_moves_between_sharded_and_single_store(hash_ai, points, tmp_path):
+    sharded = create_service(hash_ai, points, 2)
+    path = tmp_path / 'docs.snap'
+
+    info = SnapshotService(sharded.router).export('docs', path)
+    target = ShardRouter([QdrantClient(':memory:') for _ in range(3)])
+    SnapshotService(target).load(path)
+
+    assert info.count == 24
+    assert sum(client.count('docs').count for client in target.clients) == 24
+
+
+def test_collection_router_resolves_configured_names_only():
+    collections = CollectionRouter('ai_course_docs', ['course_b'])
+
+    assert collections.resolve(None) == 'ai_course_docs'
+    assert collections.resolve('course_b') == 'course_b'
+    with pytest.raises(HTTPException) as error:
+        collections.resolve('other')
+    assert error.value.status_code == 404
+    with pytest.raises(ValueError):
+        CollectionRouter('bad name')
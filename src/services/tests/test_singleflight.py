@@ -0,0 +1,85 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from src.services.singleflight import CoalescingAIService, SingleFlight
+
+
+async def slow_embedding(text: str) -> List[float]:
+    await asyncio.sleep(0.01)
+    return [float(len(text))]
+
+
+async def slow_completion(messages: List[Dict[str, str]], temperature: float, **options) -> str:
+    await asyncio.sleep(0.01)
+    return f'{temperature}'
+
+
+@pytest.fixture
+def provider(fake_ai):
+    fake_ai.embed = slow_embedding
+    fake_ai.complete = slow_completion
+    fake_ai.embedding_model = 'embed'
+    fake_ai.completion_model = 'chat'
+    return fake_ai
+
+
+def test_identical_in_flight_embeddings_share_one_call(provider):
+    service = CoalescingAIService(provider)
+
+    async def burst() -> list:
+        return await asyncio.gather(*[service.create_embedding('same question') for _ in range(5)])
+
+    results = asyncio.run(burst())
+
+    assert provider.embedded == ['same question']
+    assert all(result.embedding == [13.0] for result in results)
+    assert service.stats()['singleflight'] == {'started': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_completions_are_keyed_by_full_payload(provider):
+    service = CoalescingAIService(provider)
+    messages = [{'role': 'user', 'content': 'hi'}]
+
+    async def burst() -> list:
+        return await asyncio.gather(
+            service.create_completion(messages, temperature=0.0),
+            service.create_completion(messages, temperature=0.0),
+            service.create_completion(messages, temperature=0.5),
+        )
+
+    results = asyncio.run(burst())
+
+    assert provider.completion_calls == 2
+    assert [result.content for result in results] == ['0.0', '0.0', '0.5']
+
+
+def test_finished_calls_are_not_cached(provider):
+    service = CoalescingAIService(provider)
+
+    asyncio.run(service.create_embedding('q'))
+    asyncio.run(service.create_embedding('q'))
+
+    assert provider.embedded == ['q', 'q']
+
+
+def test_errors_are_shared_and_cancelled_waiters_do_not_cancel_the_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def failing() -> None:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def scenario() -> None:
+        first = asyncio.create_task(flight.do('key', failing))
+        second = asyncio.create_task(flight.do('key', failing))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(ValueError):
+            await second
+
+    asyncio.run(scenario())
+    assert calls == [1]
@@ -0,0 +1,58 @@
+import msgpack
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.services.snapshot import SnapshotError, SnapshotService
+
+
+def create_store(count: int) -> QdrantClient:
+    client = QdrantClient(':memory:')
+    client.create_collection(
+        collection_name='docs',
+        vectors_config=models.VectorParams(size=3, distance=models.Distance.COSINE)
+    )
+    client.upsert(collection_name='docs', points=[
+        models.PointStruct(
+            id=index,
+            vector=[1.0, index / count, 0.5],
+            payload={'filename': 'a.md', 'chunk_index': index, 'headers': {'h1': ['Intro']}, 'text': f'chunk {index}'},
+        )
+        for index in range(count)
+    ])
+    return client
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / 'docs.snapshot'
+    source = create_store(10)
+    exported = SnapshotService(source, batch_size=3).export('docs', path, embedding_model='fake-embed')
+
+    target = QdrantClient(':memory:')
+    loaded = SnapshotService(target).load(path, collection_name='restored', parallel=2)
+
+    assert exported.count == loaded.count == 10
+    assert loaded.dimensions == 3
+    assert loaded.embedding_model == 'fake-embed'
+    assert target.count('restored').count == 10
+
+    point = target.retrieve('restored', ids=[4], with_vectors=True)[0]
+    original = source.retrieve('docs', ids=[4], with_vectors=True)[0]
+    assert point.payload == original.payload
+    assert point.vector == pytest.approx(original.vector, rel=1e-6)
+
+
+def test_snapshot_rejects_mismatched_embedding_model(tmp_path):
+    path = tmp_path / 'docs.snapshot'
+    SnapshotService(create_store(2)).export('docs', path, embedding_model='model-a')
+
+    with pytest.raises(SnapshotError):
+        SnapshotService(QdrantClient(':memory:')).load(path, embedding_model='model-b')
+
+
+def test_snapshot_rejects_foreign_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(msgpack.packb({'hello': 'world'}))
+
+    with pytest.raises(SnapshotError):
+        SnapshotService(QdrantClient(':memory:')).read_info(path)
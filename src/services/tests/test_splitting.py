@@ -0,0 +1,105 @@
+import asyncio
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import List, Optional
+
+import pytest
+
+from src.domain.document import Document
+from src.domain.exceptions import IngestBusyError
+from src.services import splitting
+from src.services.splitting import SplitterPool, clean_markdown_links
+from src.splitters.text_splitter import MarkdownChunkStrategy, TextSplitter, TokenCounter
+
+
+def test_clean_markdown_links():
+    assert clean_markdown_links('See [docs](https://a.dev) now') == 'See docs (https://a.dev) now'
+
+
+def test_split_rejects_when_queue_is_full(monkeypatch):
+    release = threading.Event()
+
+    def blocking_split(text, limit, splitter=None):
+        release.wait(5)
+        return [text]
+
+    monkeypatch.setattr(splitting, 'split_document', blocking_split)
+    pool = SplitterPool(workers=0, max_pending=1)
+
+    async def scenario():
+        task = asyncio.create_task(pool.split('doc', 100))
+        await asyncio.sleep(0.05)
+        assert pool.pending == 1
+
+        with pytest.raises(IngestBusyError):
+            await pool.split('other', 100)
+
+        release.set()
+        return await task
+
+    assert asyncio.run(scenario()) == ['doc']
+    assert pool.stats()['rejected_total'] == 1
+    assert pool.pending == 0
+
+
+class CrashingSplitter(TextSplitter):
+    def split(self, text: str, limit: int) -> List[Document]:
+        if text == 'crash':
+            os._exit(1)
+        return super().split(text, limit)
+
+
+def create_word_splitter(token_counter: TokenCounter, num_threads: Optional[int] = None) -> TextSplitter:
+    return CrashingSplitter(token_counter=token_counter, chunk_strategy=MarkdownChunkStrategy())
+
+
+def test_split_runs_in_worker_process(word_counter):
+    pool = SplitterPool(workers=1, splitter_factory=partial(create_word_splitter, word_counter))
+
+    async def scenario():
+        await pool.warmup()
+        return await pool.split('# Title\nSome text in a worker process', 100)
+
+    try:
+        chunks = asyncio.run(scenario())
+    finally:
+        pool.close()
+
+    assert [chunk.text for chunk in chunks] == ['# Title\nSome text in a worker process']
+
+
+def test_broken_worker_pool_is_recreated(word_counter):
+    pool = SplitterPool(workers=1, splitter_factory=partial(create_word_splitter, word_counter))
+
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await pool.split('crash', 100)
+        return await pool.split('still works', 100)
+
+    try:
+        chunks = asyncio.run(scenario())
+    finally:
+        pool.close()
+
+    assert [chunk.text for chunk in chunks] == ['still works']
+
+
+def test_in_process_pool_reuses_one_splitter(word_counter):
+    created = []
+
+    def factory(num_threads: Optional[int] = None) -> TextSplitter:
+        created.append(create_word_splitter(word_counter, num_threads))
+        return created[-1]
+
+    pool = SplitterPool(workers=0, splitter_factory=factory)
+
+    async def scenario():
+        await pool.split('first document', 100)
+        await pool.split('second document', 100)
+
+    asyncio.run(scenario())
+
+    assert len(created) == 1
+    assert pool.splitter is created[0]
@@ -0,0 +1,114 @@
+import asyncio
+import json
+from typing import Dict, List
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.domain.search import SearchHit
+from src.services.rerank import RerankPolicy
+from src.services.vector import SearchTrace, VectorService
+
+
+def add_chunks(client: QdrantClient, chunks_per_file: Dict[str, int], tokens: int = 10) -> QdrantClient:
+    chunks = [(filename, index) for filename, count in chunks_per_file.items() for index in range(count)]
+    client.upsert(collection_name='docs', points=[
+        models.PointStruct(
+            id=position,
+            vector=[1.0, float(index), float(position), 1.0],
+            payload={
+                'filename': filename,
+                'chunk_index': index,
+                'tokens': tokens,
+                'text': f'{filename}#{index}',
+                'images': [],
+            },
+        )
+        for position, (filename, index) in enumerate(chunks)
+    ])
+    return client
+
+
+def hit(filename: str, chunk_index: int, tokens: int = 10) -> SearchHit:
+    return SearchHit(
+        id=chunk_index,
+        score=0.9,
+        payload={'filename': filename, 'chunk_index': chunk_index, 'tokens': tokens, 'text': 'hit'},
+    )
+
+
+def neighbor_indexes(result: SearchHit) -> List[int]:
+    return [neighbor['chunk_index'] for neighbor in result.neighbors]
+
+
+def test_expand_neighbors_adds_surrounding_chunks_from_same_file(fake_ai, store):
+    service = VectorService(fake_ai, add_chunks(store, {'a.md': 6, 'b.md': 6}))
+    results = [hit('a.md', 2), hit('b.md', 0)]
+
+    service.expand_neighbors('docs', results, window=1)
+
+    assert neighbor_indexes(results[0]) == [1, 3]
+    assert neighbor_indexes(results[1]) == [1]
+    assert all(n['filename'] == 'a.md' for n in results[0].neighbors)
+
+
+def test_expand_neighbors_skips_chunks_that_are_already_hits(fake_ai, store):
+    service = VectorService(fake_ai, add_chunks(store, {'a.md': 6}))
+    results = [hit('a.md', 2), hit('a.md', 3)]
+
+    service.expand_neighbors('docs', results, window=1)
+
+    assert neighbor_indexes(results[0]) == [1]
+    assert neighbor_indexes(results[1]) == [4]
+
+
+def test_expand_neighbors_respects_token_budget_closest_first(fake_ai, store):
+    service = VectorService(fake_ai, add_chunks(store, {'a.md': 10}))
+    results = [hit('a.md', 5)]
+
+    service.expand_neighbors('docs', results, window=3, max_tokens=40)
+
+    assert neighbor_indexes(results[0]) == [3, 4, 6]
+
+
+def test_perform_search_returns_hits_with_neighbors_without_rerank(fake_ai, store):
+    service = VectorService(fake_ai, add_chunks(store, {'a.md': 3}))
+
+    results = asyncio.run(service.perform_search('docs', 'query', limit=1, rerank=False, neighbors=1))
+
+    assert len(results) == 1
+    assert isinstance(results[0], SearchHit)
+    assert results[0].neighbors
+    assert 'images' not in results[0].payload
+    assert all('images' not in neighbor for neighbor in results[0].neighbors)
+    assert fake_ai.completion_calls == 0
+
+
+def test_perform_search_records_adaptive_rerank_decision(fake_ai, store):
+    service = VectorService(fake_ai, add_chunks(store, {'a.md': 3}), RerankPolicy('adaptive'))
+    trace = SearchTrace()
+
+    results = asyncio.run(service.perform_search('docs', 'query', limit=1, rerank=True, trace=trace))
+
+    assert trace.rerank_decision is not None
+    assert trace.rerank_decision.reason == 'clear_margin'
+    assert fake_ai.completion_calls == 0
+    assert len(results) == 1
+
+
+def test_add_points_dumps_points_only_when_configured(tmp_path, fake_ai, store):
+    point = {
+        'text': 'chunk',
+        'payload': {'filename': 'a.md', 'chunk_index': 0, 'headers': {}, 'urls': [], 'images': [], 'tokens': 1},
+    }
+    dump_path = tmp_path / 'points' / 'points.json'
+
+    asyncio.run(VectorService(fake_ai, add_chunks(store, {}), vector_size=4).add_points('docs', [point]))
+    assert not dump_path.exists()
+
+    service = VectorService(fake_ai, add_chunks(store, {}), vector_size=4, points_dump_path=dump_path)
+    asyncio.run(service.add_points('docs', [point]))
+
+    dumped = json.loads(dump_path.read_text())
+    assert dumped[0]['vector'] == [1.0, 0.0, 0.0, 0.0]
+    assert dumped[0]['payload']['text'] == 'chunk'
@@ -1,30 +1,91 @@
-import json
+import asyncio
+import heapq
+import itertools
 import uuid
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Union, cast
 
+import orjson
 from qdrant_client import QdrantClient
-from qdrant_client.grpc import ScoredPoint
 from qdrant_client.http import models
 
+from src.domain.exceptions import SearchException
+from src.domain.filter import SearchFilter
+from src.domain.response import RerankDecision
+from src.domain.search import SearchHit
 from src.services.base.ai_service import AIService
+from src.services.deadline import Deadline
+from src.services.diversity import diversify
+from src.services.filter import build_qdrant_filter, ensure_payload_indexes
+from src.services.rerank import RelevanceScorer, RerankPolicy
+from src.services.routing import ShardRouter
+
+EMBEDDING_BATCH_SIZE = 64
+SEARCH_OVERSAMPLING = 2
+SEARCH_PAYLOAD_FIELDS = ['text', 'filename', 'sources', 'chunk_index', 'headers', 'urls', 'tokens']
+
+
+@dataclass
+class SearchTrace:
+    rerank_decision: Optional[RerankDecision] = None
+    mmr_dropped: int = 0
+    rerank_scored: int = 0
+    rerank_failed: int = 0
 
 
 class VectorService:
-    def __init__(self, ai_service: AIService, qdrant_client: QdrantClient):
-        self.client = qdrant_client
+    def __init__(
+        self,
+        ai_service: AIService,
+        qdrant_client: Union[QdrantClient, ShardRouter],
+        rerank_policy: Optional[RerankPolicy] = None,
+        relevance_scorer: Optional[RelevanceScorer] = None,
+        vector_size: Optional[int] = None,
+        points_dump_path: Optional[Union[str, Path]] = None,
+        mmr_lambda: Optional[float] = None,
+        oversampling: int = SEARCH_OVERSAMPLING
+    ):
+        self.router = qdrant_client if isinstance(qdrant_client, ShardRouter) else ShardRouter([qdrant_client])
+        self.client = self.router.clients[0]
         self.ai_service = ai_service
+        self.vector_size = vector_size
+        self.points_dump_path = Path(points_dump_path) if points_dump_path else None
+        self.mmr_lambda = mmr_lambda
+        self.oversampling = oversampling
+        self.rerank_policy = rerank_policy or RerankPolicy()
+        self.relevance_scorer = relevance_scorer or RelevanceScorer(ai_service)
+        self._ready_collections: Set[str] = set()
 
     async def ensure_collection(self, name: str) -> None:
-        collections = self.client.get_collections()
-        if not any(collection.name == name for collection in collections.collections):
-            self.client.create_collection(
-                collection_name=name,
-                vectors_config=models.VectorParams(
-                    size=1536,
-                    distance=models.Distance.COSINE
+        if name in self._ready_collections:
+            return
+
+        size = await self.get_vector_size()
+        for client in self.router.clients:
+            if not client.collection_exists(name):
+                client.create_collection(
+                    collection_name=name,
+                    vectors_config=models.VectorParams(
+                        size=size,
+                        distance=models.Distance.COSINE
+                    )
                 )
-            )
+            else:
+                params = client.get_collection(name).config.params.vectors
+                if isinstance(params, models.VectorParams) and params.size != size:
+                    raise SearchException(
+                        f'Collection {name} stores {params.size}-dim vectors, but embeddings have {size} dimensions'
+                    )
+            ensure_payload_indexes(client, name)
+        self._ready_collections.add(name)
+
+    async def get_vector_size(self) -> int:
+        if self.vector_size is None:
+            self.vector_size = self.ai_service.embedding_size()
+        if self.vector_size is None:
+            self.vector_size = len(await self.create_embedding('dimension probe'))
+        return self.vector_size
 
     async def initialize_collection_with_data(self, name: str, points: List[Dict[str, Any]]) -> None:
         await self.ensure_collection(name)
@@ -34,10 +95,20 @@ class VectorService:
         response = await self.ai_service.create_embedding(text)
         return response.embedding
 
+    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            responses = await self.ai_service.create_embeddings(texts[start:start + EMBEDDING_BATCH_SIZE])
+            embeddings.extend(response.embedding for response in responses)
+        return embeddings
+
     async def add_points(self, collection_name: str, points: List[Dict[str, Any]]) -> None:
+        await self.ensure_collection(collection_name)
+
+        embeddings = await self.create_embeddings([point['text'] for point in points])
+
         points_to_upsert = []
-        for point in points:
-            embedding = await self.create_embedding(point['text'])
+        for point, embedding in zip(points, embeddings):
             point_id = point.get('id', str(uuid.uuid4()))
 
             point_struct = models.PointStruct(
@@ -46,6 +117,7 @@ class VectorService:
                 payload={
                     'text': point['text'],
                     'filename': point['payload']['filename'],
+                    'sources': point['payload'].get('sources', [point['payload']['filename']]),
                     'chunk_index': point['payload']['chunk_index'],
                     'headers': point['payload']['headers'],
                     'urls': point['payload']['urls'],
@@ -55,62 +127,228 @@ class VectorService:
             )
             points_to_upsert.append(point_struct)
 
-        points_file = Path('storage/points')
-        points_file.mkdir(parents=True, exist_ok=True)
-        points_file = points_file / 'points.json'
+        if self.points_dump_path is not None:
+            self._dump_points(self.points_dump_path, points_to_upsert)
 
-        points_file.write_text(json.dumps(
-            [p.dict() for p in points_to_upsert],
-            indent=2,
-            default=str,
-        ))
+        shards = self.router.partition(
+            points_to_upsert,
+            lambda point: self.router.shard_for_point(point.id, point.payload)
+        )
+        for shard, shard_points in shards.items():
+            self.router.clients[shard].upsert(
+                collection_name=collection_name,
+                wait=True,
+                points=shard_points
+            )
 
-        self.client.upsert(
-            collection_name=collection_name,
-            wait=True,
-            points=points_to_upsert
+    async def add_sources(self, collection_name: str, filename: str, owners: Dict[str, str]) -> List[str]:
+        shards = self.router.partition(
+            owners.items(),
+            lambda owner: self.router.shard_for_point(owner[0], {'filename': owner[1]})
         )
+        missing = []
+        for shard, shard_owners in shards.items():
+            client = self.router.clients[shard]
+            points = client.retrieve(
+                collection_name=collection_name,
+                ids=[point_id for point_id, _ in shard_owners],
+                with_payload=['filename', 'sources']
+            )
+            payloads = {str(point.id): point.payload or {} for point in points}
+            for point_id, _ in shard_owners:
+                if point_id not in payloads:
+                    missing.append(point_id)
+                    continue
+                sources = payloads[point_id].get('sources') or [payloads[point_id].get('filename')]
+                if filename not in sources:
+                    client.set_payload(
+                        collection_name=collection_name,
+                        payload={'sources': [*sources, filename]},
+                        points=[point_id],
+                        wait=True
+                    )
+        return missing
+
+    def _dump_points(self, path: Path, points: List[models.PointStruct]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(orjson.dumps(
+            [{'id': point.id, 'vector': point.vector, 'payload': point.payload} for point in points],
+            option=orjson.OPT_INDENT_2,
+        ))
 
     async def perform_search(
             self,
             collection_name: str,
             query: str,
-            filter_: Optional[Dict[str, Any]] = None,
+            filter_: Optional[SearchFilter] = None,
             limit: int = 5,
-            rerank: bool = True
-    ) -> List[ScoredPoint]:
-        query_embedding = await self.create_embedding(query)
+            rerank: bool = True,
+            neighbors: int = 0,
+            max_context_tokens: Optional[int] = None,
+            deadline: Optional[Deadline] = None,
+            trace: Optional[SearchTrace] = None,
+            mmr_lambda: Optional[float] = None,
+            oversampling: Optional[int] = None
+    ) -> List[SearchHit]:
+        deadline = deadline or Deadline()
+        trace = trace or SearchTrace()
+        mmr_lambda = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+        diverse = mmr_lambda is not None and mmr_lambda < 1
+        oversampling = self.oversampling if oversampling is None else oversampling
+        query_embedding = await deadline.run(self.create_embedding(query))
 
-        search_results = self.client.search(
-            collection_name=collection_name,
-            query_vector=query_embedding,
-            limit=limit if not rerank else limit * 2,
-            query_filter=filter_,
-            with_payload=True
+        search_results = await self.search_hits(
+            collection_name,
+            query_embedding,
+            filter_,
+            limit=limit * max(1, oversampling) if rerank or diverse else limit,
+            with_vectors=diverse
         )
 
-        if not rerank:
-            return search_results
-
-        reranked_results = []
-        for result in search_results:
-            system_content = '''
-            You are a helpful assistant that determines if a given text is relevant to a query.
-            Respond with a number between 0 and 1, where 1 is highly relevant and 0 is not relevant at all.
-            '''
-            relevance_check = await self.ai_service.create_completion(
-                messages=[
-                    {'role': 'system', 'content': system_content},
-                    {'role': 'user', 'content': f'Query: {query}\nText: {result.payload['text']}'}  # type: ignore
-                ]
-            )
+        if mmr_lambda is not None and diverse:
+            candidates = len(search_results)
+            search_results = diversify(search_results, limit, mmr_lambda)
+            trace.mmr_dropped = candidates - len(search_results)
+
+        if rerank:
+            scores = sorted((result.score for result in search_results), reverse=True)
+            decision = self.rerank_policy.decide(scores, limit)
+            trace.rerank_decision = decision
+            rerank = decision.reranked
+            search_results = search_results[:max(decision.candidates, limit)]
+
+        if rerank and deadline.available() <= 0:
+            deadline.degrade('rerank_skipped')
+            rerank = False
+
+        if rerank:
+            results = await self._rerank(query, search_results, limit, deadline, trace)
+        else:
+            results = search_results[:limit]
 
-            relevance_score = float(relevance_check.content)
-            reranked_results.append({
-                **result.dict(),
-                'relevance_score': relevance_score,
-                'combined_score': (result.score + relevance_score) / 2
+        if neighbors > 0:
+            if deadline.available() <= 0:
+                deadline.degrade('neighbors_skipped')
+            else:
+                self.expand_neighbors(collection_name, results, neighbors, max_context_tokens)
+        return results
+
+    async def search_hits(
+            self,
+            collection_name: str,
+            query_vector: List[float],
+            filter_: Optional[SearchFilter] = None,
+            limit: int = 5,
+            with_vectors: bool = False
+    ) -> List[SearchHit]:
+        query_filter = build_qdrant_filter(filter_)
+        shard_points = await self.router.gather(lambda client: client.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            limit=limit,
+            query_filter=query_filter,
+            with_payload=SEARCH_PAYLOAD_FIELDS,
+            with_vectors=with_vectors,
+        ))
+        points = heapq.nlargest(limit, itertools.chain.from_iterable(shard_points), key=lambda point: point.score)
+        return [
+            SearchHit(point.id, point.score, point.payload or {}, vector=cast(Optional[List[float]], point.vector))
+            for point in points
+        ]
+
+    async def _rerank(
+            self,
+            query: str,
+            search_results: List[SearchHit],
+            limit: int,
+            deadline: Optional[Deadline] = None,
+            trace: Optional[SearchTrace] = None
+    ) -> List[SearchHit]:
+        if not search_results:
+            return []
+
+        deadline = deadline or Deadline()
+        trace = trace or SearchTrace()
+        tasks = [
+            asyncio.ensure_future(self.relevance_scorer.score(query, result.payload['text']))
+            for result in search_results
+        ]
+        timeout = deadline.available() if deadline.enabled else None
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        trace.rerank_scored = sum(task.result() is not None for task in done)
+        trace.rerank_failed = len(done) - trace.rerank_scored
+        if pending:
+            deadline.degrade('rerank_partial' if trace.rerank_scored else 'rerank_skipped')
+        if not trace.rerank_scored:
+            return search_results[:limit]
+
+        for result, task in zip(search_results, tasks):
+            relevance_score = task.result() if task in done else None
+            result.relevance_score = relevance_score
+            result.combined_score = result.score if relevance_score is None else (result.score + relevance_score) / 2
+
+        search_results.sort(key=lambda result: result.rank_score, reverse=True)
+        return search_results[:limit]
+
+    def expand_neighbors(
+            self,
+            collection_name: str,
+            results: List[SearchHit],
+            window: int,
+            max_tokens: Optional[int] = None
+    ) -> List[SearchHit]:
+        anchors = [
+            (result, result.payload['filename'], result.payload['chunk_index'])
+            for result in results
+            if result.payload.get('filename') is not None and result.payload.get('chunk_index') is not None
+        ]
+        if window < 1 or not anchors:
+            return results
+
+        chunks = {}
+        shards = self.router.partition(anchors, lambda anchor: self.router.shard_for(anchor[1]))
+        for shard, shard_anchors in shards.items():
+            points, _ = self.router.clients[shard].scroll(
+                collection_name=collection_name,
+                scroll_filter=models.Filter(should=[
+                    models.Filter(must=[
+                        models.FieldCondition(key='filename', match=models.MatchValue(value=filename)),
+                        models.FieldCondition(
+                            key='chunk_index',
+                            range=models.Range(gte=chunk_index - window, lte=chunk_index + window)
+                        ),
+                    ])
+                    for _, filename, chunk_index in shard_anchors
+                ]),
+                limit=len(shard_anchors) * (2 * window + 1),
+                with_payload=SEARCH_PAYLOAD_FIELDS,
+                with_vectors=False,
+            )
+            chunks.update({
+                (point.payload['filename'], point.payload['chunk_index']): point.payload
+                for point in points
+                if point.payload
             })
 
-        reranked_results.sort(key=lambda x: x['combined_score'], reverse=True)
-        return reranked_results[:limit]
+        taken = {(filename, chunk_index) for _, filename, chunk_index in anchors}
+        used_tokens = sum(result.payload.get('tokens', 0) for result in results)
+
+        for distance in range(1, window + 1):
+            for result, filename, chunk_index in anchors:
+                for neighbor_index in (chunk_index - distance, chunk_index + distance):
+                    key = (filename, neighbor_index)
+                    if key in taken or key not in chunks:
+                        continue
+                    tokens = chunks[key].get('tokens', 0)
+                    if max_tokens is not None and used_tokens + tokens > max_tokens:
+                        continue
+                    used_tokens += tokens
+                    taken.add(key)
+                    result.neighbors.append(chunks[key])
+
+        for result in results:
+            result.neighbors.sort(key=lambda payload: payload['chunk_index'])
+        return results
@@ -8,7 +8,63 @@ class Settings(BaseSettings):
     AI_PROVIDER: str = os.getenv('AI_PROVIDER', 'openai')
     QDRANT_HOST: str = os.getenv('QDRANT_HOST', 'qdrant')
     QDRANT_PORT: int = int(os.getenv('QDRANT_PORT', '6333'))
+    QDRANT_SHARDS: str = os.getenv('QDRANT_SHARDS', '')
+    COLLECTION_NAME: str = os.getenv('COLLECTION_NAME', 'ai_course_docs')
+    COLLECTIONS: str = os.getenv('COLLECTIONS', '')
     OPENAI_API_KEY: Optional[str] = os.getenv('OPENAI_API_KEY')
+    OPENAI_EMBEDDING_MODEL: str = os.getenv('OPENAI_EMBEDDING_MODEL', 'text-embedding-ada-002')
+    OPENAI_COMPLETION_MODEL: str = os.getenv('OPENAI_COMPLETION_MODEL', 'gpt-4o-mini')
+    RERANK_PROVIDER: Optional[str] = os.getenv('RERANK_PROVIDER')
+    RERANK_MODEL: Optional[str] = os.getenv('RERANK_MODEL')
+    ANSWER_PROVIDER: Optional[str] = os.getenv('ANSWER_PROVIDER')
+    ANSWER_MODEL: Optional[str] = os.getenv('ANSWER_MODEL')
+    EMBEDDING_DIMENSIONS: Optional[int] = (
+        int(os.environ['EMBEDDING_DIMENSIONS']) if os.getenv('EMBEDDING_DIMENSIONS') else None
+    )
+    EMBEDDING_PROJECTION_PATH: Optional[str] = os.getenv('EMBEDDING_PROJECTION_PATH')
+    MAX_CONTEXT_TOKENS: int = int(os.getenv('MAX_CONTEXT_TOKENS', '6000'))
+    QUERY_DEADLINE_MS: int = int(os.getenv('QUERY_DEADLINE_MS', '20000'))
+    RERANK_MODE: str = os.getenv('RERANK_MODE', 'always')
+    RERANK_SCORING: str = os.getenv('RERANK_SCORING', 'logprobs')
+    RERANK_MARGIN_THRESHOLD: float = float(os.getenv('RERANK_MARGIN_THRESHOLD', '0.03'))
+    RERANK_GAP_THRESHOLD: float = float(os.getenv('RERANK_GAP_THRESHOLD', '0.02'))
+    RERANK_ENTROPY_THRESHOLD: float = float(os.getenv('RERANK_ENTROPY_THRESHOLD', '0.85'))
+    RERANK_TEMPERATURE: float = float(os.getenv('RERANK_TEMPERATURE', '0.02'))
+    SEARCH_OVERSAMPLING: int = int(os.getenv('SEARCH_OVERSAMPLING', '2'))
+    MMR_LAMBDA: Optional[float] = float(os.environ['MMR_LAMBDA']) if os.getenv('MMR_LAMBDA') else None
+    SNAPSHOT_PATH: Optional[str] = os.getenv('SNAPSHOT_PATH')
+    DEDUP_INDEX_PATH: Optional[str] = os.getenv('DEDUP_INDEX_PATH')
+    DEDUP_THRESHOLD: float = float(os.getenv('DEDUP_THRESHOLD', '0.8'))
+    POINTS_DUMP_PATH: Optional[str] = os.getenv('POINTS_DUMP_PATH')
+    WARMUP_QUERY: Optional[str] = os.getenv('WARMUP_QUERY')
+    AI_RATE_LIMIT_RPM: int = int(os.getenv('AI_RATE_LIMIT_RPM', '500'))
+    AI_RATE_LIMIT_TPM: int = int(os.getenv('AI_RATE_LIMIT_TPM', '200000'))
+    AI_MAX_CONCURRENCY: int = int(os.getenv('AI_MAX_CONCURRENCY', '16'))
+    AI_MIN_CONCURRENCY: int = int(os.getenv('AI_MIN_CONCURRENCY', '1'))
+    AI_RATE_LIMIT_RETRIES: int = int(os.getenv('AI_RATE_LIMIT_RETRIES', '3'))
+    AI_FALLBACK_PROVIDERS: str = os.getenv('AI_FALLBACK_PROVIDERS', '')
+    AI_HEDGE_PERCENTILE: float = float(os.getenv('AI_HEDGE_PERCENTILE', '0.95'))
+    AI_HEDGE_MIN_DELAY_MS: int = int(os.getenv('AI_HEDGE_MIN_DELAY_MS', '50'))
+    AI_PROVIDER_RETRIES: int = int(os.getenv('AI_PROVIDER_RETRIES', '2'))
+    AI_CIRCUIT_FAILURES: int = int(os.getenv('AI_CIRCUIT_FAILURES', '5'))
+    AI_CIRCUIT_RESET_SECONDS: float = float(os.getenv('AI_CIRCUIT_RESET_SECONDS', '30'))
+    AI_COALESCE_REQUESTS: bool = os.getenv('AI_COALESCE_REQUESTS', 'true').lower() == 'true'
+    SPLIT_WORKERS: int = int(os.getenv('SPLIT_WORKERS', '2'))
+    SPLIT_MAX_PENDING: int = int(os.getenv('SPLIT_MAX_PENDING', '8'))
+    QUERY_CONCURRENCY: int = int(os.getenv('QUERY_CONCURRENCY', '16'))
+    QUERY_QUEUE_SIZE: int = int(os.getenv('QUERY_QUEUE_SIZE', '64'))
+    QUERY_QUEUE_TIMEOUT: float = float(os.getenv('QUERY_QUEUE_TIMEOUT', '10'))
+    INGEST_CONCURRENCY: int = int(os.getenv('INGEST_CONCURRENCY', '2'))
+    INGEST_QUEUE_SIZE: int = int(os.getenv('INGEST_QUEUE_SIZE', '8'))
+    INGEST_QUEUE_TIMEOUT: float = float(os.getenv('INGEST_QUEUE_TIMEOUT', '60'))
+    OLLAMA_BASE_URL: str = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+    OLLAMA_EMBEDDING_MODEL: str = os.getenv('OLLAMA_EMBEDDING_MODEL', 'llama2')
+    OLLAMA_COMPLETION_MODEL: str = os.getenv('OLLAMA_COMPLETION_MODEL', 'llama2')
+    OLLAMA_KEEP_ALIVE: str = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+    OLLAMA_TIMEOUT: float = float(os.getenv('OLLAMA_TIMEOUT', '120'))
+    OLLAMA_CONNECT_TIMEOUT: float = float(os.getenv('OLLAMA_CONNECT_TIMEOUT', '5'))
+    OLLAMA_MAX_CONNECTIONS: int = int(os.getenv('OLLAMA_MAX_CONNECTIONS', '20'))
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv('OLLAMA_MAX_KEEPALIVE_CONNECTIONS', '10'))
 
     class Config:
         env_file = '../.env'
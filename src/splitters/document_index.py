@@ -0,0 +1,147 @@
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+HEADER_PATTERN = re.compile(r'(#{1,6})[ \t]+(.*)')
+FENCE_PATTERN = re.compile(r' {0,3}(`{3,}|~{3,})')
+LIST_ITEM_PATTERN = re.compile(r'\s*(?:[-*+]|\d+[.)])\s+')
+
+HEADER_BOUNDARY = 3
+PARAGRAPH_BOUNDARY = 2
+LINE_BOUNDARY = 1
+
+
+@dataclass
+class Header:
+    offset: int
+    level: int
+    title: str
+
+
+@dataclass
+class Block:
+    kind: str
+    start: int
+    end: int
+
+
+@dataclass
+class DocumentIndex:
+    length: int
+    line_starts: List[int] = field(default_factory=list)
+    headers: List[Header] = field(default_factory=list)
+    blocks: List[Block] = field(default_factory=list)
+    boundaries: List[int] = field(default_factory=list)
+    boundary_scores: List[int] = field(default_factory=list)
+    header_offsets: List[int] = field(default_factory=list)
+    header_trails: List[Dict[str, List[str]]] = field(default_factory=list)
+
+    @classmethod
+    def scan(cls, text: str) -> 'DocumentIndex':
+        index = cls(length=len(text))
+        lines = text.splitlines(keepends=True)
+
+        offset = 0
+        fence: Optional[Tuple[str, int]] = None
+        open_block: Optional[Block] = None
+        previous_blank = True
+
+        for line in lines:
+            index.line_starts.append(offset)
+            stripped = line.strip()
+            fence_match = FENCE_PATTERN.match(line)
+
+            if fence is not None:
+                marker, fence_start = fence
+                if fence_match and fence_match.group(1)[0] == marker[0] and len(fence_match.group(1)) >= len(marker):
+                    index.blocks.append(Block('code', fence_start, offset + len(line)))
+                    fence = None
+                offset += len(line)
+                continue
+
+            kind = cls._line_kind(line, stripped, open_block)
+            if open_block is not None and kind != open_block.kind:
+                open_block.end = offset
+                index.blocks.append(open_block)
+                open_block = None
+
+            if fence_match:
+                fence = (fence_match.group(1), offset)
+                index._add_boundary(offset, PARAGRAPH_BOUNDARY if previous_blank else LINE_BOUNDARY)
+            elif kind in ('table', 'list'):
+                if open_block is None:
+                    open_block = Block(kind, offset, offset)
+                    index._add_boundary(offset, PARAGRAPH_BOUNDARY if previous_blank else LINE_BOUNDARY)
+                elif kind == 'list' and LIST_ITEM_PATTERN.match(line):
+                    index._add_boundary(offset, LINE_BOUNDARY)
+            else:
+                header_match = HEADER_PATTERN.match(line)
+                if header_match:
+                    index.headers.append(Header(offset, len(header_match.group(1)), header_match.group(2).strip()))
+                    index._add_boundary(offset, HEADER_BOUNDARY)
+                else:
+                    index._add_boundary(offset, PARAGRAPH_BOUNDARY if previous_blank else LINE_BOUNDARY)
+
+            previous_blank = not stripped
+            offset += len(line)
+
+        if fence is not None:
+            index.blocks.append(Block('code', fence[1], offset))
+        if open_block is not None:
+            open_block.end = offset
+            index.blocks.append(open_block)
+
+        index._add_boundary(len(text), HEADER_BOUNDARY)
+        index._build_header_trails()
+        return index
+
+    @staticmethod
+    def _line_kind(line: str, stripped: str, open_block: Optional[Block]) -> str:
+        if stripped.startswith('|'):
+            return 'table'
+        if LIST_ITEM_PATTERN.match(line):
+            return 'list'
+        if open_block is not None and open_block.kind == 'list' and stripped and line[0] in ' \t':
+            return 'list'
+        return 'text'
+
+    def _add_boundary(self, offset: int, score: int) -> None:
+        if self.boundaries and self.boundaries[-1] == offset:
+            self.boundary_scores[-1] = max(self.boundary_scores[-1], score)
+            return
+        self.boundaries.append(offset)
+        self.boundary_scores.append(score)
+
+    def _build_header_trails(self) -> None:
+        trail: Dict[str, List[str]] = {}
+        for header in self.headers:
+            trail = {key: value for key, value in trail.items() if int(key[1:]) < header.level}
+            trail[f'h{header.level}'] = [header.title]
+            self.header_offsets.append(header.offset)
+            self.header_trails.append(trail)
+
+    def boundaries_between(self, start: int, end: int) -> Tuple[List[int], List[int]]:
+        low = bisect_right(self.boundaries, start)
+        high = bisect_right(self.boundaries, end)
+        return self.boundaries[low:high], self.boundary_scores[low:high]
+
+    def lines_between(self, start: int, end: int) -> List[int]:
+        lines = self.line_starts[bisect_right(self.line_starts, start):bisect_right(self.line_starts, end)]
+        if end >= self.length and (not lines or lines[-1] != self.length):
+            lines.append(self.length)
+        return lines
+
+    def headers_for(self, start: int, end: int) -> Dict[str, List[str]]:
+        first = bisect_left(self.header_offsets, start)
+        last = bisect_left(self.header_offsets, end)
+
+        headers = dict(self.header_trails[first - 1]) if first > 0 else {}
+        in_chunk: Dict[int, List[str]] = {}
+        for header in self.headers[first:last]:
+            in_chunk.setdefault(header.level, []).append(header.title)
+
+        for level in sorted(in_chunk):
+            headers = {key: value for key, value in headers.items() if int(key[1:]) < level}
+            headers[f'h{level}'] = in_chunk[level]
+        return headers
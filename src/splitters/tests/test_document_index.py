@@ -0,0 +1,86 @@
+from src.splitters.document_index import DocumentIndex
+from src.splitters.text_splitter import MarkdownChunkStrategy, TextSplitter
+
+DOCUMENT = '''# Course
+Intro paragraph about the course.
+
+## Setup
+Install the tools:
+
+```bash
+# not a header
+pip install -r requirements.txt
+python app.py
+```
+
+| Model | Size |
+| --- | --- |
+| small | 1 |
+| large | 2 |
+
+## Usage
+- first item
+  continued
+- second item
+
+### Details
+Final words here.
+'''
+
+
+def test_scan_skips_headers_inside_code_fences():
+    index = DocumentIndex.scan(DOCUMENT)
+
+    assert [(h.level, h.title) for h in index.headers] == [(1, 'Course'), (2, 'Setup'), (2, 'Usage'), (3, 'Details')]
+    assert sorted(block.kind for block in index.blocks) == ['code', 'list', 'table']
+
+
+def test_boundaries_never_fall_inside_blocks():
+    index = DocumentIndex.scan(DOCUMENT)
+
+    for block in index.blocks:
+        inside = [offset for offset in index.boundaries if block.start < offset < block.end]
+        if block.kind == 'list':
+            assert all(DOCUMENT[offset:].lstrip().startswith('-') for offset in inside)
+        else:
+            assert inside == []
+
+
+def test_headers_for_uses_header_trail_before_chunk():
+    index = DocumentIndex.scan(DOCUMENT)
+    details = DOCUMENT.index('Final words')
+
+    assert index.headers_for(details, len(DOCUMENT)) == {'h1': ['Course'], 'h2': ['Usage'], 'h3': ['Details']}
+    assert index.headers_for(0, DOCUMENT.index('## Usage')) == {'h1': ['Course'], 'h2': ['Setup']}
+
+
+def test_markdown_strategy_keeps_code_and_tables_intact(word_counter):
+    splitter = TextSplitter(token_counter=word_counter, chunk_strategy=MarkdownChunkStrategy())
+
+    chunks = splitter.split(DOCUMENT, 30)
+
+    assert ''.join(DOCUMENT[chunk.start:chunk.end] for chunk in chunks) == DOCUMENT
+    for chunk in chunks:
+        assert chunk.metadata.tokens <= 30
+        original = DOCUMENT[chunk.start:chunk.end]
+        assert original.count('```') in (0, 2)
+        assert original.count('| small |') == original.count('| large |')
+
+
+def test_markdown_strategy_prefers_header_boundaries(word_counter):
+    splitter = TextSplitter(token_counter=word_counter, chunk_strategy=MarkdownChunkStrategy())
+
+    chunks = splitter.split(DOCUMENT, 60)
+
+    assert DOCUMENT[chunks[1].start:].startswith('### Details')
+    assert chunks[1].metadata.headers == {'h1': ['Course'], 'h2': ['Usage'], 'h3': ['Details']}
+
+
+def test_markdown_strategy_always_makes_progress_on_oversized_blocks(word_counter):
+    text = '```\n' + 'word ' * 200 + '\n```\n'
+    splitter = TextSplitter(token_counter=word_counter, chunk_strategy=MarkdownChunkStrategy())
+
+    chunks = splitter.split(text, 20)
+
+    assert ''.join(text[chunk.start:chunk.end] for chunk in chunks) == text
+    assert all(chunk.metadata.tokens <= 20 for chunk in chunks)
@@ -2,6 +2,7 @@ from src.domain.document import Document
 from src.splitters.text_splitter import (
     HeaderExtractor,
     NewlineChunkStrategy,
+    TextFormatter,
     TextSplitter,
     TiktokenCounter,
     URLProcessor,
@@ -122,3 +123,107 @@ def test_chunk_size_limits():
     for chunk in chunks:
         tokens = chunk.metadata.tokens
         assert tokens <= limit, f'Chunk exceeds token limit: {tokens} > {limit}'
+
+
+def test_url_processing_reuses_placeholder_for_repeated_urls():
+    processor = URLProcessor()
+    text = 'See https://a.dev/x, [again](https://a.dev/x) and ![img](https://a.dev/i.png) https://a.dev/i.png'
+    content, urls, images = processor.process_content(text)
+
+    assert urls == ['https://a.dev/x,', 'https://a.dev/x']
+    assert images == ['https://a.dev/i.png']
+    assert content == 'See {$url0} {$url1} and ![]({$img0}) https://a.dev/i.png'
+
+
+def test_url_processing_keeps_links_without_urls():
+    processor = URLProcessor()
+    text = 'Local ![diagram](img/diagram.png) and [next lesson](lesson_02.md)'
+    content, urls, images = processor.process_content(text)
+
+    assert content == text
+    assert urls == []
+    assert images == []
+
+
+def test_url_state_does_not_leak_between_documents():
+    splitter = get_test_splitter()
+    splitter.split('First https://first.dev document', 100)
+    chunks = splitter.split('Second https://second.dev document', 100)
+
+    assert chunks[0].metadata.urls == ['https://second.dev']
+    assert '{$url0}' in chunks[0].text
+
+
+class FakeEncoding:
+    def __init__(self):
+        self.calls = 0
+        self.batches = []
+
+    def encode(self, text):
+        self.calls += 1
+        return text.split()
+
+    def encode_batch(self, texts, num_threads=8):
+        self.batches.append((list(texts), num_threads))
+        return [text.split() for text in texts]
+
+    def decode_with_offsets(self, tokens):
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(token) + 1
+        return ' '.join(tokens), offsets
+
+
+def get_counter_with_fake_encoding(**kwargs) -> TiktokenCounter:
+    counter = TiktokenCounter(**kwargs)
+    counter._tokenizer = FakeEncoding()  # type: ignore
+    return counter
+
+
+def test_count_tokens_batch_matches_single_counts():
+    counter = get_counter_with_fake_encoding(num_threads=4)
+    texts = ['one', 'one two', '', 'one two three four']
+
+    assert counter.count_tokens_batch(texts) == [counter.count_tokens(text) for text in texts]
+    assert counter.count_tokens_batch([]) == []
+
+
+def test_count_tokens_batch_encodes_only_cache_misses_in_one_batch():
+    counter = get_counter_with_fake_encoding(num_threads=4)
+    counter.count_tokens('cached text')
+
+    counts = counter.count_tokens_batch(['a b', 'cached text', 'c d e', 'a b'])
+
+    assert counts == [2, 2, 3, 2]
+    assert counter.tokenizer.batches == [(['a b', 'c d e'], 4)]  # type: ignore
+    assert counter.tokenizer.calls == 1  # type: ignore
+
+
+def test_encode_with_offsets_maps_tokens_to_text_positions():
+    counter = get_counter_with_fake_encoding()
+
+    tokens, offsets = counter.encode_with_offsets('one two three')
+
+    assert tokens == ['one', 'two', 'three']
+    assert offsets == [0, 4, 8]
+
+
+def test_token_counter_batch_defaults_to_single_counts(word_counter):
+    assert word_counter.count_tokens_batch(['a b', 'c']) == [2, 1]
+
+
+def test_count_tokens_memoizes_repeated_texts():
+    counter = get_counter_with_fake_encoding()
+    counter.count_tokens('same text')
+    counter.count_tokens('same text')
+
+    assert counter.tokenizer.calls == 1
+
+
+def test_count_chat_tokens_adds_constant_overhead():
+    counter = get_counter_with_fake_encoding()
+    overhead = counter.count_tokens(TextFormatter.format_for_tokenization(''))
+
+    assert counter.count_chat_tokens('a b c') == 3 + overhead
+    assert counter.count_chat_tokens('') == overhead
@@ -2,14 +2,18 @@ import json
 import logging
 import os
 import re
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Protocol, Tuple
-
-import tiktoken
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
 
 from src.domain.document import DocMetadata, Document
+from src.splitters.document_index import DocumentIndex
+
+if TYPE_CHECKING:
+    import tiktoken
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,13 +32,65 @@ class TokenCounter(Protocol):
     def count_tokens(self, text: str) -> int:
         ...
 
+    def count_tokens_batch(self, texts: Sequence[str]) -> List[int]:
+        return [self.count_tokens(text) for text in texts]
+
+    def count_chat_tokens(self, text: str) -> int:
+        return self.count_tokens(TextFormatter.format_for_tokenization(text))
+
 
 class TiktokenCounter:
-    def __init__(self, model_name: str = 'cl100k_base'):
-        self.tokenizer = tiktoken.get_encoding(model_name)
+    def __init__(self, model_name: str = 'cl100k_base', cache_size: int = 2048, num_threads: Optional[int] = None):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self._tokenizer: Optional['tiktoken.Encoding'] = None
+        self._chat_overhead: Optional[int] = None
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def tokenizer(self) -> 'tiktoken.Encoding':
+        if self._tokenizer is None:
+            import tiktoken
+
+            self._tokenizer = tiktoken.get_encoding(self.model_name)
+        return self._tokenizer
 
     def count_tokens(self, text: str) -> int:
-        return len(self.tokenizer.encode(text))
+        with self._cache_lock:
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                return self._cache[text]
+        return self._remember(text, len(self.tokenizer.encode(text)))
+
+    def count_tokens_batch(self, texts: Sequence[str]) -> List[int]:
+        with self._cache_lock:
+            misses = [text for text in dict.fromkeys(texts) if text not in self._cache]
+        if len(misses) < 2 or self.num_threads < 2:
+            return [self.count_tokens(text) for text in texts]
+
+        encoded = self.tokenizer.encode_batch(misses, num_threads=self.num_threads)
+        counts = {text: self._remember(text, len(tokens)) for text, tokens in zip(misses, encoded)}
+        return [counts[text] if text in counts else self.count_tokens(text) for text in texts]
+
+    def count_chat_tokens(self, text: str) -> int:
+        if self._chat_overhead is None:
+            self._chat_overhead = self.count_tokens(TextFormatter.format_for_tokenization(''))
+        return self.count_tokens(text) + self._chat_overhead
+
+    def encode_with_offsets(self, text: str) -> Tuple[List[int], List[int]]:
+        tokens = self.tokenizer.encode(text)
+        _, offsets = self.tokenizer.decode_with_offsets(tokens)
+        return tokens, offsets
+
+    def _remember(self, text: str, count: int) -> int:
+        with self._cache_lock:
+            self._cache[text] = count
+            self._cache.move_to_end(text)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return count
 
 
 class TextFormatter:
@@ -73,69 +129,36 @@ class HeaderExtractor:
             headers.pop(f'h{header}', None)
 
 
+URL_PATTERN = r'https?://[\w\-\.]+\.[a-zA-Z]{2,}[^\s\)]*'
+
+LINK_PATTERN = re.compile(
+    rf'(?P<image>!\s*(?:\[[^\]]*\])?\s*\([^)]*?(?P<image_url>{URL_PATTERN})[^)]*\))'
+    rf'|(?P<link>\[[^\]]*\]\([^)]*?(?P<link_url>{URL_PATTERN})[^)]*\))'
+    rf'|(?P<url>{URL_PATTERN})'
+)
+
+
 class URLProcessor:
     def __init__(self) -> None:
-        self.url_pattern = r'https?://[\w\-\.]+\.[a-zA-Z]{2,}[^\s\)]*'
-        self.urls: List[str] = []
-        self.images: List[str] = []
-        self.url_index = 0
-        self.image_index = 0
+        self.urls: Dict[str, int] = {}
+        self.images: Dict[str, int] = {}
 
     def process_content(self, text: str) -> Tuple[str, List[str], List[str]]:
-        content = text
-        content = self._process_images(content)
-        content = self._process_markdown_urls(content)
-        content = self._process_standalone_urls(content)
+        content = LINK_PATTERN.sub(self._replace, text)
 
         logger.debug(f'Extracted {len(self.urls)} URLs and {len(self.images)} images')
-        return content, list(dict.fromkeys(self.urls)), list(dict.fromkeys(self.images))
+        return content, list(self.urls), list(self.images)
 
-    def _process_images(self, content: str) -> str:
-        return re.sub(
-            r'!\s*(?:\[[^\]]*\])?\s*\(([^)]+)\)',
-            self._replace_image,
-            content
-        )
-
-    def _process_markdown_urls(self, content: str) -> str:
-        return re.sub(
-            r'\[[^\]]*\]\(([^)]+)\)',
-            self._replace_url,
-            content
-        )
+    def _replace(self, match: re.Match) -> str:
+        if match.lastgroup == 'image':
+            index = self.images.setdefault(match.group('image_url'), len(self.images))
+            return f'![]({{$img{index}}})'
 
-    def _process_standalone_urls(self, content: str) -> str:
-        return re.sub(self.url_pattern, self._replace_standalone_url, content)
-
-    def _replace_image(self, match: re.Match) -> str:
-        img_url = re.search(self.url_pattern, match.group(0))
-        if img_url:
-            url = img_url.group(0)
-            self.images.append(url)
-            result = f'![]({{$img{self.image_index}}})'
-            self.image_index += 1
-            return result
-        return match.group(0)
-
-    def _replace_url(self, match: re.Match) -> str:
-        url_match = re.search(self.url_pattern, match.group(0))
-        if url_match:
-            url = url_match.group(0)
-            if url not in self.images:
-                self.urls.append(url)
-                result = f'{{$url{self.url_index}}}'
-                self.url_index += 1
-                return result
-        return match.group(0)
-
-    def _replace_standalone_url(self, match: re.Match) -> str:
-        url = match.group(0)
-        if url not in self.images and url not in self.urls:
-            self.urls.append(url)
-            result = f'{{$url{self.url_index}}}'
-            self.url_index += 1
-            return result
-        return url
+        url = match.group('link_url') if match.lastgroup == 'link' else match.group('url')
+        if url in self.images:
+            return match.group(0)
+        index = self.urls.setdefault(url, len(self.urls))
+        return f'{{$url{index}}}'
 
 
 class ChunkStrategy(ABC):
@@ -143,10 +166,12 @@ class ChunkStrategy(ABC):
     def get_chunk(self, text: str, start: int, limit: int, token_counter: TokenCounter) -> Tuple[str, int]:
         pass
 
+    def headers_for(self, text: str, start: int, end: int) -> Optional[Dict[str, List[str]]]:
+        return None
+
 
 class NewlineChunkStrategy(ChunkStrategy):
     def get_chunk(self, text: str, start: int, limit: int, token_counter: TokenCounter) -> Tuple[str, int]:
-        formatter = TextFormatter()
         remaining_text = text[start:]
 
         if not remaining_text:
@@ -158,7 +183,7 @@ class NewlineChunkStrategy(ChunkStrategy):
         max_iterations = 100
         iteration = 0
 
-        current_tokens = token_counter.count_tokens(formatter.format_for_tokenization(chunk_text))
+        current_tokens = token_counter.count_chat_tokens(chunk_text)
 
         while current_tokens != limit and iteration < max_iterations:
             if current_tokens > limit:
@@ -170,7 +195,7 @@ class NewlineChunkStrategy(ChunkStrategy):
                 end = potential_end
 
             chunk_text = text[start:end]
-            current_tokens = token_counter.count_tokens(formatter.format_for_tokenization(chunk_text))
+            current_tokens = token_counter.count_chat_tokens(chunk_text)
             iteration += 1
 
             if end <= start + 1:
@@ -192,24 +217,105 @@ class NewlineChunkStrategy(ChunkStrategy):
         token_counter: TokenCounter,
         limit: int,
     ) -> int:
-        formatter = TextFormatter()
-
         next_nl = text.find('\n', end)
         if next_nl != -1 and next_nl < len(text):
             extended_text = text[start:next_nl + 1]
-            if token_counter.count_tokens(
-                    formatter.format_for_tokenization(extended_text)) <= limit * 1.2:
+            if token_counter.count_chat_tokens(extended_text) <= limit * 1.2:
                 return next_nl + 1
 
         prev_nl = text.rfind('\n', start, end)
         if prev_nl > start:
             reduced_text = text[start:prev_nl + 1]
-            if token_counter.count_tokens(formatter.format_for_tokenization(reduced_text)) > 0:
+            if token_counter.count_chat_tokens(reduced_text) > 0:
                 return prev_nl + 1
 
         return end
 
 
+class MarkdownChunkStrategy(ChunkStrategy):
+    def __init__(self, min_fill: float = 0.5, max_chars_per_token: int = 10, fanout: int = 8):
+        self.min_fill = min_fill
+        self.max_chars_per_token = max_chars_per_token
+        self.fanout = fanout
+        self._text: Optional[str] = None
+        self._index: Optional[DocumentIndex] = None
+
+    def index_for(self, text: str) -> DocumentIndex:
+        if self._index is None or text is not self._text:
+            self._index = DocumentIndex.scan(text)
+            self._text = text
+        return self._index
+
+    def get_chunk(self, text: str, start: int, limit: int, token_counter: TokenCounter) -> Tuple[str, int]:
+        if start >= len(text):
+            return '', start
+
+        index = self.index_for(text)
+        window_end = min(len(text), start + limit * self.max_chars_per_token)
+        budget = limit - token_counter.count_chat_tokens('')
+
+        def fits(ends: List[int]) -> List[bool]:
+            counts = token_counter.count_tokens_batch([text[start:end] for end in ends])
+            return [count <= budget for count in counts]
+
+        boundaries, scores = index.boundaries_between(start, window_end)
+        best = self._last_fitting(boundaries, fits)
+        if best is not None:
+            end = self._prefer_structure(start, boundaries[:best + 1], scores[:best + 1])
+        else:
+            lines = index.lines_between(start, window_end)
+            line = self._last_fitting(lines, fits)
+            end = lines[line] if line is not None else self._hard_cut(start, window_end, fits)
+
+        return text[start:end], end
+
+    def headers_for(self, text: str, start: int, end: int) -> Optional[Dict[str, List[str]]]:
+        return self.index_for(text).headers_for(start, end)
+
+    def _last_fitting(self, candidates: List[int], fits: Callable[[List[int]], List[bool]]) -> Optional[int]:
+        low, high = 0, len(candidates) - 1
+        found = None
+        while low <= high:
+            size = high - low + 1
+            if size <= self.fanout:
+                probes = list(range(low, high + 1))
+            else:
+                probes = sorted({low + size * (step + 1) // (self.fanout + 1) for step in range(self.fanout)})
+
+            results = fits([candidates[probe] for probe in probes])
+            fitting = [position for position, result in enumerate(results) if result]
+            if not fitting:
+                high = probes[0] - 1
+                continue
+
+            last = fitting[-1]
+            found = probes[last]
+            low = found + 1
+            if last + 1 < len(probes):
+                high = probes[last + 1] - 1
+        return found
+
+    def _prefer_structure(self, start: int, boundaries: List[int], scores: List[int]) -> int:
+        threshold = start + (boundaries[-1] - start) * self.min_fill
+        best = len(boundaries) - 1
+        for position in range(len(boundaries) - 1, -1, -1):
+            if boundaries[position] < threshold:
+                break
+            if scores[position] > scores[best]:
+                best = position
+        return boundaries[best]
+
+    def _hard_cut(self, start: int, end: int, fits: Callable[[List[int]], List[bool]]) -> int:
+        low, high = start + 1, end
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits([middle])[0]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+
 class TextSplitter:
     def __init__(
         self,
@@ -219,13 +325,13 @@ class TextSplitter:
         self.token_counter = token_counter or TiktokenCounter()
         self.chunk_strategy = chunk_strategy or NewlineChunkStrategy()
         self.header_extractor = HeaderExtractor()
-        self.url_processor = URLProcessor()
 
     def split(self, text: str, limit: int) -> List[Document]:
         logger.info(f'Starting split process with limit: {limit} tokens')
         chunks: List[Document] = []
         position = 0
         current_headers: Dict[str, List[str]] = {}
+        url_processor = URLProcessor()
 
         while position < len(text):
             logger.debug(f'Processing chunk starting at position: {position}')
@@ -234,15 +340,18 @@ class TextSplitter:
             if not chunk_text:
                 break
 
-            headers = self.header_extractor.extract_headers(chunk_text)
-            self.header_extractor.update_headers(current_headers, headers)
-            content, urls, images = self.url_processor.process_content(chunk_text)
+            headers = self.chunk_strategy.headers_for(text, position, chunk_end)
+            if headers is None:
+                chunk_headers = self.header_extractor.extract_headers(chunk_text)
+                self.header_extractor.update_headers(current_headers, chunk_headers)
+                headers = dict(current_headers)
+            content, urls, images = url_processor.process_content(chunk_text)
 
             chunks.append(Document(
                 text=content,
                 metadata=DocMetadata(
                     tokens=self.token_counter.count_tokens(chunk_text),
-                    headers=dict(current_headers),
+                    headers=headers,
                     urls=urls,
                     images=images
                 ),
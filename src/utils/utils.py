@@ -1,20 +1,149 @@
-from typing import Any, Dict
+from typing import Dict, Optional
 
+from src.domain.search import SearchHit
 from src.services.base.ai_service import AIService
-from src.services.gpt import OpenAIService
-from src.services.ollama import OllamaService
+from src.services.hedging import HedgedAIService
+from src.services.rate_limit import RateLimitedAIService, RateLimiter
+from src.services.singleflight import CoalescingAIService
+from src.settings import Settings
 
 
-def create_ai_service(provider: str = 'openai') -> AIService:
+def create_ai_service(
+        provider: str = 'openai',
+        settings: Optional[Settings] = None,
+        limiters: Optional[Dict[str, RateLimiter]] = None
+) -> AIService:
+    settings = settings or Settings()
+    return wrap_ai_service(
+        create_embedding_provider(provider, settings),
+        settings,
+        provider,
+        create_fallback_providers(provider, settings),
+        limiters
+    )
+
+
+def create_stage_ai_service(
+        settings: Settings,
+        provider: Optional[str],
+        model: Optional[str],
+        default: AIService,
+        limiters: Optional[Dict[str, RateLimiter]] = None
+) -> AIService:
+    if not provider and not model:
+        return default
+    provider = provider or settings.AI_PROVIDER
+    service = create_provider(provider, settings, completion_model=model)
+    return wrap_ai_service(service, settings, provider, create_fallback_providers(provider, settings), limiters)
+
+
+def create_fallback_providers(provider: str, settings: Settings) -> Dict[str, AIService]:
+    names = [name.strip() for name in settings.AI_FALLBACK_PROVIDERS.split(',') if name.strip()]
+    return {name: create_provider(name, settings) for name in names if name != provider}
+
+
+def wrap_ai_service(
+        service: AIService,
+        settings: Settings,
+        provider: str,
+        fallbacks: Optional[Dict[str, AIService]] = None,
+        limiters: Optional[Dict[str, RateLimiter]] = None
+) -> AIService:
+    # keyed by provider name, so stages calling the same provider share one RPM/TPM/concurrency budget
+    limiters = {} if limiters is None else limiters
+    service = rate_limit_ai_service(service, settings, provider_limiter(provider, settings, limiters))
+    if fallbacks:
+        service = HedgedAIService(
+            [
+                service,
+                *[
+                    rate_limit_ai_service(fallback, settings, provider_limiter(name, settings, limiters))
+                    for name, fallback in fallbacks.items()
+                ]
+            ],
+            hedge_percentile=settings.AI_HEDGE_PERCENTILE,
+            min_hedge_delay=settings.AI_HEDGE_MIN_DELAY_MS / 1000,
+            max_retries=settings.AI_PROVIDER_RETRIES,
+            failure_threshold=settings.AI_CIRCUIT_FAILURES,
+            reset_timeout=settings.AI_CIRCUIT_RESET_SECONDS
+        )
+    if settings.AI_COALESCE_REQUESTS:
+        service = CoalescingAIService(service)
+    return service
+
+
+def provider_limiter(provider: str, settings: Settings, limiters: Dict[str, RateLimiter]) -> RateLimiter:
+    if provider not in limiters:
+        limiters[provider] = RateLimiter(
+            requests_per_minute=settings.AI_RATE_LIMIT_RPM,
+            tokens_per_minute=settings.AI_RATE_LIMIT_TPM,
+            max_concurrency=settings.AI_MAX_CONCURRENCY,
+            min_concurrency=settings.AI_MIN_CONCURRENCY
+        )
+    return limiters[provider]
+
+
+def rate_limit_ai_service(service: AIService, settings: Settings, limiter: RateLimiter) -> AIService:
+    return RateLimitedAIService(service, limiter, max_retries=settings.AI_RATE_LIMIT_RETRIES)
+
+
+def create_embedding_provider(provider: str, settings: Settings) -> AIService:
+    if not settings.EMBEDDING_PROJECTION_PATH:
+        return create_provider(provider, settings, dimensions=settings.EMBEDDING_DIMENSIONS)
+
+    from src.services.projection import EmbeddingProjection, ProjectedAIService
+
+    projection = EmbeddingProjection.load(settings.EMBEDDING_PROJECTION_PATH)
+    if settings.EMBEDDING_DIMENSIONS and settings.EMBEDDING_DIMENSIONS != projection.dimensions:
+        raise ValueError(
+            f'EMBEDDING_DIMENSIONS={settings.EMBEDDING_DIMENSIONS} does not match the '
+            f'{projection.dimensions}-dim projection in {settings.EMBEDDING_PROJECTION_PATH}'
+        )
+    return ProjectedAIService(create_provider(provider, settings), projection)
+
+
+def create_provider(
+        provider: str,
+        settings: Settings,
+        dimensions: Optional[int] = None,
+        completion_model: Optional[str] = None
+) -> AIService:
     if provider == 'openai':
-        return OpenAIService()
+        from src.services.gpt import OpenAIService
+
+        return OpenAIService(
+            api_key=settings.OPENAI_API_KEY,
+            max_retries=0,
+            embedding_model=settings.OPENAI_EMBEDDING_MODEL,
+            completion_model=completion_model or settings.OPENAI_COMPLETION_MODEL,
+            dimensions=dimensions
+        )
     elif provider == 'ollama':
-        return OllamaService()
+        from src.services.ollama import OllamaService
+
+        if dimensions:
+            raise ValueError('Ollama cannot reduce embedding dimensions, fit a projection and set '
+                             'EMBEDDING_PROJECTION_PATH')
+
+        return OllamaService(
+            base_url=settings.OLLAMA_BASE_URL,
+            embedding_model=settings.OLLAMA_EMBEDDING_MODEL,
+            completion_model=completion_model or settings.OLLAMA_COMPLETION_MODEL,
+            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+            timeout=settings.OLLAMA_TIMEOUT,
+            connect_timeout=settings.OLLAMA_CONNECT_TIMEOUT,
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS
+        )
     else:
         raise ValueError(f'Unknown AI service provider: {provider}')
 
 
-def format_search_result(result: Dict[str, Any]) -> str:
-    filename = result['payload'].get('filename', 'unknown')
-    text = result['payload']['text']
+def format_search_result(result: SearchHit) -> str:
+    filename = result.payload.get('filename', 'unknown')
+    chunks = sorted(
+        [result.payload, *result.neighbors],
+        key=lambda payload: payload.get('chunk_index') or 0
+    )
+    text = '\n'.join(chunk['text'] for chunk in chunks)
     return f'[{filename}]: {text}'